@@ -1,14 +1,371 @@
+import argparse
+import os
+import socket
+import sqlite3
 import sys
+import time
+from collections import Counter, deque
+from functools import partial
 from pathlib import Path
 import pandas as pd
-from src.scraper import scrape_player_info
 
+# src modules import each other by module name, as when run from inside src/
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
 
-def main(urls_file_path):
-    urls_file = Path(urls_file_path)
-    if urls_file.suffix.lower() != ".csv":
+import metrics
+from db_manager import DatabaseManager
+from api_backend import MAX_TITLES, ApiBackend
+from canonical import Canonicalizer, RedirectMap
+from columnar import output_format, require_pyarrow
+from crawler import CrawlState, Crawler
+from db_writer import DatabaseWriter, to_db_row
+from fetcher import Fetcher
+from http_cache import ResponseCache
+from pipeline import scrape_all, scrape_all_pipelined
+from snapshot_archive import SnapshotArchive
+from streaming import open_output_writer, read_urls, stream_to_csv
+from work_queue import WorkQueue, print_status
+
+
+DEFAULT_OUTPUT_CSV = "data/scraped_player_data.csv"
+
+
+def report(stats, total_urls):
+    print(
+        f"Scraped {stats['players']} players from {total_urls} URLs; "
+        f"skipped {stats['not_player'] + stats['prefiltered']} non-player pages "
+        f"({stats['prefiltered']} rejected before parsing)."
+    )
+    if stats["unchanged"]:
+        changed = stats["players"] + stats["not_player"] + stats["prefiltered"]
+        print(f"Changed pages: {changed}, unchanged pages skipped: {stats['unchanged']}.")
+    if stats["duplicate"]:
+        print(f"Skipped {stats['duplicate']} duplicate URLs of pages already scraped.")
+    if stats["failed"]:
+        print(f"Failed to fetch {stats['failed']} pages after retries.")
+
+
+def write_run_reports(registry, stats, report_path, prometheus_path, profile_path):
+    if report_path:
+        registry.write_json(report_path, stats)
+        print(f"Run report saved to {report_path}")
+    if prometheus_path:
+        registry.write_prometheus(prometheus_path, stats)
+        print(f"Prometheus metrics saved to {prometheus_path}")
+    if profile_path and registry.write_profile(profile_path):
+        print(f"Parse profile saved to {profile_path} (view with python -m pstats)")
+
+
+def claim_batches(work_queue, worker, batch_size, claimed):
+    """Yields queued URLs batch by batch, recording each claimed batch in order."""
+    while True:
+        urls = work_queue.claim(worker, batch_size)
+        if not urls:
+            return
+        claimed.append(urls)
+        yield from urls
+
+
+def drain_queue(work_queue, scrape, db_path, batch_size, failed_urls):
+    """
+    Scrapes claimed batches until the queue is empty. Each batch is written to
+    the database before its URLs are marked done, so a crash at any point only
+    leaves leased URLs that another worker picks up after the lease expires.
+    URLs that could not be fetched or stored go back to the queue, the whole
+    batch when its write fails. Leases are renewed while batches are in work.
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    db_manager = DatabaseManager(db_path, bulk_load=True)
+    db_manager.create_table()
+    claimed = deque()
+    players = []
+    finished = 0
+    renewed_at = time.monotonic()
+    try:
+        urls = claim_batches(work_queue, worker, batch_size, claimed)
+        for player_info in scrape(urls):
+            if player_info is not None:
+                players.append(to_db_row(player_info))
+            finished += 1
+            if time.monotonic() - renewed_at > work_queue.lease_seconds / 3:
+                work_queue.renew(worker)
+                renewed_at = time.monotonic()
+            if finished < len(claimed[0]):
+                continue
+
+            batch = claimed.popleft()
+            failed = set(failed_urls).intersection(batch)
+            skipped = len(db_manager.failed_rows)
+            try:
+                db_manager.bulk_insert_or_update_from_scraper(players)
+            except sqlite3.Error as e:
+                print(f"Database error, batch of {len(batch)} URLs returned to the queue: {e}")
+                failed = set(batch)
+            else:
+                failed.update(url for url, _ in db_manager.failed_rows[skipped:])
+            work_queue.complete([url for url in batch if url not in failed], worker)
+            work_queue.release(failed, worker)
+            players = []
+            finished = 0
+    finally:
+        db_manager.close_connection()
+
+
+def crawl_to_outputs(crawler, seeds, scrape, stats, output_csv_file_path):
+    writer = open_output_writer(output_csv_file_path) if output_csv_file_path else None
+    try:
+        for player_info in scrape(crawler.crawl(seeds)):
+            if player_info is not None and writer is not None:
+                writer.write(player_info)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(
+        f"Expanded {crawler.hubs_fetched} seed, category and list pages; "
+        f"{len(crawler.state)} links left in the frontier."
+    )
+    report(stats, crawler.candidates)
+    if writer is not None:
+        print(f"Scraped data saved to {output_csv_file_path}")
+
+
+def scrape_into_db(urls, scrape, writer):
+    for player_info in scrape(urls):
+        if player_info is not None:
+            writer.put(player_info)
+        yield player_info
+
+
+def main(
+    urls_file_path=None,
+    concurrency=1,
+    per_host_limit=None,
+    parse_workers=0,
+    infobox_only=False,
+    cache_dir=None,
+    cache_size_mb=1024,
+    max_age=0,
+    output_csv_file_path=None,
+    stream=False,
+    resume=False,
+    db_path=None,
+    skip_unchanged=False,
+    archive_dir=None,
+    report_path=None,
+    prometheus_path=None,
+    profile_path=None,
+    rate=None,
+    connect_timeout=5.0,
+    read_timeout=30.0,
+    retries=4,
+    latency_target=None,
+    queue_path=None,
+    queue_batch_size=50,
+    lease_seconds=600,
+    redirects_path=None,
+    seeds_file_path=None,
+    max_depth=2,
+    max_pages=None,
+    crawl_state_path="data/crawl_state.sqlite",
+    backend_name="html",
+    api_batch_size=MAX_TITLES,
+):
+    urls_file = Path(urls_file_path) if urls_file_path else None
+    if urls_file is None and queue_path is None and seeds_file_path is None:
+        print("Error: Give a URLs file, a --queue to work on, or --seeds to crawl from.")
+        sys.exit(1)
+    if urls_file is not None and urls_file.suffix.lower() != ".csv":
         print("Error: The file provided is not a CSV file.")
         sys.exit(1)
+    if queue_path and not db_path:
+        print("Error: --queue workers write their batches to --db.")
+        sys.exit(1)
+
+    work_queue = None
+    if queue_path:
+        work_queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+        if urls_file is not None:
+            added = work_queue.add(read_urls(urls_file))
+            print(f"Added {added} new URLs to {queue_path}")
+
+    # with --db the CSV is an optional side output, streaming still needs it for checkpoints
+    if output_csv_file_path is None and (db_path is None or stream or resume):
+        output_csv_file_path = DEFAULT_OUTPUT_CSV
+    if output_csv_file_path and output_format(output_csv_file_path) != "csv":
+        if resume:
+            print("Error: --resume needs a CSV output.")
+            sys.exit(1)
+        try:
+            require_pyarrow()
+        except ImportError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    cache = None
+    if cache_dir:
+        cache = ResponseCache(
+            cache_dir, max_bytes=cache_size_mb * 1024 * 1024, max_age=max_age
+        )
+
+    known_pages = None
+    if skip_unchanged:
+        if not db_path:
+            print("Error: --skip-unchanged needs the --db the pages were stored in.")
+            sys.exit(1)
+        db_manager = DatabaseManager(db_path)
+        db_manager.create_table()
+        known_pages = db_manager.get_page_signatures()
+        db_manager.close_connection()
+
+    archive = SnapshotArchive(archive_dir) if archive_dir else None
+
+    registry = None
+    if report_path or prometheus_path or profile_path:
+        registry = metrics.enable(profile=bool(profile_path))
+
+    fetch_options = {
+        "rate": rate,
+        "timeout": (connect_timeout, read_timeout),
+        "retries": retries,
+        "latency_target": latency_target,
+    }
+
+    backend = ApiBackend(api_batch_size) if backend_name == "api" else None
+
+    redirects = RedirectMap(redirects_path) if redirects_path else None
+    # the crawler's seen-set already keeps every URL unique
+    canonicalizer = Canonicalizer(redirects, dedupe=seeds_file_path is None)
+
+    crawler = None
+    if seeds_file_path:
+        crawler = Crawler(
+            CrawlState(crawl_state_path),
+            max_depth=max_depth,
+            max_pages=max_pages,
+            fetcher=Fetcher(concurrency, per_host_limit, cache, **fetch_options),
+        )
+
+    stats = Counter()
+    failed_urls = []
+    if parse_workers:
+        scrape = partial(
+            scrape_all_pipelined,
+            concurrency=concurrency,
+            per_host_limit=per_host_limit,
+            parse_workers=parse_workers,
+            infobox_only=infobox_only,
+            cache=cache,
+            stats=stats,
+            known_pages=known_pages,
+            archive=archive,
+            fetch_options=fetch_options,
+            failed_urls=failed_urls,
+            canonicalizer=canonicalizer,
+            backend=backend,
+        )
+    else:
+        scrape = partial(
+            scrape_all,
+            concurrency=concurrency,
+            per_host_limit=per_host_limit,
+            infobox_only=infobox_only,
+            cache=cache,
+            stats=stats,
+            known_pages=known_pages,
+            archive=archive,
+            fetch_options=fetch_options,
+            failed_urls=failed_urls,
+            canonicalizer=canonicalizer,
+            backend=backend,
+        )
+
+    writer = None
+    if db_path and work_queue is None:
+        writer = DatabaseWriter(db_path).start()
+        scrape = partial(scrape_into_db, scrape=scrape, writer=writer)
+
+    try:
+        if work_queue is not None:
+            drain_queue(work_queue, scrape, db_path, queue_batch_size, failed_urls)
+            report(stats, sum(stats.values()))
+            print_status(work_queue)
+        elif crawler is not None:
+            crawl_to_outputs(
+                crawler, read_urls(seeds_file_path), scrape, stats, output_csv_file_path
+            )
+        else:
+            scrape_to_outputs(
+                urls_file,
+                scrape,
+                stats,
+                output_csv_file_path,
+                stream,
+                resume,
+                known_pages,
+            )
+    finally:
+        if backend is not None:
+            print(f"{backend.queries} API queries, {backend.renders} page renders")
+        if work_queue is not None:
+            work_queue.close()
+        if crawler is not None:
+            crawler.fetcher.close()
+            crawler.state.close()
+        if writer is not None:
+            # an exception already propagating stays the one reported
+            writer.close(raise_error=False)
+            print(f"{writer.written} players written to {db_path}")
+            if writer.error is not None:
+                print(f"Database writer stopped: {writer.error}")
+        if archive is not None:
+            archive.close()
+        if cache is not None:
+            cache.close()
+        if redirects is not None:
+            print(f"{len(redirects)} known redirects saved to {redirects_path}")
+            redirects.close()
+        if registry is not None:
+            write_run_reports(
+                registry, stats, report_path, prometheus_path, profile_path
+            )
+            metrics.disable()
+
+    if writer is not None and writer.error is not None:
+        raise writer.error
+
+
+def scrape_to_outputs(
+    urls_file,
+    scrape,
+    stats,
+    output_csv_file_path,
+    stream,
+    resume,
+    known_pages=None,
+):
+    if output_csv_file_path and output_format(output_csv_file_path) != "csv":
+        # columnar files are written a row group at a time as results arrive
+        writer = open_output_writer(output_csv_file_path)
+        processed = 0
+        try:
+            for player_info in scrape(read_urls(urls_file)):
+                processed += 1
+                if player_info is not None:
+                    writer.write(player_info)
+        finally:
+            writer.close()
+        report(stats, processed)
+        print(f"Scraped data saved to {output_csv_file_path}")
+        return
+
+    if stream or resume:
+        processed = stream_to_csv(
+            urls_file, output_csv_file_path, scrape, resume=resume
+        )
+        report(stats, processed)
+        print(f"Scraped data saved to {output_csv_file_path}")
+        return
 
     try:
         urls_df = pd.read_csv(urls_file, header=None, names=["URL"])
@@ -18,25 +375,257 @@ def main(urls_file_path):
 
     valid_player_infos = []
 
-    for url in urls_df["URL"]:
-        player_info = scrape_player_info(url)
+    urls = urls_df["URL"].tolist()
+    for url, player_info in zip(urls, scrape(urls)):
         if player_info is not None:
-            valid_player_infos.append(player_info)
-        else:
+            if output_csv_file_path:
+                valid_player_infos.append(player_info)
+        elif not known_pages or url not in known_pages:
+            # pages stored by an earlier run are usually just unchanged
             print(f"No player data found for the URL: {url}; skipping.")
 
+    report(stats, len(urls))
+
+    if not output_csv_file_path:
+        return
     if valid_player_infos:
-        player_infos_df = pd.DataFrame(valid_player_infos)
-        output_csv_file_path = "data/scraped_player_data.csv"
-        player_infos_df.to_csv(output_csv_file_path, sep=";", index=False)
+        # written row by row, so integer columns with gaps stay integers
+        writer = open_output_writer(output_csv_file_path)
+        try:
+            for player_info in valid_player_infos:
+                writer.write(player_info)
+        finally:
+            writer.close()
         print(f"Scraped data saved to {output_csv_file_path}")
     else:
         print("No valid player data was scraped.")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage format: python scraper.py path/to/urls_file.csv")
-        sys.exit(1)
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected 0 or more, got {value}")
+    return number
+
 
-    main(sys.argv[1])
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scrape football player info from Wikipedia URLs."
+    )
+    parser.add_argument(
+        "urls_file_path",
+        metavar="urls_file",
+        nargs="?",
+        help="path/to/urls_file.csv (with --queue, added to the queue first)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="number of pages fetched in parallel (default: 1)",
+    )
+    parser.add_argument(
+        "--per-host",
+        dest="per_host_limit",
+        type=int,
+        default=None,
+        help="max in-flight requests per host (default: same as --concurrency)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="max requests per second to each host (default: unlimited); "
+        "in-flight requests also back off on throttling and errors",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=5.0,
+        help="seconds to wait for a connection (default: 5)",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=30.0,
+        help="seconds to wait for response data (default: 30)",
+    )
+    parser.add_argument(
+        "--retries",
+        type=non_negative_int,
+        default=4,
+        help="retries for throttled (429/5xx) or failed requests, with "
+        "exponential backoff or the server's Retry-After (default: 4)",
+    )
+    parser.add_argument(
+        "--latency-target",
+        type=float,
+        default=None,
+        help="also halve the in-flight requests to a host when responses take "
+        "longer than this many seconds",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="parse pages in a pool of N processes fed by the fetch threads "
+        "(default: parse in the fetching thread)",
+    )
+    parser.add_argument(
+        "--infobox-only",
+        action="store_true",
+        help="parse only the heading, infobox and category links of each page",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="keep compressed responses here and revalidate them with "
+        "ETag / Last-Modified on later runs",
+    )
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size_mb",
+        type=int,
+        default=1024,
+        help="cache size limit in MB, least recently used pages are evicted "
+        "(default: 1024)",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=int,
+        default=0,
+        help="seconds a cached page is reused without revalidation (default: 0)",
+    )
+    parser.add_argument(
+        "--output",
+        dest="output_csv_file_path",
+        default=None,
+        help="output CSV file, or a .parquet / .arrow file with typed columns "
+        "(needs pyarrow) (default: data/scraped_player_data.csv, "
+        "not written with --db unless given)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read URLs lazily and append each row to the output as it is "
+        "scraped, with a checkpoint next to the output file",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted --stream run from its checkpoint",
+    )
+    parser.add_argument(
+        "--db",
+        dest="db_path",
+        default=None,
+        help="write players straight into this SQLite database while scraping",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="skip parsing and writing pages whose revision or content hash "
+        "matches the one stored in --db",
+    )
+    parser.add_argument(
+        "--archive",
+        dest="archive_dir",
+        default=None,
+        help="append every fetched page to the compressed snapshot archive in "
+        "this directory, for offline re-extraction with src/reprocess.py",
+    )
+    parser.add_argument(
+        "--redirects",
+        dest="redirects_path",
+        default=None,
+        help="SQLite file remembering which URLs turned out to be aliases of "
+        "which canonical pages, so later runs skip them before fetching",
+    )
+    parser.add_argument(
+        "--backend",
+        dest="backend_name",
+        choices=["html", "api"],
+        default="html",
+        help="html downloads every article page; api asks the MediaWiki API for "
+        "revision ids and categories of many pages at once and renders only the "
+        "lead section of changed players (default: html)",
+    )
+    parser.add_argument(
+        "--api-batch",
+        dest="api_batch_size",
+        type=int,
+        default=MAX_TITLES,
+        help=f"titles per API query with --backend api (default and maximum: {MAX_TITLES})",
+    )
+    parser.add_argument(
+        "--seeds",
+        dest="seeds_file_path",
+        default=None,
+        help="crawl instead of reading a URL list: start from the category, "
+        "list or squad pages in this CSV and scrape the articles they link to",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=2,
+        help="levels of subcategory / list pages followed below a seed (default: 2)",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="stop the crawl after scraping this many candidate pages",
+    )
+    parser.add_argument(
+        "--crawl-state",
+        dest="crawl_state_path",
+        default="data/crawl_state.sqlite",
+        help="seen-set and frontier of the crawl; reuse it to continue an "
+        "interrupted crawl, delete it to start over",
+    )
+    parser.add_argument(
+        "--queue",
+        dest="queue_path",
+        default=None,
+        help="work through the shared SQLite URL queue in this file together "
+        "with any other workers using it; needs --db",
+    )
+    parser.add_argument(
+        "--queue-batch",
+        dest="queue_batch_size",
+        type=int,
+        default=50,
+        help="URLs claimed from the queue at a time (default: 50)",
+    )
+    parser.add_argument(
+        "--lease",
+        dest="lease_seconds",
+        type=int,
+        default=600,
+        help="seconds a claimed batch stays reserved before other workers may "
+        "take it over (default: 600)",
+    )
+    parser.add_argument(
+        "--report",
+        dest="report_path",
+        default=None,
+        help="time fetch, parse, each extractor and each DB batch, and save "
+        "counts, totals and latency percentiles to this JSON file",
+    )
+    parser.add_argument(
+        "--prometheus",
+        dest="prometheus_path",
+        default=None,
+        help="also save the timings in Prometheus text format to this file",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile_path",
+        default=None,
+        help="run the parse stage under cProfile and save the stats to this file",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -0,0 +1,6 @@
+SELECT
+    current_club,
+    CAST(age_sum AS REAL) / NULLIF(age_count, 0) AS AverageAge,
+    CAST(appearances_sum AS REAL) / NULLIF(appearances_count, 0) AS AverageAppearances,
+    player_count AS TotalPlayers
+FROM club_stats;
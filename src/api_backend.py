@@ -0,0 +1,227 @@
+import html as html_lib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import quote, unquote, urlencode, urlsplit
+
+from canonical import TITLE_SAFE_CHARS, canonical_title, canonical_url
+from fetcher import FetchError
+from metrics import timed
+from scraper import fetch_page
+
+# the MediaWiki API accepts at most 50 titles per query for normal clients
+MAX_TITLES = 50
+# the infobox of player articles; pages using it are rendered even when they
+# are in no footballers category, like the HTML backend finds them by infobox
+FOOTBALL_INFOBOX_TEMPLATES = ["Template:Infobox football biography"]
+
+# a page rebuilt from API responses, in the shape extract_player_info expects
+PAGE_TEMPLATE = (
+    "<!DOCTYPE html><html><head>{canonical_link}"
+    '<script>RLCONF={{"wgRevisionId":{revision_id}}};</script></head><body>'
+    '<h1 id="firstHeading" class="firstHeading">{title}</h1>{content}'
+    '<div id="catlinks"><div class="mw-normal-catlinks">Categories: <ul>{categories}'
+    "</ul></div></div></body></html>"
+)
+
+
+def _title(url):
+    path = urlsplit(url).path
+    if not path.startswith("/wiki/"):
+        return None
+    return unquote(path[len("/wiki/") :]).replace("_", " ")
+
+
+def _endpoint(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/w/api.php"
+
+
+def _page_url(url, title):
+    parts = urlsplit(url)
+    path = "/wiki/" + quote(canonical_title(title), safe=TITLE_SAFE_CHARS)
+    return canonical_url(f"{parts.scheme}://{parts.netloc}{path}")
+
+
+def _is_candidate(categories, templates):
+    return bool(templates) or any("footballers" in category.lower() for category in categories)
+
+
+def build_page(url, title, revision_id, categories, content="", canonical=None):
+    """Returns the bytes of a page with the parts of an article the scraper reads."""
+    link = f'<link rel="canonical" href="{html_lib.escape(canonical)}">' if canonical else ""
+    items = "".join(
+        f"<li>{html_lib.escape(category.split(':', 1)[-1])}</li>" for category in categories
+    )
+    return PAGE_TEMPLATE.format(
+        canonical_link=link,
+        revision_id=revision_id or 0,
+        title=html_lib.escape(title),
+        content=content,
+        categories=items,
+    ).encode("utf-8")
+
+
+class ApiBackend:
+    """
+    Fetches pages through the MediaWiki API instead of downloading each
+    rendered article. One query per batch of up to batch_size titles returns
+    the current revision id, the categories, the football infobox template
+    and the redirects of every page; only pages in a footballers category or
+    with that infobox whose revision changed since the last run are then
+    rendered, and only their lead section (infobox and intro) unless it has no
+    infobox. The API has no batched render, so that is one action=parse call
+    per player. Rendered pages go through the same is_football_player check
+    as downloaded ones; pages that pass neither API check are not rendered, so
+    a player with another infobox template and no footballers category is only
+    found by the HTML backend.
+    Pages are handed to the pipeline as small HTML documents with the heading,
+    the rendered content, the category links and the revision id, so the
+    existing extraction and change tracking work on them unchanged.
+    """
+
+    def __init__(self, batch_size=MAX_TITLES):
+        self.batch_size = max(1, min(batch_size, MAX_TITLES))
+        self.queries = 0
+        self.renders = 0
+
+    def _call(self, fetcher, endpoint, params):
+        url = endpoint + "?" + urlencode({**params, "format": "json", "formatversion": 2})
+        response = fetcher.get(url)
+        if response.status_code >= 400:
+            raise FetchError(f"{url}: HTTP {response.status_code}")
+        data = json.loads(response.content)
+        if "error" in data:
+            raise FetchError(f"{url}: {data['error'].get('info', data['error'])}")
+        return data
+
+    @timed("fetch.api_query")
+    def query(self, fetcher, endpoint, titles):
+        """
+        Returns ({requested title: resolved title}, {resolved title: page}) for
+        the titles, each page a dict with revision_id, categories, templates
+        (the football infoboxes it uses) and missing, following the API's
+        continuations until every category is listed.
+        """
+        params = {
+            "action": "query",
+            "prop": "revisions|categories|templates",
+            "rvprop": "ids",
+            "cllimit": "max",
+            "tllimit": "max",
+            "tltemplates": "|".join(FOOTBALL_INFOBOX_TEMPLATES),
+            "redirects": 1,
+            "titles": "|".join(titles),
+        }
+        renamed = {}
+        pages = {}
+        while True:
+            self.queries += 1
+            data = self._call(fetcher, endpoint, params)
+            query = data.get("query", {})
+            for entry in query.get("normalized", []) + query.get("redirects", []):
+                renamed[entry["from"]] = entry["to"]
+            for entry in query.get("pages", []):
+                page = pages.setdefault(
+                    entry["title"],
+                    {"revision_id": None, "categories": [], "templates": [], "missing": False},
+                )
+                page["missing"] = page["missing"] or "missing" in entry or "invalid" in entry
+                if entry.get("revisions"):
+                    page["revision_id"] = entry["revisions"][0]["revid"]
+                page["categories"] += [c["title"] for c in entry.get("categories", [])]
+                page["templates"] += [t["title"] for t in entry.get("templates", [])]
+            if "continue" not in data:
+                break
+            params = {**params, **data["continue"]}
+
+        resolved = {}
+        for title in titles:
+            target = title
+            # normalization, then a redirect
+            for _ in range(2):
+                target = renamed.get(target, target)
+            resolved[title] = target
+        return resolved, pages
+
+    @timed("fetch.api_parse")
+    def render(self, fetcher, endpoint, revision_id):
+        """Returns the HTML of a revision's lead section, or of the whole page without an infobox."""
+        params = {
+            "action": "parse",
+            "oldid": revision_id,
+            "prop": "text",
+            "section": 0,
+            "disablelimitreport": 1,
+            "disableeditsection": 1,
+        }
+        self.renders += 1
+        text = self._call(fetcher, endpoint, params)["parse"]["text"]
+        if "infobox" in text:
+            return text
+        del params["section"]
+        self.renders += 1
+        return self._call(fetcher, endpoint, params)["parse"]["text"]
+
+    def _fetch_group(self, fetcher, executor, endpoint, urls, known_pages):
+        titles = {url: _title(url) for url in urls}
+        try:
+            resolved, pages = self.query(fetcher, endpoint, list(dict.fromkeys(titles.values())))
+        except FetchError as e:
+            print(f"Failed to fetch {e}; skipping.")
+            return dict.fromkeys(urls)
+
+        def fetch(url):
+            title = resolved[titles[url]]
+            page = pages.get(title)
+            if page is None or page["missing"]:
+                print(f"Failed to fetch {url}: no such page; skipping.")
+                return None
+            page_url = _page_url(url, title)
+            canonical = page_url if title != titles[url] else None
+            revision_id, categories = page["revision_id"], page["categories"]
+            known = known_pages.get(page_url) if known_pages else None
+            candidate = _is_candidate(categories, page["templates"])
+            if not candidate or (known and known[1] == revision_id):
+                # enough for the pipeline to skip it as unchanged or not a player
+                return build_page(url, title, revision_id, categories, canonical=canonical)
+            try:
+                content = self.render(fetcher, endpoint, revision_id)
+            except FetchError as e:
+                print(f"Failed to fetch {e}; skipping.")
+                return None
+            return build_page(url, title, revision_id, categories, content, canonical)
+
+        return dict(zip(urls, executor.map(fetch, urls)))
+
+    def pages(self, urls, fetcher, concurrency=1, known_pages=None):
+        """
+        Yields (url, html) for every URL in order, html being None when the page
+        could not be fetched. None URLs (duplicates) are passed through.
+        URLs outside /wiki/ are downloaded as plain pages.
+        known_pages maps URLs to the (page_hash, revision_id) processed last time.
+        """
+        urls = iter(urls)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            while True:
+                batch = list(islice(urls, self.batch_size))
+                if not batch:
+                    break
+                groups = {}
+                for url in batch:
+                    if url is not None and _title(url):
+                        groups.setdefault(_endpoint(url), []).append(url)
+                fetched = {}
+                for endpoint, group in groups.items():
+                    fetched.update(
+                        self._fetch_group(fetcher, executor, endpoint, group, known_pages)
+                    )
+                for url in batch:
+                    if url is None or url in fetched:
+                        yield url, fetched.get(url)
+                        continue
+                    try:
+                        yield url, fetch_page(url, fetcher)
+                    except FetchError as e:
+                        print(f"Failed to fetch {e}; skipping.")
+                        yield url, None
@@ -0,0 +1,157 @@
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, quote, unquote, urlsplit, urlunsplit
+
+# characters MediaWiki leaves unescaped in article URLs (wfUrlencode)
+TITLE_SAFE_CHARS = ";@$!*(),/~:"
+MOBILE_HOST_REGEX = re.compile(r"^([a-z0-9-]+)\.m\.(wikipedia\.org|wikimedia\.org)$")
+CANONICAL_LINK_REGEX = re.compile(rb'<link rel="canonical" href="([^"]+)"')
+MAX_REDIRECT_HOPS = 5
+# desktop article URLs that canonical_url returns unchanged: an upper-case
+# first letter, then safe characters and upper-case escapes of non-ASCII bytes
+CANONICAL_URL_REGEX = re.compile(
+    r"https://[a-z-]+\.wikipedia\.org/wiki/(?!.*__)"
+    r"[A-Z0-9](?:[A-Za-z0-9_.\-~;@$!*(),/:]|%[89A-F][0-9A-F])*(?<!_)"
+)
+
+
+def canonical_title(title):
+    """Normalizes an article title: decoded, underscores, first letter upper-cased."""
+    title = unquote(title).replace(" ", "_").strip("_")
+    title = re.sub("_+", "_", title)
+    return title[:1].upper() + title[1:]
+
+
+def canonical_url(url):
+    """
+    Returns the canonical form of a Wikipedia article URL: https, lower-case
+    desktop host, /wiki/<Title> with MediaWiki's percent-encoding and no
+    fragment. Other URLs only get a lower-case scheme and host and lose
+    their fragment.
+    """
+    if CANONICAL_URL_REGEX.fullmatch(url):
+        # most URLs already are, skip parsing them
+        return url
+    parts = urlsplit(url.strip())
+    scheme, host, path, query = parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query
+    if not host.endswith(("wikipedia.org", "wikimedia.org")):
+        return urlunsplit((scheme, host, path, query, ""))
+
+    host = MOBILE_HOST_REGEX.sub(r"\1.\2", host.removesuffix(":443").removesuffix(":80"))
+    if path == "/w/index.php":
+        params = dict(parse_qsl(query))
+        if set(params) == {"title"}:
+            path, query = f"/wiki/{params['title']}", ""
+    if path.startswith("/wiki/"):
+        title = canonical_title(path[len("/wiki/") :])
+        path = "/wiki/" + quote(title, safe=TITLE_SAFE_CHARS)
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def canonical_link(html):
+    """Returns the page's <link rel="canonical"> URL from its raw bytes, or None."""
+    match = CANONICAL_LINK_REGEX.search(html)
+    if match:
+        return match.group(1).decode("utf-8", "replace").replace("&amp;", "&")
+    return None
+
+
+class RedirectMap:
+    """
+    Alias URL -> canonical URL pairs learned from fetched pages, kept in a
+    SQLite file so later runs resolve aliases before fetching them.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS redirects ("
+            "source TEXT PRIMARY KEY, target TEXT NOT NULL, learned_at REAL)"
+        )
+        self._targets = dict(self.conn.execute("SELECT source, target FROM redirects"))
+        self._lock = threading.Lock()
+
+    def get(self, source):
+        return self._targets.get(source)
+
+    def __setitem__(self, source, target):
+        with self._lock:
+            if self._targets.get(source) == target:
+                return
+            self._targets[source] = target
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO redirects VALUES (?, ?, ?)",
+                    (source, target, time.time()),
+                )
+
+    def __len__(self):
+        return len(self._targets)
+
+    def close(self):
+        self.conn.close()
+
+
+class Canonicalizer:
+    """
+    Collapses URL variants before fetching: every URL is canonicalized and
+    resolved through the redirect map, and a page already handled in this
+    run is not fetched again. Fetched pages teach the map their canonical URL.
+    redirects can be a RedirectMap or any dict-like with get() and item setting.
+    Without dedupe, URLs are only resolved, for callers that deduplicate
+    themselves, like the crawler.
+    """
+
+    def __init__(self, redirects=None, dedupe=True):
+        self.redirects = {} if redirects is None else redirects
+        self.dedupe = dedupe
+        self.seen = set()
+        self._lock = threading.Lock()
+
+    def resolve(self, url):
+        url = canonical_url(url)
+        for _ in range(MAX_REDIRECT_HOPS):
+            target = self.redirects.get(url)
+            if target is None or target == url:
+                break
+            url = target
+        return url
+
+    def admit(self, urls):
+        """
+        Yields the resolved form of every URL, or None for a URL whose page
+        was already admitted, so results stay aligned with the input.
+        """
+        for url in urls:
+            url = self.resolve(url)
+            if not self.dedupe:
+                yield url
+                continue
+            # never yield under the lock: the consumer may wait on a fetch
+            # thread that needs it in learn()
+            with self._lock:
+                duplicate = url in self.seen
+                self.seen.add(url)
+            yield None if duplicate else url
+
+    def learn(self, url, html):
+        """
+        Records where a fetched URL really points. Returns the URL to store
+        the page under, or None when that page was already admitted.
+        """
+        target = canonical_link(html)
+        if not target:
+            return url
+        target = canonical_url(target)
+        if target == url:
+            return url
+        self.redirects[url] = target
+        if not self.dedupe:
+            return target
+        with self._lock:
+            if target in self.seen:
+                return None
+            self.seen.add(target)
+        return target
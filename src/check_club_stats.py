@@ -0,0 +1,26 @@
+import argparse
+
+from db_manager import DatabaseManager
+
+
+def main(db_path="../db/database.sqlite"):
+    db_manager = DatabaseManager(db_path)
+    db_manager.create_club_stats()
+
+    mismatched = db_manager.check_club_stats()
+    if mismatched:
+        print(f"club_stats out of sync for {len(mismatched)} clubs: {mismatched}")
+    else:
+        print("club_stats is consistent with players.")
+
+    db_manager.rebuild_club_stats()
+    print("club_stats rebuilt from players.")
+    db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check club_stats against players and rebuild it from scratch."
+    )
+    parser.add_argument("--db", dest="db_path", default="../db/database.sqlite")
+    main(**vars(parser.parse_args()))
@@ -0,0 +1,125 @@
+from datetime import date
+from pathlib import Path
+
+from player_record import FIELDS, PlayerRecord
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    # optional: only Parquet / Arrow output needs it
+    pa = None
+
+# output file suffixes written as columnar files instead of CSV
+COLUMNAR_FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+# dates of birth that PlayerRecord keeps as text go here, next to the typed column
+DATE_TEXT_COLUMN = "date_of_birth_text"
+COLUMNS = [*FIELDS, DATE_TEXT_COLUMN]
+
+
+def output_format(path):
+    """Returns "parquet", "arrow" or "csv" for an output path, by its suffix."""
+    return COLUMNAR_FORMATS.get(Path(path).suffix.lower(), "csv")
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "Parquet and Arrow output need pyarrow: pip install -r requirements-optional.txt"
+        )
+
+
+def player_schema():
+    require_pyarrow()
+    types = {
+        "date_of_birth": pa.date32(),
+        "age": pa.int16(),
+        "appearances_current_club": pa.int32(),
+        "goals_current_club": pa.int32(),
+        "scraping_timestamp": pa.timestamp("s"),
+        "dead": pa.bool_(),
+        "revision_id": pa.int64(),
+    }
+    return pa.schema([(column, types.get(column, pa.string())) for column in COLUMNS])
+
+
+class ColumnarWriter:
+    """
+    Writes PlayerRecords to a Parquet or Arrow IPC file with typed columns.
+    Records are buffered column by column and written as one compressed row
+    group (or record batch) every row_group_size records, so memory stays
+    bounded while results stream in. Readable with pandas.read_parquet /
+    pandas.read_feather or pyarrow. Dates of birth kept as text by
+    PlayerRecord do not fit the date column; they are written to the
+    date_of_birth_text column instead and counted in unconverted_dates.
+    """
+
+    def __init__(self, path, file_format=None, row_group_size=10000, compression="zstd"):
+        self.path = Path(path)
+        self.file_format = file_format or output_format(path)
+        self.row_group_size = row_group_size
+        self.schema = player_schema()
+        self.columns = {column: [] for column in COLUMNS}
+        self.rows = 0
+        self.unconverted_dates = 0
+        if self.file_format == "parquet":
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression=compression)
+        else:
+            options = ipc.IpcWriteOptions(compression=compression)
+            self.writer = ipc.new_file(self.path, self.schema, options=options)
+
+    def write(self, player):
+        for field in FIELDS:
+            self.columns[field].append(getattr(player, field))
+        date_text = None
+        if player.date_of_birth is not None and not isinstance(player.date_of_birth, date):
+            date_text = self.columns["date_of_birth"].pop()
+            self.columns["date_of_birth"].append(None)
+            self.unconverted_dates += 1
+        self.columns[DATE_TEXT_COLUMN].append(date_text)
+        self.rows += 1
+        if len(self.columns["url"]) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.columns["url"]:
+            return
+        batch = pa.record_batch(
+            [
+                pa.array(self.columns[column], type=self.schema.field(column).type)
+                for column in COLUMNS
+            ],
+            schema=self.schema,
+        )
+        if self.file_format == "parquet":
+            self.writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self.writer.write_batch(batch)
+        self.columns = {column: [] for column in COLUMNS}
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        if self.unconverted_dates:
+            print(
+                f"{self.unconverted_dates} dates of birth were not dates; their text "
+                f"is in the {DATE_TEXT_COLUMN} column of {self.path}."
+            )
+
+
+def read_columnar(path):
+    """Yields the PlayerRecords of a Parquet or Arrow file, one row group at a time."""
+    require_pyarrow()
+    if output_format(path) == "parquet":
+        batches = pq.ParquetFile(path).iter_batches()
+    else:
+        reader = ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        for row in batch.to_pylist():
+            # files written before the text column have no such key
+            date_text = row.pop(DATE_TEXT_COLUMN, None)
+            if date_text is not None:
+                row["date_of_birth"] = date_text
+            yield PlayerRecord(**row)
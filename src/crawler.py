@@ -0,0 +1,223 @@
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+from urllib.parse import unquote, urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from canonical import canonical_url
+from fetcher import FetchError, Fetcher
+from scraper import fetch_page
+
+# frontier priorities, lowest first: likely players, other articles, then pages to expand
+LIKELY_PLAYER = 0
+ARTICLE = 1
+HUB = 2
+
+SKIPPED_NAMESPACES = re.compile(
+    r"^(File|Image|Help|Wikipedia|Template|Template_talk|Portal|Special|Talk|User|"
+    r"User_talk|Module|Draft|MediaWiki|Book|TimedText)(_talk)?:",
+    re.IGNORECASE,
+)
+HUB_TITLE_REGEX = re.compile(r"^(Category:|List_of_)|squad", re.IGNORECASE)
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set: membership tests may give false positives
+    at about error_rate once `capacity` items are added, but never false
+    negatives.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class CrawlState:
+    """
+    Seen-set and frontier of a crawl, kept in a SQLite file so memory stays
+    bounded and an interrupted crawl can continue.
+    The seen-set answers "definitely new" from an in-memory Bloom filter and
+    only consults the exact on-disk table when the filter says "maybe seen".
+    The frontier is a priority queue on disk: lower priority first, then
+    shallower depth, then discovery order.
+    The state can be created on one thread and crawled on another, like the
+    fetch thread of a pipelined run; access is serialized by a lock.
+    """
+
+    def __init__(self, path=":memory:", capacity=10_000_000, error_rate=0.01):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen (url TEXT PRIMARY KEY)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL, depth INTEGER NOT NULL, "
+            "priority INTEGER NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_frontier_order "
+            "ON frontier(priority, depth, id)"
+        )
+        self.bloom = BloomFilter(capacity, error_rate)
+        for (url,) in self.conn.execute("SELECT url FROM seen"):
+            self.bloom.add(url)
+        self.disk_lookups = 0
+
+    def add_seen(self, url):
+        """Adds url to the seen-set and returns whether it was new."""
+        with self._lock:
+            if url in self.bloom:
+                self.disk_lookups += 1
+                if self.conn.execute(
+                    "SELECT 1 FROM seen WHERE url = ?", (url,)
+                ).fetchone():
+                    return False
+            self.bloom.add(url)
+            self.conn.execute("INSERT OR IGNORE INTO seen(url) VALUES (?)", (url,))
+            return True
+
+    def push(self, url, depth, priority):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO frontier(url, depth, priority) VALUES (?, ?, ?)",
+                (url, depth, priority),
+            )
+
+    def pop(self):
+        """Removes and returns the best (url, depth, priority), or None when empty."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, url, depth, priority FROM frontier "
+                "ORDER BY priority, depth, id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("DELETE FROM frontier WHERE id = ?", (row[0],))
+            return row[1:]
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+def _title(url):
+    path = urlsplit(url).path
+    return unquote(path[len("/wiki/") :]) if path.startswith("/wiki/") else None
+
+
+def classify_link(url):
+    """Returns the frontier priority of a discovered article URL, or None to skip it."""
+    title = _title(url)
+    if not title or title == "Main_Page" or SKIPPED_NAMESPACES.match(title):
+        return None
+    if HUB_TITLE_REGEX.search(title):
+        return HUB
+    if "footballer" in title.lower():
+        return LIKELY_PLAYER
+    return ARTICLE
+
+
+def discover_links(page_url, html):
+    """
+    Yields (url, priority) for the article links of a seed, category, list or
+    squad page. Members listed on a category page are likely players.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    host = urlsplit(page_url).netloc
+    members = soup.find("div", id="mw-pages")
+    content = soup.find("div", class_="mw-parser-output") or soup.body or soup
+    subcategories = soup.find("div", id="mw-subcategories")
+    for area, member_links in ((members, True), (subcategories, False), (content, False)):
+        if area is None:
+            continue
+        for anchor in area.find_all("a", href=True):
+            url = canonical_url(urljoin(page_url, anchor["href"]))
+            if urlsplit(url).netloc != host:
+                continue
+            priority = classify_link(url)
+            if priority is None:
+                continue
+            if member_links and priority == ARTICLE:
+                priority = LIKELY_PLAYER
+            yield url, priority
+
+
+class Crawler:
+    """
+    Discovers candidate player pages starting from seed category, list or
+    squad pages. Hub pages (seeds, categories, lists, squads) are fetched to
+    collect their links, up to max_depth links away from a seed; every other
+    article link is yielded as a candidate for the scrape pipeline, which
+    decides whether it is a football player. Stops after max_pages candidates.
+    """
+
+    def __init__(self, state, max_depth=2, max_pages=None, fetcher=None):
+        self.state = state
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.fetcher = fetcher or Fetcher()
+        self.hubs_fetched = 0
+        self.candidates = 0
+
+    def _expand(self, url, depth):
+        try:
+            html = fetch_page(url, self.fetcher)
+        except FetchError as e:
+            print(f"Failed to fetch {e}; skipping.")
+            return
+        self.hubs_fetched += 1
+        for link, priority in discover_links(url, html):
+            if priority == HUB and depth + 1 > self.max_depth:
+                continue
+            if self.state.add_seen(link):
+                self.state.push(link, depth + 1, priority)
+        self.state.commit()
+
+    def crawl(self, seeds):
+        """Yields candidate player URLs, best first."""
+        for seed in seeds:
+            seed = canonical_url(seed)
+            if self.state.add_seen(seed):
+                self.state.push(seed, 0, HUB)
+        self.state.commit()
+
+        while self.max_pages is None or self.candidates < self.max_pages:
+            item = self.state.pop()
+            if item is None:
+                break
+            url, depth, priority = item
+            if priority == HUB:
+                self._expand(url, depth)
+            else:
+                self.candidates += 1
+                yield url
+        self.state.commit()
@@ -1,69 +1,114 @@
-import csv
 import sys
-from datetime import datetime
 from uuid import uuid4
 
+import pandas as pd
+
+from dates import normalize_date
 from db_manager import DatabaseManager
 
+# playersData.csv header -> players column
+SEED_COLUMNS = {
+    "PlayerID": "player_id",
+    "URL": "url",
+    "Name": "name",
+    "Full name": "full_name",
+    "Date of birth": "date_of_birth",
+    "Age": "age",
+    "City of birth": "place_of_birth",
+    "Country of birth": "country_of_birth",
+    "Position": "positions",
+    "Current club": "current_club",
+    "National_team": "national_team",
+}
+# not in the seed file, filled in by the scraper
+SCRAPED_COLUMNS = ["appearances_current_club", "goals_current_club", "scraping_timestamp"]
+DOTTED_DATE_PATTERN = r"^(\d{1,2})\.(\d{1,2})\.(\d{4})$"
+
+
+def normalize_dates(dates):
+    """
+    Converts a column of D.M.YYYY dates to YYYY-MM-DD in one pass. Other
+    formats go through normalize_date once per distinct value; dates that do
+    not parse are kept as they are.
+    """
+    parts = dates.str.extract(DOTTED_DATE_PATTERN)
+    iso = parts[2] + "-" + parts[1].str.zfill(2) + "-" + parts[0].str.zfill(2)
+    valid = pd.to_datetime(iso, format="%Y-%m-%d", errors="coerce").notna()
+    result = iso.where(valid)
+
+    rest = dates[~valid & dates.notna()]
+    if not rest.empty:
+        fallback = {value: normalize_date(value) or value for value in rest.unique()}
+        result[rest.index] = rest.map(fallback)
+    return result
+
+
+def normalize_players_frame(frame):
+    """
+    Turns a chunk of the seed file, read as strings, into upsert-ready
+    columns: stripped text with blanks as NULL, ISO dates, integer ages
+    (NULL unless all digits) and a fresh UUID for rows without a PlayerID.
+    URLs are canonicalized by DatabaseManager, like those of every writer.
+    """
+    frame = frame.rename(columns=SEED_COLUMNS)
+    for column in SEED_COLUMNS.values():
+        if column not in frame:
+            frame[column] = ""
+    frame = frame[list(SEED_COLUMNS.values())].apply(lambda column: column.str.strip())
+    frame = frame.where(frame != "")
+
+    frame["date_of_birth"] = normalize_dates(frame["date_of_birth"])
+    ages = frame["age"].where(frame["age"].str.fullmatch(r"\d+", na=False))
+    frame["age"] = pd.to_numeric(ages).astype("Int64")
+    missing_ids = frame["player_id"].isna()
+    frame.loc[missing_ids, "player_id"] = [str(uuid4()) for _ in range(missing_ids.sum())]
+    for column in SCRAPED_COLUMNS:
+        frame[column] = None
 
-def import_csv_to_db(db_path, csv_file_path):
-    db_manager = DatabaseManager(db_path)
+    # plain Python values, NULL for every kind of missing value
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def frame_records(frame):
+    """Returns the rows of a frame as dicts, much faster than to_dict("records")."""
+    columns = list(frame.columns)
+    values = zip(*(frame[column].tolist() for column in columns))
+    return [dict(zip(columns, row)) for row in values]
+
+
+def read_players_frames(csv_file_path, chunk_size=50000):
+    """
+    Yields the playersData.csv seed file as normalized DataFrames of up to
+    chunk_size rows, so files of any size load in bounded memory.
+    """
+    chunks = pd.read_csv(
+        csv_file_path,
+        sep=";",
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        usecols=lambda column: column in SEED_COLUMNS,
+        chunksize=chunk_size,
+    )
+    for chunk in chunks:
+        yield normalize_players_frame(chunk)
+
+
+def import_csv_to_db(db_path, csv_file_path, chunk_size=50000):
+    """
+    Upserts the seed file chunk by chunk, one transaction per chunk; the
+    search index is rebuilt once after the last chunk.
+    """
+    db_manager = DatabaseManager(db_path, bulk_load=True, batch_size=chunk_size)
     db_manager.create_table()
 
     try:
-        with open(csv_file_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=";")
-            for row in reader:
-                # generate a UUID as player_id if not provided
-                player_id = row.get("PlayerID", str(uuid4()))
-                player_data = {
-                    "player_id": player_id,
-                    "url": row.get("URL"),
-                    "name": row.get("Name") if row.get("Name", "").strip() else None,
-                    "full_name": (
-                        row.get("Full name")
-                        if row.get("Full name", "").strip()
-                        else None
-                    ),
-                    "date_of_birth": (
-                        row.get("Date of birth")
-                        if row.get("Date of birth", "").strip()
-                        else None
-                    ),
-                    "age": (
-                        row.get("Age") if row.get("Age", "").strip().isdigit() else None
-                    ),
-                    "place_of_birth": (
-                        row.get("City of birth")
-                        if row.get("City of birth", "").strip()
-                        else None
-                    ),
-                    "country_of_birth": (
-                        row.get("Country of birth")
-                        if row.get("Country of birth", "").strip()
-                        else None
-                    ),
-                    "positions": (
-                        row.get("Position") if row.get("Position", "").strip() else None
-                    ),
-                    "current_club": (
-                        row.get("Current club")
-                        if row.get("Current club", "").strip()
-                        else None
-                    ),
-                    "national_team": (
-                        row.get("National_team")
-                        if row.get("National_team", "").strip()
-                        else None
-                    ),
-                    "appearances_current_club": None,
-                    "goals_current_club": None,
-                    "scraping_timestamp": None,
-                }
-
-                db_manager.insert_or_update_table_from_csv(player_data)
-
+        with db_manager.player_search_suspended():
+            for frame in read_players_frames(csv_file_path, chunk_size):
+                db_manager.bulk_insert_or_update_from_csv(frame_records(frame))
+        if db_manager.failed_rows:
+            print(f"{len(db_manager.failed_rows)} rows could not be stored.")
         db_manager.close_connection()
     except Exception as e:
-        print(f"Failed to read the playersData.csv file: {e}")
+        print(f"Failed to import the playersData.csv file: {e}")
         sys.exit(1)
@@ -0,0 +1,99 @@
+import re
+from datetime import date
+from functools import lru_cache
+
+MONTHS = {
+    name: number
+    for number, name in enumerate(
+        [
+            "january",
+            "february",
+            "march",
+            "april",
+            "may",
+            "june",
+            "july",
+            "august",
+            "september",
+            "october",
+            "november",
+            "december",
+        ],
+        start=1,
+    )
+}
+
+ISO_DATE_REGEX = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+DAY_MONTH_YEAR_REGEX = re.compile(r"\b(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})\b")
+MONTH_DAY_YEAR_REGEX = re.compile(r"\b([A-Za-z]+)\s+(\d{1,2}),\s+(\d{4})\b")
+DOTTED_DATE_REGEX = re.compile(r"\b(\d{1,2})\.(\d{1,2})\.(\d{4})\b")
+AGE_REGEX = re.compile(r"\(age\xa0?(\d+)\)")
+
+
+def _iso_date(year, month, day):
+    """Returns YYYY-MM-DD, or None when the parts are not a real date."""
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def normalize_date(date_string):
+    """
+    Returns the first date found in date_string as YYYY-MM-DD, or None.
+    Understands 'YYYY-MM-DD', 'DD Month YYYY', 'Month DD, YYYY' and the
+    'D.M.YYYY' dates of playersData.csv, tried in that order.
+    """
+    if not date_string:
+        return None
+
+    # the infobox carries a hidden ISO date next to the displayed one
+    match = ISO_DATE_REGEX.search(date_string)
+    if match:
+        iso_date = _iso_date(*match.groups())
+        if iso_date:
+            return iso_date
+
+    match = DAY_MONTH_YEAR_REGEX.search(date_string)
+    if match:
+        day, month_name, year = match.groups()
+        iso_date = _iso_date(year, MONTHS.get(month_name.lower()), day)
+        if iso_date:
+            return iso_date
+
+    match = MONTH_DAY_YEAR_REGEX.search(date_string)
+    if match:
+        month_name, day, year = match.groups()
+        iso_date = _iso_date(year, MONTHS.get(month_name.lower()), day)
+        if iso_date:
+            return iso_date
+
+    match = DOTTED_DATE_REGEX.search(date_string)
+    if match:
+        day, month, year = match.groups()
+        return _iso_date(year, month, day)
+
+    return None
+
+
+def age_from_iso(iso_date, today=None):
+    """Calculates the age in whole years of someone born on a YYYY-MM-DD date."""
+    today = today or date.today()
+    year, month, day = int(iso_date[:4]), int(iso_date[5:7]), int(iso_date[8:10])
+    return today.year - year - ((today.month, today.day) < (month, day))
+
+
+def parse_age(date_string):
+    """
+    Returns the age stated as '(age XX)' in date_string, or calculates it from
+    the date of birth found there; None when neither is present.
+    """
+    match = AGE_REGEX.search(date_string)
+    if match:
+        return int(match.group(1))
+
+    iso_date = normalize_date(date_string)
+    if iso_date:
+        return age_from_iso(iso_date)
+    return None
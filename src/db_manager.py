@@ -1,11 +1,262 @@
+import re
 import sqlite3
+from contextlib import contextmanager
+from itertools import islice
 from uuid import uuid4
 
+from canonical import canonical_url
+from metrics import timed
+from player_record import PlayerRecord
+
+# pragmas trading durability of the last transaction for bulk load speed
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA cache_size=-65536;",
+    "PRAGMA temp_store=MEMORY;",
+]
+
+# per-club running sums kept current by triggers, so query 2 reads O(clubs) rows;
+# the *_count columns count non-NULL values, matching AVG()
+CLUB_STATS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS club_stats (
+    current_club TEXT,
+    player_count INTEGER NOT NULL DEFAULT 0,
+    age_sum INTEGER NOT NULL DEFAULT 0,
+    age_count INTEGER NOT NULL DEFAULT 0,
+    appearances_sum INTEGER NOT NULL DEFAULT 0,
+    appearances_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+CLUB_STATS_INDEX_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_club_stats_club ON club_stats(current_club);
+"""
+
+# NULL clubs form their own group like in GROUP BY, hence IS instead of =
+_ADD_TO_CLUB_STATS = """
+    INSERT INTO club_stats(current_club)
+    SELECT NEW.current_club
+    WHERE NOT EXISTS (SELECT 1 FROM club_stats WHERE current_club IS NEW.current_club);
+    UPDATE club_stats SET
+        player_count = player_count + 1,
+        age_sum = age_sum + IFNULL(NEW.age, 0),
+        age_count = age_count + (NEW.age IS NOT NULL),
+        appearances_sum = appearances_sum + IFNULL(NEW.appearances_current_club, 0),
+        appearances_count = appearances_count + (NEW.appearances_current_club IS NOT NULL)
+    WHERE current_club IS NEW.current_club;
+"""
+
+_REMOVE_FROM_CLUB_STATS = """
+    UPDATE club_stats SET
+        player_count = player_count - 1,
+        age_sum = age_sum - IFNULL(OLD.age, 0),
+        age_count = age_count - (OLD.age IS NOT NULL),
+        appearances_sum = appearances_sum - IFNULL(OLD.appearances_current_club, 0),
+        appearances_count = appearances_count - (OLD.appearances_current_club IS NOT NULL)
+    WHERE current_club IS OLD.current_club;
+    DELETE FROM club_stats WHERE current_club IS OLD.current_club AND player_count <= 0;
+"""
+
+CLUB_STATS_TRIGGER_SQLS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_club_stats_insert AFTER INSERT ON players
+    BEGIN {_ADD_TO_CLUB_STATS} END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_club_stats_delete AFTER DELETE ON players
+    BEGIN {_REMOVE_FROM_CLUB_STATS} END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_club_stats_update
+    AFTER UPDATE OF current_club, age, appearances_current_club ON players
+    BEGIN {_REMOVE_FROM_CLUB_STATS} {_ADD_TO_CLUB_STATS} END;
+    """,
+]
+
+CLUB_STATS_AGGREGATE_SQL = """
+SELECT
+    current_club,
+    COUNT(*),
+    IFNULL(SUM(age), 0),
+    COUNT(age),
+    IFNULL(SUM(appearances_current_club), 0),
+    COUNT(appearances_current_club)
+FROM players
+GROUP BY current_club
+"""
+
+# full-text index over the searchable columns, reading their text from players
+# (external content) and matching accented names without their diacritics
+SEARCH_COLUMNS = ["name", "full_name", "current_club", "national_team"]
+
+# bm25 weights of SEARCH_COLUMNS: a name match ranks above a club match
+SEARCH_WEIGHTS = [10.0, 5.0, 2.0, 1.0]
+
+PLAYERS_FTS_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS players_fts USING fts5(
+    {", ".join(SEARCH_COLUMNS)},
+    content='players',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+"""
+
+_NEW_SEARCH_VALUES = ", ".join(f"NEW.{column}" for column in SEARCH_COLUMNS)
+_OLD_SEARCH_VALUES = ", ".join(f"OLD.{column}" for column in SEARCH_COLUMNS)
+_FTS_COLUMNS = ", ".join(SEARCH_COLUMNS)
+
+_ADD_TO_FTS = f"""
+    INSERT INTO players_fts(rowid, {_FTS_COLUMNS}) VALUES (NEW.rowid, {_NEW_SEARCH_VALUES});
+"""
+
+_REMOVE_FROM_FTS = f"""
+    INSERT INTO players_fts(players_fts, rowid, {_FTS_COLUMNS})
+    VALUES ('delete', OLD.rowid, {_OLD_SEARCH_VALUES});
+"""
+
+PLAYERS_FTS_TRIGGERS = [
+    "trg_players_fts_insert",
+    "trg_players_fts_delete",
+    "trg_players_fts_update",
+]
+
+# upserts SET every column, so only reindex rows whose searched text changed
+PLAYERS_FTS_TRIGGER_SQLS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_players_fts_insert AFTER INSERT ON players
+    BEGIN {_ADD_TO_FTS} END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_players_fts_delete AFTER DELETE ON players
+    BEGIN {_REMOVE_FROM_FTS} END;
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_players_fts_update
+    AFTER UPDATE OF {_FTS_COLUMNS} ON players
+    WHEN {" OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in SEARCH_COLUMNS)}
+    BEGIN {_REMOVE_FROM_FTS} {_ADD_TO_FTS} END;
+    """,
+]
+
+SEARCH_SQL = f"""
+SELECT players.* FROM players_fts
+JOIN players ON players.rowid = players_fts.rowid
+WHERE players_fts MATCH ?
+ORDER BY bm25(players_fts, {", ".join(map(str, SEARCH_WEIGHTS))})
+LIMIT ?;
+"""
+
+
+def fts_query(text):
+    """
+    Turns free text into an FTS5 query matching every word as a prefix, so
+    "mo sal" finds Mohamed Salah; FTS5 operators in the text match as words.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+# recorded per player so unchanged pages can be skipped on the next run
+CHANGE_TRACKING_COLUMNS = {"page_hash": "TEXT", "revision_id": "INTEGER"}
+
+
+# PRAGMA user_version once the stored URLs have been canonicalized
+SCHEMA_VERSION = 1
+
+
+# errors caused by the values of a single row rather than by the database
+ROW_ERRORS = (
+    sqlite3.IntegrityError,
+    sqlite3.InterfaceError,
+    sqlite3.DataError,
+    sqlite3.ProgrammingError,
+)
+
+
+def canonicalize_rows(rows):
+    """Rewrites the url of every row dict to its canonical form, in place."""
+    for player_data in rows:
+        if player_data.get("url"):
+            player_data["url"] = canonical_url(player_data["url"])
+
+
+def batched(iterable, batch_size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
 
 class DatabaseManager:
-    def __init__(self, db_path):
+    UPSERT_FROM_CSV_SQL = """
+        INSERT INTO players(player_id, url, name, full_name, date_of_birth, age, place_of_birth, 
+        country_of_birth, positions, current_club, national_team, appearances_current_club, goals_current_club, scraping_timestamp)
+        VALUES(:player_id, :url, :name, :full_name, :date_of_birth, :age, :place_of_birth, 
+        :country_of_birth, :positions, :current_club, :national_team, :appearances_current_club, :goals_current_club, :scraping_timestamp)
+        ON CONFLICT(url) DO UPDATE SET
+        name=excluded.name,
+        full_name=excluded.full_name,
+        date_of_birth=excluded.date_of_birth,
+        age=excluded.age,
+        place_of_birth=excluded.place_of_birth,
+        country_of_birth=excluded.country_of_birth,
+        positions=excluded.positions,
+        current_club=excluded.current_club,
+        national_team=excluded.national_team,
+        appearances_current_club=excluded.appearances_current_club,
+        goals_current_club=excluded.goals_current_club,
+        scraping_timestamp=excluded.scraping_timestamp;
+        """
+
+    UPSERT_FROM_SCRAPER_SQL = """
+        INSERT INTO players (player_id, url, name, full_name, date_of_birth, age, place_of_birth, 
+        country_of_birth, positions, current_club, national_team, appearances_current_club, 
+        goals_current_club, scraping_timestamp, page_hash, revision_id)
+        VALUES (:player_id, :url, :name, :full_name, :date_of_birth, :age, :place_of_birth, 
+        :country_of_birth, :positions, :current_club, :national_team, :appearances_current_club, 
+        :goals_current_club, :scraping_timestamp, :page_hash, :revision_id)
+        ON CONFLICT(url) DO UPDATE SET
+        name=CASE WHEN excluded.name IS NOT name OR (name IS NULL AND excluded.name IS NOT NULL) THEN excluded.name ELSE name END,
+        full_name=CASE WHEN excluded.full_name IS NOT full_name OR (full_name IS NULL AND excluded.full_name IS NOT NULL) THEN excluded.full_name ELSE full_name END,
+        date_of_birth=CASE WHEN excluded.date_of_birth IS NOT date_of_birth OR (date_of_birth IS NULL AND excluded.date_of_birth IS NOT NULL) THEN excluded.date_of_birth ELSE date_of_birth END,
+        age=CASE WHEN excluded.age IS NOT age OR (age IS NULL AND excluded.age IS NOT NULL) THEN excluded.age ELSE age END,
+        place_of_birth=CASE WHEN excluded.place_of_birth IS NOT place_of_birth OR (place_of_birth IS NULL AND excluded.place_of_birth IS NOT NULL) THEN excluded.place_of_birth ELSE place_of_birth END,
+        country_of_birth=CASE WHEN excluded.country_of_birth IS NOT country_of_birth OR (country_of_birth IS NULL AND excluded.country_of_birth IS NOT NULL) THEN excluded.country_of_birth ELSE country_of_birth END,
+        positions=CASE WHEN excluded.positions IS NOT positions OR (positions IS NULL AND excluded.positions IS NOT NULL) THEN excluded.positions ELSE positions END,
+        current_club=CASE WHEN excluded.current_club IS NOT current_club OR (current_club IS NULL AND excluded.current_club IS NOT NULL) THEN excluded.current_club ELSE current_club END,
+        national_team=CASE WHEN excluded.national_team IS NOT national_team OR (national_team IS NULL AND excluded.national_team IS NOT NULL) THEN excluded.national_team ELSE national_team END,
+        appearances_current_club=CASE WHEN excluded.appearances_current_club IS NOT appearances_current_club OR (appearances_current_club IS NULL AND excluded.appearances_current_club IS NOT NULL) THEN excluded.appearances_current_club ELSE appearances_current_club END,
+        goals_current_club=CASE WHEN excluded.goals_current_club IS NOT goals_current_club OR (goals_current_club IS NULL AND excluded.goals_current_club IS NOT NULL) THEN excluded.goals_current_club ELSE goals_current_club END,
+        scraping_timestamp=excluded.scraping_timestamp,
+        page_hash=IFNULL(excluded.page_hash, page_hash),
+        revision_id=IFNULL(excluded.revision_id, revision_id)
+        WHERE (excluded.url IS NOT NULL) AND (
+            excluded.name IS NOT name OR excluded.full_name IS NOT full_name
+            OR excluded.date_of_birth IS NOT date_of_birth OR excluded.age IS NOT age
+            OR excluded.place_of_birth IS NOT place_of_birth
+            OR excluded.country_of_birth IS NOT country_of_birth
+            OR excluded.positions IS NOT positions OR excluded.current_club IS NOT current_club
+            OR excluded.national_team IS NOT national_team
+            OR excluded.appearances_current_club IS NOT appearances_current_club
+            OR excluded.goals_current_club IS NOT goals_current_club
+            OR (excluded.page_hash IS NOT NULL AND excluded.page_hash IS NOT page_hash)
+            OR (excluded.revision_id IS NOT NULL AND excluded.revision_id IS NOT revision_id)
+        );
+        """
+
+    def __init__(self, db_path, bulk_load=False, batch_size=1000):
         self.db_path = db_path
+        self.batch_size = batch_size
+        # called with the upserted rows after every write, e.g. PlayerStore.invalidate
+        self.write_listeners = []
+        # (url, error) of every row a write had to skip
+        self.failed_rows = []
         self.conn = self._connect_to_db()
+        if bulk_load:
+            self.apply_bulk_load_pragmas()
 
     def _connect_to_db(self):
         try:
@@ -26,6 +277,42 @@ class DatabaseManager:
         except sqlite3.Error as e:
             print(f"Database error: {e}")
 
+    @timed("db.batch")
+    def _execute_many(self, sql, rows):
+        """
+        Runs sql for every row inside a single transaction and returns the
+        rows written. When a row breaks a constraint or cannot be bound, the
+        batch is retried row by row, so only those rows are skipped; they are
+        printed and kept in failed_rows. Other errors, like a locked database,
+        are raised with nothing written.
+        """
+        try:
+            with self.conn:
+                self.conn.executemany(sql, rows)
+            return rows
+        except ROW_ERRORS:
+            pass
+
+        written = []
+        for row in rows:
+            try:
+                with self.conn:
+                    self.conn.execute(sql, row)
+                written.append(row)
+            except ROW_ERRORS as e:
+                url = row.get("url") if isinstance(row, dict) else None
+                print(f"Database error, row of {url} not stored: {e}")
+                self.failed_rows.append((url, str(e)))
+        return written
+
+    def _notify_write(self, rows):
+        for listener in self.write_listeners:
+            listener(rows)
+
+    def apply_bulk_load_pragmas(self, pragmas=BULK_LOAD_PRAGMAS):
+        for pragma in pragmas:
+            self._execute_sql(pragma)
+
     def _get_player_id_by_url(self, url):
         """Fetches the player_id for a given URL if exists."""
         try:
@@ -38,6 +325,26 @@ class DatabaseManager:
             print(f"Database error when fetching player_id by URL: {e}")
         return None
 
+    @timed("db.lookup")
+    def _get_player_ids_by_urls(self, urls, chunk_size=500):
+        """
+        Fetches the player_ids of all given URLs that exist, with one
+        SELECT ... IN query per chunk (kept below SQLite's variable limit).
+        """
+        player_ids = {}
+        try:
+            cursor = self.conn.cursor()
+            for chunk in batched(set(urls), chunk_size):
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT url, player_id FROM players WHERE url IN ({placeholders})",
+                    chunk,
+                )
+                player_ids.update(cursor.fetchall())
+        except sqlite3.Error as e:
+            print(f"Database error when fetching player_ids by URL: {e}")
+        return player_ids
+
     def create_table(self):
         create_table_sql = """
         CREATE TABLE IF NOT EXISTS players (
@@ -54,36 +361,305 @@ class DatabaseManager:
                     national_team TEXT,
                     appearances_current_club INTEGER,
                     goals_current_club INTEGER,
-                    scraping_timestamp DATETIME
+                    scraping_timestamp DATETIME,
+                    page_hash TEXT,
+                    revision_id INTEGER
                 );
                 """
         self._execute_sql(create_table_sql)
+        self._add_missing_columns()
+        self._migrate()
+        self.create_indexes()
+        self.create_club_stats()
+        self.create_player_search()
+
+    def _add_missing_columns(self):
+        """Adds the change tracking columns to databases created before them."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(players)")}
+        for column, column_type in CHANGE_TRACKING_COLUMNS.items():
+            if column not in columns:
+                self._execute_sql(
+                    f"ALTER TABLE players ADD COLUMN {column} {column_type};"
+                )
+
+    def _migrate(self):
+        """Brings databases written before SCHEMA_VERSION up to date, once."""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self.canonicalize_stored_urls()
+
+    def canonicalize_stored_urls(self):
+        """
+        Rewrites every stored URL to its canonical form. Rows whose URLs name
+        the same page are merged: the row already stored under the canonical
+        URL, or else the most recently scraped one, keeps its player_id, and
+        every column takes the most recently scraped non-NULL value.
+        Returns the number of rows rewritten or merged away.
+        """
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(players)")]
+        merged_columns = [column for column in columns if column not in ("player_id", "url")]
+        groups = {}
+        for rowid, url in self.conn.execute(
+            "SELECT rowid, url FROM players WHERE url IS NOT NULL"
+        ):
+            canonical = canonical_url(url)
+            if canonical != url:
+                groups.setdefault(canonical, []).append(rowid)
+
+        timestamp = 1 + merged_columns.index("scraping_timestamp")
+
+        def recency(row):
+            # most recently scraped first, never scraped last
+            return row[timestamp] is not None, row[timestamp] or ""
+
+        changed = 0
+        try:
+            with self.conn:
+                for canonical, rowids in groups.items():
+                    stored = self.conn.execute(
+                        "SELECT rowid FROM players WHERE url = ?", (canonical,)
+                    ).fetchone()
+                    rowids = rowids + [stored[0]] if stored else rowids
+                    placeholders = ", ".join("?" * len(rowids))
+                    rows = self.conn.execute(
+                        f"SELECT rowid, {', '.join(merged_columns)} FROM players "
+                        f"WHERE rowid IN ({placeholders})",
+                        rowids,
+                    ).fetchall()
+                    rows.sort(key=recency, reverse=True)
+                    kept = stored[0] if stored else rows[0][0]
+                    values = [
+                        next((row[i] for row in rows if row[i] is not None), None)
+                        for i in range(1, len(merged_columns) + 1)
+                    ]
+                    others = [row[0] for row in rows if row[0] != kept]
+                    self.conn.executemany(
+                        "DELETE FROM players WHERE rowid = ?", [(rowid,) for rowid in others]
+                    )
+                    assignments = ", ".join(f"{column} = ?" for column in merged_columns)
+                    self.conn.execute(
+                        f"UPDATE players SET url = ?, {assignments} WHERE rowid = ?",
+                        [canonical, *values, kept],
+                    )
+                    changed += len(rowids) - (1 if stored else 0)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
+        except sqlite3.Error as e:
+            print(f"Database error when canonicalizing URLs: {e}")
+        return changed
+
+    def get_page_signatures(self):
+        """
+        Returns {url: (page_hash, revision_id)} of every player whose page
+        content was recorded, to skip pages that did not change since.
+        """
+        signatures = {}
+        try:
+            cursor = self.conn.execute(
+                """
+                SELECT url, page_hash, revision_id FROM players
+                WHERE page_hash IS NOT NULL OR revision_id IS NOT NULL;
+                """
+            )
+            for url, page_hash, revision_id in cursor:
+                signatures[url] = (page_hash, revision_id)
+        except sqlite3.Error as e:
+            print(f"Database error when fetching page signatures: {e}")
+        return signatures
+
+    def create_indexes(self, analyze=False):
+        """
+        Covering indexes for the queries in sql_queries/: per-club aggregates
+        (query 2, Liverpool lookup of query 3) and the position/age/appearances
+        range search of query 3. Safe to run on existing databases.
+        The planner statistics are refreshed when an index is first created,
+        or on every call with analyze=True.
+        """
+        index_sqls = {
+            "idx_players_club": """
+            CREATE INDEX IF NOT EXISTS idx_players_club
+            ON players(current_club, age, appearances_current_club);
+            """,
+            "idx_players_position_age_apps": """
+            CREATE INDEX IF NOT EXISTS idx_players_position_age_apps
+            ON players(positions, age, appearances_current_club);
+            """,
+        }
+        placeholders = ", ".join("?" * len(index_sqls))
+        existing = self.conn.execute(
+            f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name IN ({placeholders})",
+            list(index_sqls),
+        ).fetchone()[0]
+        for index_sql in index_sqls.values():
+            self._execute_sql(index_sql)
+        if analyze or existing < len(index_sqls):
+            self._execute_sql("ANALYZE players;")
+
+    def create_club_stats(self):
+        """
+        Creates the club_stats table and the triggers that keep it in sync
+        with players; a newly created table is filled from existing players.
+        """
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'club_stats'"
+        ).fetchone()
+        self._execute_sql(CLUB_STATS_TABLE_SQL)
+        self._execute_sql(CLUB_STATS_INDEX_SQL)
+        for trigger_sql in CLUB_STATS_TRIGGER_SQLS:
+            self._execute_sql(trigger_sql)
+        if not exists:
+            self.rebuild_club_stats()
+
+    def rebuild_club_stats(self):
+        """Recomputes club_stats from scratch out of the players table."""
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM club_stats;")
+                self.conn.execute(
+                    f"""
+                    INSERT INTO club_stats(current_club, player_count, age_sum,
+                    age_count, appearances_sum, appearances_count)
+                    {CLUB_STATS_AGGREGATE_SQL};
+                    """
+                )
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+
+    def create_player_search(self):
+        """
+        Creates the players_fts full-text index and the triggers that keep it
+        in sync with players. The index is filled from players when it is new
+        or its triggers were missing, e.g. after an interrupted bulk load.
+        """
+        names = ["players_fts"] + PLAYERS_FTS_TRIGGERS
+        placeholders = ", ".join("?" * len(names))
+        existing = self.conn.execute(
+            f"SELECT COUNT(*) FROM sqlite_master WHERE name IN ({placeholders})", names
+        ).fetchone()[0]
+        self._execute_sql(PLAYERS_FTS_TABLE_SQL)
+        for trigger_sql in PLAYERS_FTS_TRIGGER_SQLS:
+            self._execute_sql(trigger_sql)
+        if existing < len(names):
+            self.rebuild_player_search()
+
+    @contextmanager
+    def player_search_suspended(self):
+        """
+        Drops the players_fts triggers for a bulk load and rebuilds the index
+        once at the end, which is several times faster than indexing row by row.
+        """
+        for trigger in PLAYERS_FTS_TRIGGERS:
+            self._execute_sql(f"DROP TRIGGER IF EXISTS {trigger};")
+        try:
+            yield
+        finally:
+            self.create_player_search()
+
+    def rebuild_player_search(self):
+        """
+        Reindexes players_fts from players. The index refers to players by
+        rowid, which VACUUM may renumber, so run this after a VACUUM.
+        """
+        self._execute_sql("INSERT INTO players_fts(players_fts) VALUES ('rebuild');")
+
+    @timed("db.search")
+    def search(self, query, limit=20):
+        """
+        Returns up to limit PlayerRecords whose name, full name, club or
+        national team contain words starting with those of query, best
+        matches first. Accents are ignored on both sides.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        try:
+            cursor = self.conn.execute(SEARCH_SQL, (match, limit))
+        except sqlite3.Error as e:
+            print(f"Database error when searching players: {e}")
+            return []
+        columns = [column[0] for column in cursor.description]
+        return [PlayerRecord.from_dict(dict(zip(columns, row))) for row in cursor]
+
+    def check_club_stats(self):
+        """
+        Compares club_stats with a fresh aggregate over players and returns
+        the clubs whose stored totals differ.
+        """
+        columns = (
+            "current_club, player_count, age_sum, age_count, "
+            "appearances_sum, appearances_count"
+        )
+        stored = {
+            row[0]: row
+            for row in self.conn.execute(f"SELECT {columns} FROM club_stats")
+        }
+        fresh = {row[0]: row for row in self.conn.execute(CLUB_STATS_AGGREGATE_SQL)}
+        mismatched = [
+            club
+            for club in stored.keys() | fresh.keys()
+            if stored.get(club) != fresh.get(club)
+        ]
+        return sorted(mismatched, key=lambda club: (club is not None, club))
+
+    def get_club_stats(self):
+        """Per-club summary of query 2, read from club_stats in O(clubs)."""
+        cursor = self.conn.execute(
+            """
+            SELECT
+                current_club,
+                CAST(age_sum AS REAL) / NULLIF(age_count, 0),
+                CAST(appearances_sum AS REAL) / NULLIF(appearances_count, 0),
+                player_count
+            FROM club_stats
+            ORDER BY current_club;
+            """
+        )
+        return cursor.fetchall()
 
     def insert_or_update_table_from_csv(self, player_data):
-        insert_sql = """
-        INSERT INTO players(player_id, url, name, full_name, date_of_birth, age, place_of_birth, 
-        country_of_birth, positions, current_club, national_team, appearances_current_club, goals_current_club, scraping_timestamp)
-        VALUES(:player_id, :url, :name, :full_name, :date_of_birth, :age, :place_of_birth, 
-        :country_of_birth, :positions, :current_club, :national_team, :appearances_current_club, :goals_current_club, :scraping_timestamp)
-        ON CONFLICT(url) DO UPDATE SET
-        name=excluded.name,
-        full_name=excluded.full_name,
-        date_of_birth=excluded.date_of_birth,
-        age=excluded.age,
-        place_of_birth=excluded.place_of_birth,
-        country_of_birth=excluded.country_of_birth,
-        positions=excluded.positions,
-        current_club=excluded.current_club,
-        national_team=excluded.national_team,
-        appearances_current_club=excluded.appearances_current_club,
-        goals_current_club=excluded.goals_current_club,
-        scraping_timestamp=excluded.scraping_timestamp;
+        canonicalize_rows([player_data])
+        self._notify_write(self._execute_many(self.UPSERT_FROM_CSV_SQL, [player_data]))
+
+    def bulk_insert_or_update_from_csv(self, players, batch_size=None):
         """
-        self._execute_sql(insert_sql, player_data)
+        Upserts an iterable of player dicts with executemany, committing once
+        per batch of batch_size rows. Returns the number of rows written;
+        skipped rows are in failed_rows.
+        """
+        count = 0
+        for batch in batched(players, batch_size or self.batch_size):
+            canonicalize_rows(batch)
+            written = self._execute_many(self.UPSERT_FROM_CSV_SQL, batch)
+            self._notify_write(written)
+            count += len(written)
+        return count
 
-    def insert_or_update_table_from_scraper(self, player_data):
+    def bulk_insert_or_update_from_scraper(self, players, batch_size=None):
+        """
+        Scraper counterpart of bulk_insert_or_update_from_csv, keeping the
+        player_id reuse and conflict aware updates of the single row method.
+        """
+        count = 0
+        for batch in batched(players, batch_size or self.batch_size):
+            canonicalize_rows(batch)
+            existing_ids = self._get_player_ids_by_urls(
+                player_data["url"] for player_data in batch if "url" in player_data
+            )
+            for player_data in batch:
+                self._prepare_scraper_row(player_data, existing_ids)
+            written = self._execute_many(self.UPSERT_FROM_SCRAPER_SQL, batch)
+            self._notify_write(written)
+            count += len(written)
+        return count
+
+    def _prepare_scraper_row(self, player_data, existing_ids=None):
+        """Fills in the player_id and any missing change tracking fields."""
+        for column in CHANGE_TRACKING_COLUMNS:
+            player_data.setdefault(column, None)
         if "url" in player_data:
-            existing_id = self._get_player_id_by_url(player_data["url"])
+            if existing_ids is None:
+                existing_id = self._get_player_id_by_url(player_data["url"])
+            else:
+                existing_id = existing_ids.get(player_data["url"])
             if existing_id:
                 # for updates use existing player_id
                 player_data["player_id"] = existing_id
@@ -92,29 +668,10 @@ class DatabaseManager:
                 if "player_id" not in player_data or not player_data["player_id"]:
                     player_data["player_id"] = str(uuid4())
 
-        insert_sql = """
-            INSERT INTO players (player_id, url, name, full_name, date_of_birth, age, place_of_birth, 
-            country_of_birth, positions, current_club, national_team, appearances_current_club, 
-            goals_current_club, scraping_timestamp)
-            VALUES (:player_id, :url, :name, :full_name, :date_of_birth, :age, :place_of_birth, 
-            :country_of_birth, :positions, :current_club, :national_team, :appearances_current_club, 
-            :goals_current_club, :scraping_timestamp)
-            ON CONFLICT(url) DO UPDATE SET
-            name=CASE WHEN excluded.name IS NOT name OR (name IS NULL AND excluded.name IS NOT NULL) THEN excluded.name ELSE name END,
-            full_name=CASE WHEN excluded.full_name IS NOT full_name OR (full_name IS NULL AND excluded.full_name IS NOT NULL) THEN excluded.full_name ELSE full_name END,
-            date_of_birth=CASE WHEN excluded.date_of_birth IS NOT date_of_birth OR (date_of_birth IS NULL AND excluded.date_of_birth IS NOT NULL) THEN excluded.date_of_birth ELSE date_of_birth END,
-            age=CASE WHEN excluded.age IS NOT age OR (age IS NULL AND excluded.age IS NOT NULL) THEN excluded.age ELSE age END,
-            place_of_birth=CASE WHEN excluded.place_of_birth IS NOT place_of_birth OR (place_of_birth IS NULL AND excluded.place_of_birth IS NOT NULL) THEN excluded.place_of_birth ELSE place_of_birth END,
-            country_of_birth=CASE WHEN excluded.country_of_birth IS NOT country_of_birth OR (country_of_birth IS NULL AND excluded.country_of_birth IS NOT NULL) THEN excluded.country_of_birth ELSE country_of_birth END,
-            positions=CASE WHEN excluded.positions IS NOT positions OR (positions IS NULL AND excluded.positions IS NOT NULL) THEN excluded.positions ELSE positions END,
-            current_club=CASE WHEN excluded.current_club IS NOT current_club OR (current_club IS NULL AND excluded.current_club IS NOT NULL) THEN excluded.current_club ELSE current_club END,
-            national_team=CASE WHEN excluded.national_team IS NOT national_team OR (national_team IS NULL AND excluded.national_team IS NOT NULL) THEN excluded.national_team ELSE national_team END,
-            appearances_current_club=CASE WHEN excluded.appearances_current_club IS NOT appearances_current_club OR (appearances_current_club IS NULL AND excluded.appearances_current_club IS NOT NULL) THEN excluded.appearances_current_club ELSE appearances_current_club END,
-            goals_current_club=CASE WHEN excluded.goals_current_club IS NOT goals_current_club OR (goals_current_club IS NULL AND excluded.goals_current_club IS NOT NULL) THEN excluded.goals_current_club ELSE goals_current_club END,
-            scraping_timestamp=excluded.scraping_timestamp
-            WHERE (excluded.url IS NOT NULL);
-            """
-        self._execute_sql(insert_sql, player_data)
+    def insert_or_update_table_from_scraper(self, player_data):
+        canonicalize_rows([player_data])
+        self._prepare_scraper_row(player_data)
+        self._notify_write(self._execute_many(self.UPSERT_FROM_SCRAPER_SQL, [player_data]))
 
     def close_connection(self):
         if self.conn:
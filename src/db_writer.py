@@ -0,0 +1,94 @@
+import queue
+import threading
+
+from db_manager import DatabaseManager
+
+_STOP = object()
+
+
+def to_db_row(player):
+    """
+    Converts a PlayerRecord to upsert parameters: dates and the scraping time
+    as text, missing values as NULL.
+    """
+    return player.to_row()
+
+
+class DatabaseWriter:
+    """
+    Streams scraped players into SQLite from a single writer thread.
+    Producers put() PlayerRecords into a bounded queue; the writer commits them
+    in batches of batch_size, or whatever arrived within flush_interval seconds,
+    so the database stays current while the crawl is running.
+    """
+
+    def __init__(self, db_path, batch_size=500, queue_size=None, flush_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size or batch_size * 2)
+        self.written = 0
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def put(self, player_info):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(to_db_row(player_info))
+
+    def close(self, raise_error=True):
+        """
+        Flushes the remaining rows and waits for the writer thread, then
+        raises the error that stopped it, if any. Callers closing the writer
+        while another exception propagates pass raise_error=False and check
+        self.error, so that exception is not replaced.
+        """
+        self.queue.put(_STOP)
+        self._thread.join()
+        if raise_error and self.error is not None:
+            raise self.error
+
+    def _next_batch(self):
+        batch = []
+        stop = False
+        try:
+            item = self.queue.get()
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                item = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            pass
+        return batch, stop
+
+    def _run(self):
+        db_manager = None
+        try:
+            # sqlite connections belong to the thread that created them
+            db_manager = DatabaseManager(
+                self.db_path, bulk_load=True, batch_size=self.batch_size
+            )
+            db_manager.create_table()
+            stop = False
+            while not stop:
+                batch, stop = self._next_batch()
+                if batch:
+                    self.written += db_manager.bulk_insert_or_update_from_scraper(
+                        batch
+                    )
+        except Exception as e:
+            self.error = e
+            # keep draining so producers never block on a dead writer
+            while self.queue.get() is not _STOP:
+                pass
+        finally:
+            if db_manager is not None:
+                db_manager.close_connection()
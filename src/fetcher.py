@@ -0,0 +1,137 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_control import HostController, backoff_delay, parse_retry_after
+
+# (connect, read) seconds, so one stalled socket cannot hang a run
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_RETRIES = 4
+# statuses that mean "try again later" rather than "this is the page"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# request failures worth another attempt; any other RequestException (bad URL,
+# redirect loop, undecodable body) fails the same way every time
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class FetchError(Exception):
+    """A page could not be downloaded, even after retrying."""
+
+
+class Fetcher:
+    """
+    Thread-safe HTTP client shared by all scraper workers.
+    Keeps one pooled keep-alive Session and paces each host with a
+    HostController: an optional requests/second limit and an AIMD limit on
+    in-flight requests (at most per_host_limit) that backs off on throttling,
+    errors and slow responses. Throttled (429/5xx) and failed requests are
+    retried with bounded exponential backoff, honouring Retry-After.
+    With a ResponseCache, unchanged pages are served from disk after revalidation.
+    """
+
+    def __init__(
+        self,
+        concurrency=1,
+        per_host_limit=None,
+        cache=None,
+        rate=None,
+        timeout=None,
+        retries=None,
+        backoff_base=0.5,
+        max_backoff=30.0,
+        max_retry_after=300.0,
+        latency_target=None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = per_host_limit or self.concurrency
+        self.cache = cache
+        self.rate = rate
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        self.retries = DEFAULT_RETRIES if retries is None else retries
+        if self.retries < 0:
+            raise ValueError(f"retries must be 0 or more, got {self.retries}")
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.latency_target = latency_target
+        self.session = self._create_session()
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency, pool_maxsize=self.concurrency
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def controller_for(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostController(
+                    self.per_host_limit, self.rate, self.latency_target
+                )
+            return self._hosts[host]
+
+    def _request(self, url, headers=None, **kwargs):
+        controller = self.controller_for(url)
+        kwargs.setdefault("timeout", self.timeout)
+        delay = 0
+        for attempt in range(self.retries + 1):
+            if delay:
+                time.sleep(delay)
+            controller.wait_turn()
+            with controller.slot():
+                start = time.monotonic()
+                try:
+                    response = self.session.get(url, headers=headers, **kwargs)
+                except TRANSIENT_ERRORS as e:
+                    controller.on_failure()
+                    problem = e
+                    delay = backoff_delay(attempt, self.backoff_base, self.max_backoff)
+                    continue
+                except requests.RequestException as e:
+                    raise FetchError(f"{url}: {e}") from e
+
+            if response.status_code not in RETRY_STATUSES:
+                controller.on_success(time.monotonic() - start)
+                return response
+
+            controller.on_failure()
+            problem = f"HTTP {response.status_code}"
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.close()
+            if retry_after is not None:
+                # every request to the host waits, not only this retry
+                controller.pause(min(retry_after, self.max_retry_after))
+                delay = 0
+            else:
+                delay = backoff_delay(attempt, self.backoff_base, self.max_backoff)
+
+        raise FetchError(f"{url}: gave up after {self.retries + 1} attempts ({problem})")
+
+    def get(self, url, **kwargs):
+        if self.cache is None:
+            return self._request(url, **kwargs)
+
+        extra_headers = kwargs.pop("headers", None) or {}
+        return self.cache.get(
+            url,
+            lambda url, headers: self._request(
+                url, headers={**extra_headers, **headers}, **kwargs
+            ),
+        )
+
+    def close(self):
+        # the cache is the caller's, who may share it between fetchers
+        self.session.close()
@@ -0,0 +1,208 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+from uuid import uuid4
+
+import requests
+
+
+def cache_key(url):
+    """
+    Canonical form of a URL used as cache key: lower-cased scheme and host,
+    no fragment.
+    """
+    parts = urlsplit(url.strip())
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, "")
+    )
+
+
+class CacheEntry:
+    def __init__(self, url, path, etag, last_modified, fetched_at, size):
+        self.url = url
+        self.path = path
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.size = size
+
+    def is_fresh(self, max_age):
+        return max_age > 0 and time.time() - self.fetched_at < max_age
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def read_body(self):
+        """Returns the cached body, or None when it was evicted since the lookup."""
+        try:
+            return zlib.decompress(self.path.read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def to_response(self):
+        body = self.read_body()
+        if body is None:
+            return None
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = body
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+
+class ResponseCache:
+    """
+    Persistent cache of page bodies keyed by canonical URL.
+    Bodies are stored zlib-compressed on disk; an SQLite index keeps the ETag,
+    Last-Modified and fetch time for conditional revalidation, and the last
+    access time for LRU eviction once max_bytes is exceeded.
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024**3, max_age=0):
+        self.cache_dir = Path(cache_dir)
+        self.bodies_dir = self.cache_dir / "bodies"
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            str(self.cache_dir / "index.sqlite"), check_same_thread=False
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_used REAL,
+                size INTEGER
+            );
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);"
+        )
+        self.conn.commit()
+
+    def _body_path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.bodies_dir / digest[:2] / f"{digest}.z"
+
+    def lookup(self, url):
+        key = cache_key(url)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, fetched_at, size FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        path = self._body_path(key)
+        if row is None or not path.exists():
+            return None
+        return CacheEntry(url, path, *row)
+
+    def touch(self, url, revalidated=False):
+        """Marks an entry as recently used; a 304 also refreshes its fetch time."""
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self.conn.execute(
+                    "UPDATE responses SET last_used = ?, fetched_at = ? WHERE key = ?",
+                    (now, now, cache_key(url)),
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE responses SET last_used = ? WHERE key = ?",
+                    (now, cache_key(url)),
+                )
+            self.conn.commit()
+
+    def store(self, url, response):
+        key = cache_key(url)
+        body = zlib.compress(response.content)
+        path = self._body_path(key)
+        path.parent.mkdir(exist_ok=True)
+        # unique per writer, so concurrent stores of one key never share a file
+        tmp_path = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+        tmp_path.write_bytes(body)
+        tmp_path.replace(path)
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO responses(key, etag, last_modified, fetched_at, last_used, size)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                (
+                    key,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(body),
+                ),
+            )
+            self.conn.commit()
+            self._evict()
+
+    def _evict(self):
+        (total,) = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_used"
+        ):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+            self._body_path(key).unlink(missing_ok=True)
+
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.conn.commit()
+
+    def get(self, url, fetch):
+        """
+        Returns the response for url, serving fresh entries from disk and
+        revalidating stale ones with If-None-Match / If-Modified-Since. A body
+        evicted by a concurrent store is fetched again unconditionally.
+        fetch(url, headers) performs the actual request.
+        """
+        entry = self.lookup(url)
+        if entry and entry.is_fresh(self.max_age):
+            cached = entry.to_response()
+            if cached is not None:
+                self.touch(url)
+                return cached
+            entry = None
+
+        headers = entry.conditional_headers() if entry else {}
+        response = fetch(url, headers)
+        if response.status_code == 304 and entry:
+            cached = entry.to_response()
+            if cached is not None:
+                self.touch(url, revalidated=True)
+                return cached
+            # another thread evicted the body after the lookup
+            response = fetch(url, {})
+        if response.status_code == 200:
+            self.store(url, response)
+        return response
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,219 @@
+import cProfile
+import json
+import pstats
+import random
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+# the active StageMetrics; None keeps every timed() function a plain call
+_registry = None
+
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+class _Stage:
+    __slots__ = ("count", "total", "max", "reservoir")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.reservoir = []
+
+
+class StageMetrics:
+    """
+    Collects per-stage timings: exact counts, totals and maximums, plus a
+    bounded random sample of durations per stage for the latency percentiles.
+    With profile, parse calls made through profile_call run under cProfile.
+    """
+
+    def __init__(self, reservoir_size=10000, profile=False):
+        self.reservoir_size = reservoir_size
+        self.profile = profile
+        self.started = time.perf_counter()
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._profilers = {}
+        self._profile_stats = []
+
+    def record(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = _Stage()
+            entry.count += 1
+            entry.total += seconds
+            entry.max = max(entry.max, seconds)
+            if len(entry.reservoir) < self.reservoir_size:
+                entry.reservoir.append(seconds)
+            else:
+                index = random.randrange(entry.count)
+                if index < self.reservoir_size:
+                    entry.reservoir[index] = seconds
+
+    def samples(self):
+        """Returns {stage: [seconds]}, for shipping worker timings to the parent."""
+        with self._lock:
+            return {stage: list(entry.reservoir) for stage, entry in self._stages.items()}
+
+    def merge(self, samples):
+        for stage, durations in samples.items():
+            for seconds in durations:
+                self.record(stage, seconds)
+
+    def summary(self):
+        """Returns {stage: {count, total_s, mean_ms, max_ms, p50_ms, ...}}."""
+        with self._lock:
+            stages = dict(self._stages)
+        summary = {}
+        for stage, entry in sorted(stages.items()):
+            ordered = sorted(entry.reservoir)
+            summary[stage] = {
+                "count": entry.count,
+                "total_s": entry.total,
+                "mean_ms": entry.total / entry.count * 1000,
+                "max_ms": entry.max * 1000,
+            }
+            for quantile in QUANTILES:
+                rank = min(len(ordered) - 1, int(quantile * len(ordered)))
+                summary[stage][f"p{quantile * 100:g}_ms"] = ordered[rank] * 1000
+        return summary
+
+    def write_json(self, path, stats=None):
+        report = {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_s": time.perf_counter() - self.started,
+            "pages": dict(stats or {}),
+            "stages": self.summary(),
+        }
+        with open(path, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    def write_prometheus(self, path, stats=None):
+        """Writes the timings as Prometheus summaries in the text exposition format."""
+        lines = [
+            "# HELP scraper_stage_seconds Time spent in each scrape stage.",
+            "# TYPE scraper_stage_seconds summary",
+        ]
+        for stage, values in self.summary().items():
+            for quantile in QUANTILES:
+                seconds = values[f"p{quantile * 100:g}_ms"] / 1000
+                lines.append(
+                    f'scraper_stage_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                    f"{seconds:.6f}"
+                )
+            lines.append(
+                f'scraper_stage_seconds_sum{{stage="{stage}"}} {values["total_s"]:.6f}'
+            )
+            lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {values["count"]}')
+        if stats:
+            lines.append("# HELP scraper_pages_total Pages processed by outcome.")
+            lines.append("# TYPE scraper_pages_total counter")
+            for outcome, count in sorted(stats.items()):
+                lines.append(f'scraper_pages_total{{outcome="{outcome}"}} {count}')
+        with open(path, "w", encoding="utf-8") as prometheus_file:
+            prometheus_file.write("\n".join(lines) + "\n")
+
+    def profile_call(self, fn, *args, **kwargs):
+        # cProfile only sees the thread that enabled it, so one profiler per thread
+        thread_id = threading.get_ident()
+        with self._lock:
+            profiler = self._profilers.get(thread_id)
+            if profiler is None:
+                profiler = self._profilers[thread_id] = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+    def profile_stats(self):
+        """Returns the raw pstats data of every profiled call, or None."""
+        with self._lock:
+            sources = list(self._profilers.values()) + [
+                _RawStats(stats) for stats in self._profile_stats
+            ]
+        if not sources:
+            return None
+        return pstats.Stats(*sources).stats
+
+    def add_profile_stats(self, stats):
+        if stats:
+            with self._lock:
+                self._profile_stats.append(stats)
+
+    def write_profile(self, path):
+        stats = self.profile_stats()
+        if stats is None:
+            return False
+        pstats.Stats(_RawStats(stats)).dump_stats(path)
+        return True
+
+
+class _RawStats:
+    """Lets pstats.Stats load a stats dict that came from another process."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def enable(profile=False):
+    global _registry
+    _registry = StageMetrics(profile=profile)
+    return _registry
+
+
+def disable():
+    global _registry
+    _registry = None
+
+
+def active():
+    return _registry
+
+
+def timed(stage):
+    """Records the duration of every call under `stage` while metrics are enabled."""
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            registry = _registry
+            if registry is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.record(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def profiled(fn, *args, **kwargs):
+    """Calls fn, under cProfile when the active metrics were enabled with profile."""
+    registry = _registry
+    if registry is None or not registry.profile:
+        return fn(*args, **kwargs)
+    return registry.profile_call(fn, *args, **kwargs)
+
+
+def measure_in_worker(fn, profile, *args):
+    """
+    Runs fn(*args) in a worker process with its own metrics and returns
+    (result, samples, profile stats) for the parent to merge.
+    """
+    registry = enable(profile)
+    try:
+        result = profiled(fn, *args)
+        return result, registry.samples(), registry.profile_stats()
+    finally:
+        disable()
@@ -0,0 +1,333 @@
+import multiprocessing
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+import metrics
+from canonical import Canonicalizer
+from fetcher import FetchError, Fetcher
+from scraper import (
+    extract_player_info,
+    fetch_page,
+    is_unchanged,
+    looks_like_player_page,
+    page_signature,
+)
+
+_DONE = object()
+# result of a page rejected on its raw bytes, before any parsing
+_PREFILTERED = object()
+# result of a page whose content matches what was processed last time
+_UNCHANGED = object()
+# result of a page that could not be downloaded, even after retries
+_FAILED = object()
+# result of a URL whose page was already handled under another URL in this run
+_DUPLICATE = object()
+
+
+def _ordered_map(executor, fn, iterable, window):
+    """
+    Like executor.map, but keeps at most `window` calls in flight instead of
+    submitting the whole iterable up front, so memory stays constant.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _fetch(url, fetcher, failed_urls=None):
+    try:
+        return fetch_page(url, fetcher)
+    except FetchError as e:
+        print(f"Failed to fetch {e}; skipping.")
+        if failed_urls is not None:
+            failed_urls.append(url)
+        return _FAILED
+
+
+def _fetch_admitted(url, fetcher, canonicalizer, failed_urls):
+    """
+    Fetches a URL from Canonicalizer.admit and returns the URL to store the
+    page under with its HTML, or with _DUPLICATE / _FAILED instead.
+    """
+    if url is None:
+        return url, _DUPLICATE
+    html = _fetch(url, fetcher, failed_urls)
+    if html is _FAILED:
+        return url, html
+    canonical = canonicalizer.learn(url, html)
+    if canonical is None:
+        return url, _DUPLICATE
+    return canonical, html
+
+
+def _backend_pages(urls, backend, fetcher, concurrency, known_pages, canonicalizer, failed_urls):
+    """
+    Pages of URLs from Canonicalizer.admit fetched by a batch backend, like
+    ApiBackend, in the form _fetch_admitted returns them.
+    """
+    for url, html in backend.pages(urls, fetcher, concurrency, known_pages):
+        if url is None:
+            yield url, _DUPLICATE
+        elif html is None:
+            if failed_urls is not None:
+                failed_urls.append(url)
+            yield url, _FAILED
+        else:
+            canonical = canonicalizer.learn(url, html)
+            yield (url, _DUPLICATE) if canonical is None else (canonical, html)
+
+
+def _skip_reason(url, html, known_pages):
+    if html is _FAILED or html is _DUPLICATE:
+        return html
+    if known_pages and is_unchanged(page_signature(html), known_pages.get(url)):
+        return _UNCHANGED
+    if not looks_like_player_page(html):
+        return _PREFILTERED
+    return None
+
+
+def _archive_page(archive, url, html, skip_reason):
+    # unchanged pages are already in the archive from the run that stored them
+    if archive is not None and skip_reason not in (_UNCHANGED, _FAILED, _DUPLICATE):
+        archive.append(url, html)
+
+
+def _scrape(url, fetcher, infobox_only, known_pages, archive, canonicalizer, failed_urls):
+    url, html = _fetch_admitted(url, fetcher, canonicalizer, failed_urls)
+    return _process(url, html, infobox_only, known_pages, archive)
+
+
+def _process(url, html, infobox_only, known_pages, archive):
+    skip_reason = _skip_reason(url, html, known_pages)
+    _archive_page(archive, url, html, skip_reason)
+    if skip_reason is not None:
+        return skip_reason
+    return metrics.profiled(extract_player_info, url, html, infobox_only)
+
+
+def _count_results(results, stats):
+    for player_info in results:
+        if player_info is _PREFILTERED:
+            stats["prefiltered"] += 1
+            player_info = None
+        elif player_info is _UNCHANGED:
+            stats["unchanged"] += 1
+            player_info = None
+        elif player_info is _FAILED:
+            stats["failed"] += 1
+            player_info = None
+        elif player_info is _DUPLICATE:
+            stats["duplicate"] += 1
+            player_info = None
+        elif player_info is None:
+            stats["not_player"] += 1
+        else:
+            stats["players"] += 1
+        yield player_info
+
+
+def scrape_all(
+    urls,
+    concurrency=1,
+    per_host_limit=None,
+    infobox_only=False,
+    cache=None,
+    stats=None,
+    known_pages=None,
+    archive=None,
+    fetch_options=None,
+    failed_urls=None,
+    canonicalizer=None,
+    backend=None,
+):
+    """
+    Scrapes every URL, overlapping network waits across `concurrency` threads.
+    Results are yielded in the same order as the input URLs.
+    If a Counter is passed as stats, it receives the number of players,
+    parsed non-players and pages rejected before parsing.
+    known_pages maps URLs to the (page_hash, revision_id) processed last time;
+    pages that still match are skipped without parsing and counted as unchanged.
+    With a SnapshotArchive, every fetched page except unchanged ones is archived.
+    fetch_options are extra Fetcher arguments (rate, timeout, retries, ...);
+    pages that still fail after the retries are counted as failed, and
+    appended to failed_urls when a list is given.
+    URLs are canonicalized and resolved through the canonicalizer's redirect
+    map; variants of a page already handled are counted as duplicates
+    without being fetched, and player rows carry the canonical URL.
+    A backend, like ApiBackend, fetches the pages in batches instead of one
+    GET per URL; pages are then parsed in this thread.
+    """
+    stats = Counter() if stats is None else stats
+    canonicalizer = canonicalizer or Canonicalizer()
+    urls = canonicalizer.admit(urls)
+    fetcher = Fetcher(concurrency, per_host_limit, cache, **(fetch_options or {}))
+    try:
+        if backend is not None:
+            pages = _backend_pages(
+                urls, backend, fetcher, concurrency, known_pages, canonicalizer, failed_urls
+            )
+            results = (
+                _process(url, html, infobox_only, known_pages, archive)
+                for url, html in pages
+            )
+            yield from _count_results(results, stats)
+            return
+
+        scrape = partial(
+            _scrape,
+            fetcher=fetcher,
+            infobox_only=infobox_only,
+            known_pages=known_pages,
+            archive=archive,
+            canonicalizer=canonicalizer,
+            failed_urls=failed_urls,
+        )
+        if concurrency <= 1:
+            yield from _count_results(map(scrape, urls), stats)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = _ordered_map(executor, scrape, urls, concurrency * 2)
+                yield from _count_results(results, stats)
+    finally:
+        fetcher.close()
+
+
+def _html_pages(urls, fetcher, concurrency, canonicalizer, failed_urls):
+    fetch = partial(
+        _fetch_admitted,
+        fetcher=fetcher,
+        canonicalizer=canonicalizer,
+        failed_urls=failed_urls,
+    )
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        yield from _ordered_map(executor, fetch, urls, concurrency * 2)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _fetch_into_queue(page_source, pages, stop):
+    try:
+        for url, html in page_source:
+            if stop.is_set():
+                break
+            pages.put((url, html))
+    except Exception as e:
+        pages.put(e)
+    finally:
+        page_source.close()
+        pages.put(_DONE)
+
+
+def _collect(future, registry):
+    if registry is None:
+        return future.result()
+    # parser processes send their own timings and profile back with the result
+    player_info, samples, profile_stats = future.result()
+    registry.merge(samples)
+    registry.add_profile_stats(profile_stats)
+    return player_info
+
+
+def _parse_in_order(pages, pool, max_pending, infobox_only, known_pages, archive):
+    registry = metrics.active()
+    extract = extract_player_info
+    if registry is not None:
+        extract = partial(
+            metrics.measure_in_worker, extract_player_info, registry.profile
+        )
+    pending = deque()
+    while True:
+        item = pages.get()
+        if item is _DONE:
+            break
+        if isinstance(item, Exception):
+            raise item
+        url, html = item
+        skip_reason = _skip_reason(url, html, known_pages)
+        _archive_page(archive, url, html, skip_reason)
+        if skip_reason is None:
+            future = pool.submit(extract, url, html, infobox_only)
+        else:
+            future = Future()
+            future.set_result(
+                skip_reason if registry is None else (skip_reason, {}, None)
+            )
+        pending.append(future)
+        if len(pending) >= max_pending:
+            yield _collect(pending.popleft(), registry)
+
+    while pending:
+        yield _collect(pending.popleft(), registry)
+
+
+def scrape_all_pipelined(
+    urls,
+    concurrency=1,
+    per_host_limit=None,
+    parse_workers=None,
+    queue_size=None,
+    infobox_only=False,
+    cache=None,
+    stats=None,
+    known_pages=None,
+    archive=None,
+    fetch_options=None,
+    failed_urls=None,
+    canonicalizer=None,
+    backend=None,
+):
+    """
+    Fetcher threads push downloaded pages into a bounded queue that a pool of
+    parser processes drains, so HTML parsing is not held to one core by the GIL.
+    Results are yielded in the same order as the input URLs; stats,
+    known_pages, archive, fetch_options, failed_urls, canonicalizer and
+    backend as in scrape_all.
+    """
+    stats = Counter() if stats is None else stats
+    canonicalizer = canonicalizer or Canonicalizer()
+    urls = canonicalizer.admit(urls)
+    parse_workers = parse_workers or multiprocessing.cpu_count()
+    queue_size = queue_size or parse_workers * 2
+    pages = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    fetcher = Fetcher(concurrency, per_host_limit, cache, **(fetch_options or {}))
+    if backend is None:
+        page_source = _html_pages(urls, fetcher, concurrency, canonicalizer, failed_urls)
+    else:
+        page_source = _backend_pages(
+            urls, backend, fetcher, concurrency, known_pages, canonicalizer, failed_urls
+        )
+
+    # spawn so parser workers never fork a process that has live fetch threads
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=parse_workers, mp_context=mp_context) as pool:
+        fetch_thread = threading.Thread(
+            target=_fetch_into_queue,
+            args=(page_source, pages, stop),
+            daemon=True,
+        )
+        fetch_thread.start()
+
+        try:
+            results = _parse_in_order(
+                pages, pool, queue_size, infobox_only, known_pages, archive
+            )
+            yield from _count_results(results, stats)
+        finally:
+            # unblock the fetch thread if the consumer stopped early
+            stop.set()
+            while fetch_thread.is_alive():
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            fetcher.close()
@@ -0,0 +1,209 @@
+from datetime import date, datetime
+from typing import Optional, Union
+
+from dates import normalize_date
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _text(value):
+    if value is None or isinstance(value, type):
+        return None
+    value = str(value)
+    return value if value.strip() else None
+
+
+def _int(value):
+    """
+    Returns an int for ints, integral floats and their text ("46", "46.0",
+    "1,204"); None for anything else, NaN included.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = value.strip().replace(",", "")
+        if value.lstrip("-").isdigit():
+            return int(value)
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+def _date(value):
+    """
+    Returns a date, or the stripped text itself when it holds no date that
+    normalize_date understands, so an unusual date of birth is never lost.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value.strip():
+        value = value.strip()
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            iso_date = normalize_date(value)
+            return date.fromisoformat(iso_date) if iso_date else value
+    return None
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            return datetime.strptime(value.strip(), TIMESTAMP_FORMAT)
+        except ValueError:
+            try:
+                return datetime.fromisoformat(value.strip())
+            except ValueError:
+                return None
+    return None
+
+
+def _bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+class PlayerRecord:
+    """
+    One scraped player, with typed fields: dates as date / datetime, counts
+    as int, missing values as None. A date of birth that cannot be read as a
+    date keeps its original text. __slots__ keeps it to a fraction of the
+    size of the equivalent dict. from_dict() builds a record from extracted
+    fields or an output CSV row, converting and blanking values once.
+    """
+
+    __slots__ = (
+        "url",
+        "name",
+        "full_name",
+        "date_of_birth",
+        "age",
+        "place_of_birth",
+        "country_of_birth",
+        "positions",
+        "current_club",
+        "national_team",
+        "appearances_current_club",
+        "goals_current_club",
+        "scraping_timestamp",
+        "dead",
+        "page_hash",
+        "revision_id",
+    )
+
+    url: str
+    name: Optional[str]
+    full_name: Optional[str]
+    date_of_birth: Union[date, str, None]
+    age: Optional[int]
+    place_of_birth: Optional[str]
+    country_of_birth: Optional[str]
+    positions: Optional[str]
+    current_club: Optional[str]
+    national_team: Optional[str]
+    appearances_current_club: Optional[int]
+    goals_current_club: Optional[int]
+    scraping_timestamp: Optional[datetime]
+    dead: bool
+    page_hash: Optional[str]
+    revision_id: Optional[int]
+
+    def __init__(
+        self,
+        url,
+        name=None,
+        full_name=None,
+        date_of_birth=None,
+        age=None,
+        place_of_birth=None,
+        country_of_birth=None,
+        positions=None,
+        current_club=None,
+        national_team=None,
+        appearances_current_club=None,
+        goals_current_club=None,
+        scraping_timestamp=None,
+        dead=False,
+        page_hash=None,
+        revision_id=None,
+    ):
+        self.url = url
+        self.name = name
+        self.full_name = full_name
+        self.date_of_birth = date_of_birth
+        self.age = age
+        self.place_of_birth = place_of_birth
+        self.country_of_birth = country_of_birth
+        self.positions = positions
+        self.current_club = current_club
+        self.national_team = national_team
+        self.appearances_current_club = appearances_current_club
+        self.goals_current_club = goals_current_club
+        self.scraping_timestamp = scraping_timestamp
+        self.dead = dead
+        self.page_hash = page_hash
+        self.revision_id = revision_id
+
+    @classmethod
+    def from_dict(cls, values):
+        """Builds a record from a dict of raw values; unknown keys are ignored."""
+        return cls(
+            **{
+                field: CONVERTERS[field](values.get(field))
+                for field in FIELDS
+                if field in values
+            }
+        )
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def to_row(self):
+        """Returns the fields as the strings written to the output CSV."""
+        row = self.to_dict()
+        if isinstance(self.date_of_birth, date):
+            row["date_of_birth"] = self.date_of_birth.isoformat()
+        if self.scraping_timestamp is not None:
+            row["scraping_timestamp"] = self.scraping_timestamp.strftime(TIMESTAMP_FORMAT)
+        return row
+
+    def __eq__(self, other):
+        if not isinstance(other, PlayerRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+
+    def __repr__(self):
+        return f"PlayerRecord(url={self.url!r}, name={self.name!r})"
+
+
+FIELDS = PlayerRecord.__slots__
+
+CONVERTERS = {
+    "url": _text,
+    "name": _text,
+    "full_name": _text,
+    "date_of_birth": _date,
+    "age": _int,
+    "place_of_birth": _text,
+    "country_of_birth": _text,
+    "positions": _text,
+    "current_club": _text,
+    "national_team": _text,
+    "appearances_current_club": _int,
+    "goals_current_club": _int,
+    "scraping_timestamp": _timestamp,
+    "dead": _bool,
+    "page_hash": _text,
+    "revision_id": _int,
+}
@@ -0,0 +1,227 @@
+import json
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from metrics import timed
+from player_record import FIELDS, PlayerRecord
+
+# every players column; dead is only kept in scraper output
+COLUMNS = [field for field in FIELDS if field != "dead"]
+
+# one statement text for any number of URLs, so every batch reuses the
+# prepared statement cached by the connection
+GET_MANY_SQL = f"""
+    SELECT {", ".join(COLUMNS)} FROM players
+    WHERE url IN (SELECT value FROM json_each(?));
+    """
+
+# served by the (current_club, ...) prefix of idx_players_club
+BY_CLUB_SQL = f"""
+    SELECT {", ".join(COLUMNS)} FROM players
+    WHERE current_club = ?
+    ORDER BY url;
+    """
+
+# cached "no such player", so repeated misses do not reach SQLite either
+_MISSING = object()
+
+
+class LRUCache:
+    """A size bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        value = self._entries.get(key, default)
+        if value is not default:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Stores value and returns the (key, value) pairs evicted for it."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        evicted = []
+        while len(self._entries) > self.max_size:
+            evicted.append(self._entries.popitem(last=False))
+        return evicted
+
+    def pop(self, key, default=None):
+        return self._entries.pop(key, default)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PlayerStore:
+    """
+    Read API over the players table for services: get_many(urls) and
+    by_club(name) return PlayerRecords. Queries run on a pool of read-only
+    connections shared by all threads, and results are kept in LRU caches of
+    cache_size players and club_cache_size clubs, so hot lookups never reach
+    SQLite. Cached records are shared, treat them as read-only.
+
+    Writes made through a DatabaseManager passed to watch() evict the rows
+    they touch. Writes from other processes are not seen until clear().
+    """
+
+    def __init__(self, db_path, pool_size=4, cache_size=100000, club_cache_size=1000):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._players = LRUCache(cache_size)
+        self._clubs = LRUCache(club_cache_size)
+        # url -> clubs whose cached list holds it, to evict them on writes
+        self._url_clubs = {}
+        # bumped by every invalidation; results read before one are not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def _connection(self):
+        """Borrows a pooled connection, opening one while fewer than pool_size exist."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                open_new = self._opened < self.pool_size
+                if open_new:
+                    self._opened += 1
+            if open_new:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @timed("db.read")
+    def _query(self, sql, params):
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [PlayerRecord.from_dict(dict(zip(COLUMNS, row))) for row in rows]
+
+    def get(self, url):
+        return self.get_many([url]).get(url)
+
+    def get_many(self, urls):
+        """Returns {url: PlayerRecord} for the given URLs that are in the table."""
+        players = {}
+        missing = []
+        with self._lock:
+            for url in urls:
+                player = self._players.get(url)
+                if player is None:
+                    missing.append(url)
+                    continue
+                self.hits += 1
+                if player is not _MISSING:
+                    players[url] = player
+            self.misses += len(missing)
+            generation = self._generation
+        if not missing:
+            return players
+
+        missing = list(dict.fromkeys(missing))
+        found = {}
+        for start in range(0, len(missing), 10000):
+            chunk = missing[start : start + 10000]
+            for player in self._query(GET_MANY_SQL, (json.dumps(chunk),)):
+                found[player.url] = player
+        with self._lock:
+            if generation == self._generation:
+                for url in missing:
+                    self._players.put(url, found.get(url, _MISSING))
+        players.update(found)
+        return players
+
+    def by_club(self, name):
+        """Returns the PlayerRecords of a club's current players, ordered by URL."""
+        with self._lock:
+            players = self._clubs.get(name)
+            if players is not None:
+                self.hits += 1
+                return list(players)
+            self.misses += 1
+            generation = self._generation
+
+        players = tuple(self._query(BY_CLUB_SQL, (name,)))
+        with self._lock:
+            if generation != self._generation:
+                return list(players)
+            for club, evicted in self._clubs.put(name, players):
+                self._forget_club(club, evicted)
+            for player in players:
+                self._url_clubs.setdefault(player.url, set()).add(name)
+                self._players.put(player.url, player)
+        return list(players)
+
+    def _forget_club(self, club, players):
+        for player in players:
+            clubs = self._url_clubs.get(player.url)
+            if clubs is not None:
+                clubs.discard(club)
+                if not clubs:
+                    del self._url_clubs[player.url]
+
+    def invalidate(self, rows):
+        """
+        Evicts the players of the given upsert rows (dicts with a url and,
+        optionally, current_club) and the cached clubs they leave or join.
+        """
+        with self._lock:
+            self._generation += 1
+            for row in rows:
+                url = row.get("url")
+                cached = self._players.pop(url)
+                clubs = self._url_clubs.pop(url, set())
+                if cached is not None and cached is not _MISSING:
+                    clubs.add(cached.current_club)
+                clubs.add(row.get("current_club"))
+                for club in clubs:
+                    evicted = self._clubs.pop(club)
+                    if evicted is not None:
+                        self._forget_club(club, evicted)
+
+    def watch(self, db_manager):
+        """Invalidates cached rows whenever db_manager upserts players."""
+        db_manager.write_listeners.append(self.invalidate)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._players.clear()
+            self._clubs.clear()
+            self._url_clubs.clear()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
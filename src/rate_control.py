@@ -0,0 +1,151 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value, now=None):
+    """
+    Returns the wait in seconds asked for by a Retry-After header, given either
+    as delta seconds or as an HTTP date; None when missing or unparsable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def backoff_delay(attempt, base=0.5, maximum=30.0):
+    """Exponential backoff for the given retry attempt (0-based), capped and jittered."""
+    return min(maximum, base * 2**attempt) * random.uniform(0.5, 1.0)
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, with bursts of up to
+    `burst`. A rate of None never blocks.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate or 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AimdLimiter:
+    """
+    Concurrency limit adjusted by additive increase / multiplicative decrease:
+    every `limit` successful requests raise it by one; a failure, or a response
+    slower than latency_target, multiplies it by decrease_factor, at most once
+    per cooldown seconds so one burst of errors counts as a single signal.
+    """
+
+    def __init__(
+        self,
+        maximum,
+        minimum=1,
+        latency_target=None,
+        decrease_factor=0.5,
+        cooldown=1.0,
+    ):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self, latency=None):
+        if self.latency_target and latency and latency > self.latency_target:
+            self.on_failure()
+            return
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def on_failure(self):
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+
+
+class HostController:
+    """
+    Pacing for one host: a token bucket for the request rate, an AIMD limit on
+    requests in flight, and a shared pause set from Retry-After responses.
+    """
+
+    def __init__(self, max_concurrency, rate=None, latency_target=None):
+        self.bucket = TokenBucket(rate)
+        self.limiter = AimdLimiter(max_concurrency, latency_target=latency_target)
+        self.paused_until = 0.0
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def wait_turn(self):
+        wait = self.paused_until - time.monotonic()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.paused_until - time.monotonic()
+        self.bucket.acquire()
+
+    @contextmanager
+    def slot(self):
+        self.limiter.acquire()
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    def on_success(self, latency):
+        self.limiter.on_success(latency)
+
+    def on_failure(self):
+        self.limiter.on_failure()
@@ -0,0 +1,110 @@
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from db_writer import DatabaseWriter
+from scraper import extract_player_info, looks_like_player_page
+from snapshot_archive import SnapshotArchive
+from streaming import open_output_writer
+
+# opened once per worker process by _open_archive
+_archive = None
+
+
+def _open_archive(archive_dir):
+    global _archive
+    _archive = SnapshotArchive(archive_dir)
+
+
+def _extract_snapshot(entry, infobox_only=False):
+    url, (offset, length) = entry
+    html = _archive.read(offset, length)
+    if not looks_like_player_page(html):
+        return None
+    return extract_player_info(url, html, infobox_only)
+
+
+def reprocess(archive_dir, workers=None, infobox_only=False, chunksize=64):
+    """
+    Runs the current extractors over the latest snapshot of every archived
+    page in a pool of worker processes, yielding results in index order.
+    """
+    entries = SnapshotArchive(archive_dir).entries()
+    workers = workers or multiprocessing.cpu_count()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_open_archive,
+        initargs=(archive_dir,),
+    ) as pool:
+        extract = partial(_extract_snapshot, infobox_only=infobox_only)
+        yield from pool.map(extract, entries.items(), chunksize=chunksize)
+
+
+def main(
+    archive_dir="../data/snapshots",
+    output_csv_file_path=None,
+    db_path=None,
+    workers=None,
+    infobox_only=False,
+):
+    if not output_csv_file_path and not db_path:
+        output_csv_file_path = "../data/scraped_player_data.csv"
+
+    csv_writer = None
+    if output_csv_file_path:
+        csv_writer = open_output_writer(output_csv_file_path)
+    db_writer = None
+    if db_path:
+        db_writer = DatabaseWriter(db_path).start()
+
+    players = pages = 0
+    try:
+        for player_info in reprocess(archive_dir, workers, infobox_only):
+            pages += 1
+            if player_info is None:
+                continue
+            players += 1
+            if csv_writer:
+                csv_writer.write(player_info)
+            if db_writer:
+                db_writer.put(player_info)
+    finally:
+        if csv_writer:
+            csv_writer.close()
+        if db_writer:
+            # an exception already propagating stays the one reported
+            db_writer.close(raise_error=False)
+            if db_writer.error is not None:
+                print(f"Database writer stopped: {db_writer.error}")
+
+    if db_writer and db_writer.error is not None:
+        raise db_writer.error
+    print(f"Re-extracted {players} players from {pages} archived pages.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Re-run the extractors over the snapshot archive, without network."
+    )
+    parser.add_argument("--archive", dest="archive_dir", default="../data/snapshots")
+    parser.add_argument(
+        "--output",
+        dest="output_csv_file_path",
+        default=None,
+        help="CSV to rewrite (default: ../data/scraped_player_data.csv unless --db)",
+    )
+    parser.add_argument("--db", dest="db_path", default=None)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="parser processes (default: number of cores)",
+    )
+    parser.add_argument("--infobox-only", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
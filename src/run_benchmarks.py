@@ -0,0 +1,377 @@
+import argparse
+import hashlib
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from db_manager import DatabaseManager
+from fetcher import FetchError, Fetcher
+from run_queries import load_queries, time_query
+from scraper import extract_player_info, fetch_page, looks_like_player_page
+from streaming import read_urls
+
+# the test suite's saved pages, used until the real corpus has been downloaded
+FALLBACK_CORPUS_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "pages"
+
+CLUBS = ["Liverpool"] + [f"Club {index}" for index in range(1, 2000)]
+POSITIONS = [
+    "Goalkeeper",
+    "Centre-back",
+    "Left-back",
+    "Right-back",
+    "Defensive midfielder",
+    "Midfielder",
+    "Winger",
+    "Forward",
+]
+
+
+def synthetic_player(index, appearances_offset=0):
+    """A deterministic fake player row, spread over 2000 clubs like a real crawl."""
+    return {
+        "player_id": f"bench-{index}",
+        "url": f"https://en.wikipedia.org/wiki/Benchmark_Player_{index}",
+        "name": f"Benchmark Player {index}",
+        "full_name": f"Benchmark Player Number {index}",
+        "date_of_birth": f"{1980 + index % 25}-{1 + index % 12:02d}-{1 + index % 28:02d}",
+        "age": 17 + index % 22,
+        "place_of_birth": f"City {index % 500}",
+        "country_of_birth": f"Country {index % 120}",
+        "positions": POSITIONS[index % len(POSITIONS)],
+        "current_club": CLUBS[(index * 7919) % len(CLUBS)],
+        "national_team": f"Country {index % 120}" if index % 3 == 0 else None,
+        "appearances_current_club": (index * 31 + appearances_offset) % 400,
+        "goals_current_club": (index * 17) % 60,
+        "scraping_timestamp": "2024-01-01 00:00:00",
+        "page_hash": None,
+        "revision_id": None,
+    }
+
+
+def load_corpus(corpus_dir):
+    """Returns (name, raw bytes) for every saved .html page in corpus_dir."""
+    return [
+        (path.stem, path.read_bytes())
+        for path in sorted(Path(corpus_dir).glob("*.html"))
+    ]
+
+
+def corpus_digest(corpus):
+    """Short hash of the pages, to tell results measured on other pages apart."""
+    digest = hashlib.sha1()
+    for name, html in corpus:
+        digest.update(name.encode("utf-8"))
+        digest.update(html)
+    return digest.hexdigest()[:12]
+
+
+def corpus_file_name(url):
+    path = urlsplit(url).path
+    title = path[len("/wiki/") :] if path.startswith("/wiki/") else path.rsplit("/", 1)[-1]
+    name = title.replace("/", "%2F")
+    return name if name.endswith(".html") else f"{name}.html"
+
+
+def fetch_corpus(urls_file_path, corpus_dir, fetcher=None):
+    """
+    Saves the raw HTML of every URL in urls_file_path to corpus_dir, skipping
+    pages already saved. Returns the number of pages downloaded.
+    """
+    corpus_dir = Path(corpus_dir)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        # one page at a time, politely paced
+        fetcher = Fetcher(rate=2)
+    fetched = 0
+    try:
+        for url in read_urls(urls_file_path):
+            path = corpus_dir / corpus_file_name(url)
+            if path.exists():
+                continue
+            try:
+                path.write_bytes(fetch_page(url, fetcher))
+            except FetchError as e:
+                print(f"Failed to fetch {e}; skipping.")
+                continue
+            fetched += 1
+    finally:
+        if own_fetcher:
+            fetcher.close()
+    return fetched
+
+
+def bench_extraction(corpus, infobox_only=False, min_time=2.0):
+    """
+    Runs the prefilter and extract_player_info over the corpus until at least
+    min_time seconds have passed and returns the throughput in pages/sec.
+    """
+    pages = 0
+    start = time.perf_counter()
+    while True:
+        for name, html in corpus:
+            if looks_like_player_page(html):
+                extract_player_info(name, html, infobox_only)
+            pages += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return pages / elapsed
+
+
+def _timed_import(db_path, load, rows):
+    db_manager = DatabaseManager(db_path, bulk_load=True)
+    db_manager.create_table()
+    start = time.perf_counter()
+    load(db_manager, rows)
+    elapsed = time.perf_counter() - start
+    db_manager.close_connection()
+    return len(rows) / elapsed
+
+
+def _scraped(player_data):
+    # scraped rows arrive without a player_id
+    return {k: v for k, v in player_data.items() if k != "player_id"}
+
+
+def bench_imports(work_dir, rows=20000):
+    """
+    Returns rows/sec of the bulk CSV import, of scraper inserts into an empty
+    table and of scraper updates over existing rows.
+    """
+    players = [synthetic_player(index) for index in range(rows)]
+    scraped = [_scraped(player_data) for player_data in players]
+    rescraped = [
+        _scraped(synthetic_player(index, appearances_offset=1))
+        for index in range(rows)
+    ]
+    work_dir = Path(work_dir)
+
+    return {
+        "import.csv.rows_per_sec": _timed_import(
+            work_dir / "csv.sqlite",
+            DatabaseManager.bulk_insert_or_update_from_csv,
+            players,
+        ),
+        "import.scraper_insert.rows_per_sec": _timed_import(
+            work_dir / "scraper.sqlite",
+            DatabaseManager.bulk_insert_or_update_from_scraper,
+            scraped,
+        ),
+        # same database again, so every row exists and one column changes
+        "import.scraper_update.rows_per_sec": _timed_import(
+            work_dir / "scraper.sqlite",
+            DatabaseManager.bulk_insert_or_update_from_scraper,
+            rescraped,
+        ),
+    }
+
+
+def bench_queries(work_dir, queries_dir, rows=100000, repeat=5):
+    """Returns the median latency in ms of every stored query over `rows` players."""
+    db_path = Path(work_dir) / "queries.sqlite"
+    db_manager = DatabaseManager(db_path, bulk_load=True, batch_size=5000)
+    db_manager.create_table()
+    db_manager.bulk_insert_or_update_from_csv(
+        synthetic_player(index) for index in range(rows)
+    )
+    db_manager._execute_sql("ANALYZE;")
+    db_manager.close_connection()
+
+    results = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, sql in load_queries(queries_dir):
+            _, _, timings = time_query(conn, sql, repeat)
+            results[f"query.{name}.median_ms"] = statistics.median(timings)
+    finally:
+        conn.close()
+    return results
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_sec")
+
+
+def compare_results(baseline, current, max_slowdown=0.2, thresholds=None):
+    """
+    Compares the metrics of two result files and returns a message for every
+    metric that got slower than allowed: max_slowdown is the tolerated fraction
+    (0.2 = 20% slower), overridable per metric through thresholds.
+    """
+    thresholds = thresholds or {}
+    regressions = []
+    for metric, old in baseline["metrics"].items():
+        new = current["metrics"].get(metric)
+        if new is None or not old or not new:
+            continue
+        # as a fraction of the baseline speed, whatever the unit
+        slowdown = old / new - 1 if higher_is_better(metric) else new / old - 1
+        allowed = thresholds.get(metric, max_slowdown)
+        if slowdown > allowed:
+            regressions.append(
+                f"{metric}: {old:.2f} -> {new:.2f} "
+                f"({slowdown:.0%} slower, {allowed:.0%} allowed)"
+            )
+    return regressions
+
+
+def run_benchmarks(
+    corpus_dir, queries_dir, min_time=2.0, import_rows=20000, query_rows=100000, repeat=5
+):
+    corpus = load_corpus(corpus_dir)
+    metrics = {
+        "extraction.full.pages_per_sec": bench_extraction(corpus, False, min_time),
+        "extraction.infobox_only.pages_per_sec": bench_extraction(
+            corpus, True, min_time
+        ),
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        metrics.update(bench_imports(work_dir, import_rows))
+        metrics.update(bench_queries(work_dir, queries_dir, query_rows, repeat))
+
+    return {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "config": {
+            "corpus_pages": len(corpus),
+            "corpus": corpus_digest(corpus),
+            "import_rows": import_rows,
+            "query_rows": query_rows,
+        },
+        "metrics": metrics,
+    }
+
+
+def parse_threshold(value):
+    metric, _, fraction = value.partition("=")
+    try:
+        return metric, float(fraction)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected METRIC=FRACTION, got {value!r}")
+
+
+def main(
+    corpus_dir="../data/benchmark_pages",
+    fetch_corpus_from=None,
+    queries_dir="../sql_queries",
+    output_path="../data/benchmark_results.json",
+    min_time=2.0,
+    import_rows=20000,
+    query_rows=100000,
+    repeat=5,
+    compare_to=None,
+    max_slowdown=0.2,
+    thresholds=(),
+):
+    if fetch_corpus_from:
+        fetched = fetch_corpus(fetch_corpus_from, corpus_dir)
+        print(f"Saved {fetched} new pages to {corpus_dir}")
+    if not load_corpus(corpus_dir):
+        print(
+            f"Warning: no saved pages in {corpus_dir}; measuring extraction on the "
+            f"{len(load_corpus(FALLBACK_CORPUS_DIR))} small test pages in {FALLBACK_CORPUS_DIR} "
+            "instead, which says little about real Wikipedia pages. Download the benchmark "
+            "pages once with --fetch-corpus (needs network access) and commit them."
+        )
+        corpus_dir = FALLBACK_CORPUS_DIR
+
+    results = run_benchmarks(
+        corpus_dir, queries_dir, min_time, import_rows, query_rows, repeat
+    )
+    for metric, value in results["metrics"].items():
+        print(f"{metric}: {value:.2f}")
+
+    with open(output_path, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to {output_path}")
+
+    if compare_to:
+        with open(compare_to, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config", {}).get("corpus") != results["config"]["corpus"]:
+            print(f"Warning: {compare_to} was measured on other pages than {corpus_dir}.")
+        regressions = compare_results(
+            baseline, results, max_slowdown, dict(thresholds)
+        )
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed against {compare_to}:")
+            for regression in regressions:
+                print(f"    {regression}")
+            sys.exit(1)
+        print(f"No regressions against {compare_to}.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark extraction, database imports and the stored queries offline."
+    )
+    parser.add_argument(
+        "--corpus",
+        dest="corpus_dir",
+        default="../data/benchmark_pages",
+        help="folder of saved Wikipedia pages to extract (default: ../data/benchmark_pages)",
+    )
+    parser.add_argument(
+        "--fetch-corpus",
+        dest="fetch_corpus_from",
+        nargs="?",
+        const="../data/benchmark_urls.csv",
+        default=None,
+        metavar="URLS_FILE",
+        help="first download the pages listed in URLS_FILE into --corpus "
+        "(default: ../data/benchmark_urls.csv)",
+    )
+    parser.add_argument("--queries-dir", default="../sql_queries")
+    parser.add_argument(
+        "--output", dest="output_path", default="../data/benchmark_results.json"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=2.0,
+        help="seconds to spend on each extraction benchmark (default: 2)",
+    )
+    parser.add_argument("--import-rows", type=int, default=20000)
+    parser.add_argument(
+        "--query-rows",
+        type=int,
+        default=100000,
+        help="size of the synthetic players table for the queries (default: 100000)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs per query (default: 5)"
+    )
+    parser.add_argument(
+        "--compare",
+        dest="compare_to",
+        default=None,
+        help="baseline results JSON; exit with status 1 on any regression",
+    )
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=0.2,
+        help="tolerated slowdown as a fraction, 0.2 = 20%% (default: 0.2)",
+    )
+    parser.add_argument(
+        "--threshold",
+        dest="thresholds",
+        type=parse_threshold,
+        action="append",
+        default=[],
+        metavar="METRIC=FRACTION",
+        help="per-metric override of --max-slowdown, may be repeated",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -0,0 +1,103 @@
+import argparse
+import csv
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+
+from db_manager import DatabaseManager
+
+
+def load_queries(queries_dir):
+    """Returns (name, sql) for every .sql file in queries_dir, sorted by name."""
+    return [
+        (path.stem, path.read_text(encoding="utf-8"))
+        for path in sorted(Path(queries_dir).glob("*.sql"))
+    ]
+
+
+def time_query(conn, sql, repeat=5):
+    """
+    Runs sql `repeat` times and returns the rows, column names and the
+    per-run timings in milliseconds.
+    """
+    timings = []
+    rows, columns = [], []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        cursor = conn.execute(sql)
+        rows = cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+        columns = [column[0] for column in cursor.description]
+    return rows, columns, timings
+
+
+def query_plan(conn, sql):
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def write_result(result_path, columns, rows):
+    with open(result_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile, delimiter=";")
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def main(
+    db_path="../db/database.sqlite",
+    queries_dir="../sql_queries",
+    repeat=5,
+    create_indexes=False,
+    write_results=False,
+    explain=False,
+):
+    if create_indexes:
+        db_manager = DatabaseManager(db_path)
+        db_manager.create_indexes(analyze=True)
+        db_manager.close_connection()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, sql in load_queries(queries_dir):
+            rows, columns, timings = time_query(conn, sql, repeat)
+            print(
+                f"{name}: {len(rows)} rows, "
+                f"best {min(timings):.2f} ms, median {statistics.median(timings):.2f} ms"
+            )
+            if explain:
+                for step in query_plan(conn, sql):
+                    print(f"    {step}")
+            if write_results:
+                result_name = f"{name.removeprefix('sql_')}_result.csv"
+                write_result(Path(queries_dir) / result_name, columns, rows)
+    finally:
+        conn.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the stored SQL queries and report their timings."
+    )
+    parser.add_argument("--db", dest="db_path", default="../db/database.sqlite")
+    parser.add_argument("--queries-dir", default="../sql_queries")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs per query (default: 5)"
+    )
+    parser.add_argument(
+        "--create-indexes",
+        action="store_true",
+        help="add the query indexes to an existing database first",
+    )
+    parser.add_argument(
+        "--write-results",
+        action="store_true",
+        help="save each result as <query>_result.csv next to the queries",
+    )
+    parser.add_argument(
+        "--explain", action="store_true", help="print each query plan"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
@@ -1,65 +1,84 @@
+import hashlib
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from datetime import datetime
 import re
 
-
-def calculate_age_from_dob(dob_str):
+from dates import age_from_iso, normalize_date, parse_age
+from fetcher import DEFAULT_TIMEOUT, FetchError
+from metrics import timed
+from player_record import PlayerRecord
+
+REVISION_ID_REGEX = re.compile(rb'"wgRevisionId":\s*(\d+)')
+
+TEXT_DOB_REGEXES = [
+    re.compile(r"born on (\d{1,2} [A-Za-z]+ \d{4})"),
+    re.compile(r"\b(\d{1,2} [A-Za-z]+ \d{4})\b"),
+    re.compile(r"\((\d{1,2} [A-Za-z]+ \d{4})\)"),
+]
+# spaces, tabs and no-break spaces but no newlines, so no match runs on into
+# the next lead paragraph
+TEXT_PLACE_OF_BIRTH_REGEX = re.compile(r"born in ([A-Za-z \t\xa0,]+)")
+TEXT_POSITIONS_REGEX = re.compile(r"is a ([A-Za-z \t\xa0,]+) footballer")
+TEXT_NATIONAL_TEAM_REGEX = re.compile(r"has represented the ([A-Za-z \t\xa0]+) national team")
+TEXT_CLUB_AND_POSITION_REGEX = re.compile(
+    r"plays as a ([\w \t\xa0]+) for local club ([\w \t\xa0\.\-]+?)(?=\.)"
+)
+BRACKETS_REGEX = re.compile(r"\s*\[.*?\]|\s*\([^)]*\)")
+FOOTNOTES_REGEX = re.compile(r"\[.*?\]")
+
+
+def lead_text(soup):
     """
-    Calculate age given a date of birth string in YYYY-MM-DD format.
+    Returns the text of the lead paragraphs, the ones before the first section
+    heading, which is where the text fallback finds its facts, one paragraph
+    per line. Falls back to the whole page text when the article body is not found.
     """
-    dob = datetime.strptime(dob_str, "%Y-%m-%d")
-    today = datetime.today()
-    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-    return age
+    content = soup.find("div", class_="mw-parser-output")
+    if content is None:
+        return soup.get_text()
+
+    paragraphs = []
+    for child in content.find_all(True, recursive=False):
+        if child.name == "h2" or "mw-heading" in child.get("class", ()):
+            break
+        if child.name == "p":
+            paragraphs.append(child.get_text().strip())
+    return "\n".join(paragraphs)
 
 
+@timed("extract.scrape_text_based_info")
 def scrape_text_based_info(soup):
     """
     Scrape information from text paragraphs when structured data is missing.
     """
-    text = soup.get_text()
+    text = lead_text(soup)
     player_info = {}
 
-    dob_regex_patterns = [
-        re.compile(r"born on (\d{1,2} [A-Za-z]+ \d{4})"),
-        re.compile(r"\b(\d{1,2} [A-Za-z]+ \d{4})\b"),
-        re.compile(r"\((\d{1,2} [A-Za-z]+ \d{4})\)"),
-    ]
-
-    for regex in dob_regex_patterns:
+    for regex in TEXT_DOB_REGEXES:
         dob_match = regex.search(text)
         if dob_match:
-            dob_str = dob_match.group(1)
-            try:
-                dob_datetime = datetime.strptime(dob_str, "%d %B %Y")
-                player_info["date_of_birth"] = dob_datetime.strftime("%Y-%m-%d")
+            dob = normalize_date(dob_match.group(1))
+            if dob:
+                player_info["date_of_birth"] = dob
                 break
-            except ValueError:
-                continue
 
-    place_of_birth_regex = re.compile(r"born in ([A-Za-z\s,]+)")
-    place_of_birth_match = place_of_birth_regex.search(text)
+    place_of_birth_match = TEXT_PLACE_OF_BIRTH_REGEX.search(text)
     if place_of_birth_match:
         player_info["place_of_birth"] = place_of_birth_match.group(1)
 
     if "date_of_birth" in player_info:
-        player_info["age"] = calculate_age_from_dob(player_info["date_of_birth"])
+        player_info["age"] = age_from_iso(player_info["date_of_birth"])
 
-    positions_regex = re.compile(r"is a ([A-Za-z\s,]+) footballer")
-    positions_match = positions_regex.search(text)
+    positions_match = TEXT_POSITIONS_REGEX.search(text)
     if positions_match:
         player_info["country_of_birth"] = positions_match.group(1)
 
-    national_team_regex = re.compile(r"has represented the ([A-Za-z\s]+) national team")
-    national_team_match = national_team_regex.search(text)
+    national_team_match = TEXT_NATIONAL_TEAM_REGEX.search(text)
     if national_team_match:
         player_info["national_team"] = national_team_match.group(1)
 
-    current_club_and_position_regex = re.compile(
-        r"plays as a ([\w\s]+) for local club ([\w\s\.\-]+?)(?=\.)"
-    )
-    match = current_club_and_position_regex.search(text)
+    match = TEXT_CLUB_AND_POSITION_REGEX.search(text)
     if match:
         player_info["positions"] = match.group(1).strip()
         player_info["current_club"] = match.group(2).strip()
@@ -68,13 +87,11 @@ def scrape_text_based_info(soup):
 
 
 def remove_text_in_brackets(text):
-    pattern = r"\s*\[.*?\]|\s*\([^)]*\)"
-    cleaned_text = re.sub(pattern, "", text).strip()
-    return cleaned_text
+    return BRACKETS_REGEX.sub("", text).strip()
 
 
 def clean_text(text):
-    return re.sub("\[.*?\]", "", text).strip()
+    return FOOTNOTES_REGEX.sub("", text).strip()
 
 
 def extract_date_of_birth(dob_string):
@@ -82,34 +99,7 @@ def extract_date_of_birth(dob_string):
     Extracts the ISO format date of birth from the given string, handling both
     '(YYYY-MM-DD) DD Month YYYY (age XX)', 'DD Month YYYY', and 'Month DD, YYYY' formats.
     """
-    # try ISO format
-    iso_match = re.search(r"\((\d{4}-\d{2}-\d{2})\)", dob_string)
-    if iso_match:
-        return iso_match.group(1)
-
-    # try 'DD Month YYYY' format
-    common_format_match = re.search(r"\b(\d{1,2}\s+[A-Za-z]+\s+\d{4})\b", dob_string)
-    if common_format_match:
-        date_in_common_format = common_format_match.group(1)
-        try:
-            parsed_date = datetime.strptime(date_in_common_format, "%d %B %Y")
-            return parsed_date.strftime("%Y-%m-%d")
-        except ValueError:
-            pass
-
-    # try 'Month DD, YYYY' format
-    alternative_format_match = re.search(
-        r"\b([A-Za-z]+\s+\d{1,2},\s+\d{4})\b", dob_string
-    )
-    if alternative_format_match:
-        date_in_alternative_format = alternative_format_match.group(1)
-        try:
-            parsed_date = datetime.strptime(date_in_alternative_format, "%B %d, %Y")
-            return parsed_date.strftime("%Y-%m-%d")
-        except ValueError:
-            pass
-
-    return None
+    return normalize_date(dob_string)
 
 
 def extract_age(dob_string):
@@ -118,23 +108,7 @@ def extract_age(dob_string):
     First tries to extract explicitly mentioned age, if not available,
     calculates based on the date of birth.
     """
-
-    # try to extract explicitly mentioned age first
-    age_match = re.search(r"\(age\xa0?(\d+)\)", dob_string)
-    if age_match:
-        return int(age_match.group(1))
-
-    # calculate based on date of birth
-    dob = extract_date_of_birth(dob_string)
-    if dob:
-        dob_date = datetime.strptime(dob, "%Y-%m-%d")
-        today = datetime.today()
-        age = (
-            today.year
-            - dob_date.year
-            - ((today.month, today.day) < (dob_date.month, dob_date.day))
-        )
-        return age
+    return parse_age(dob_string)
 
 
 def extract_place_and_country(place_of_birth_string):
@@ -163,33 +137,66 @@ def find_international_career_header(soup):
     return None
 
 
+def last_national_team(career_rows):
+    # Reverse iterate through the career rows to find the last valid team entry
+    for row in reversed(career_rows):
+        team_cell = row.find("td", class_="infobox-data")
+        if team_cell and team_cell.find("a"):
+            team_name = team_cell.find("a").text.strip()
+            return team_name
+        # if the row has the class 'infobox-below', it's considered a footer/note and skipped
+        if row.get("class") == ["infobox-below"]:
+            continue
+
+    return None
+
+
+def current_club_from_rows(senior_career_rows):
+    for row in reversed(senior_career_rows):
+        year_cell = row.find("th", class_="infobox-label")
+        if year_cell and "–" in year_cell.text and year_cell.text.strip().endswith("–"):
+            club_info = {
+                "current_club": None,
+                "appearances_current_club": None,
+                "goals_current_club": None,
+            }
+            club_cell = row.find("td", class_="infobox-data")
+            if club_cell and club_cell.find("a"):
+                club_info["current_club"] = club_cell.find("a").text.strip()
+            stats_cells = row.find_all("td", class_="infobox-data")
+            if len(stats_cells) >= 3:
+                club_info["appearances_current_club"] = stats_cells[1].text.strip()
+                club_info["goals_current_club"] = (
+                    stats_cells[2].text.strip().strip("()")
+                )
+            return club_info
+
+    return {
+        "current_club": None,
+        "appearances_current_club": None,
+        "goals_current_club": None,
+    }
+
+
+@timed("extract.find_most_recent_national_team")
 def find_most_recent_national_team(soup):
     international_career_header = find_international_career_header(soup)
 
     if international_career_header:
         all_rows = international_career_header.find_parent("table").find_all("tr")
         header_index = all_rows.index(international_career_header.find_parent("tr"))
-        career_rows = all_rows[header_index + 1 :]
-
-        # Reverse iterate through the career rows to find the last valid team entry
-        for row in reversed(career_rows):
-            team_cell = row.find("td", class_="infobox-data")
-            if team_cell and team_cell.find("a"):
-                team_name = team_cell.find("a").text.strip()
-                return team_name
-            # if the row has the class 'infobox-below', it's considered a footer/note and skipped
-            if row.get("class") == ["infobox-below"]:
-                continue
+        return last_national_team(all_rows[header_index + 1 :])
 
     return None
 
 
+@timed("extract.find_current_club_and_stats")
 def find_current_club_and_stats(soup):
-    senior_career_header = soup.find("th", text="Senior career*")
+    senior_career_header = soup.find("th", string="Senior career*")
     international_career_header = find_international_career_header(soup)
 
+    senior_career_rows = []
     if senior_career_header:
-        senior_career_rows = []
         current_row = senior_career_header.find_parent("tr").find_next_sibling("tr")
 
         # iterate through the rows until reaching either the "International career" section or the end.
@@ -202,42 +209,94 @@ def find_current_club_and_stats(soup):
             senior_career_rows.append(current_row)
             current_row = current_row.find_next_sibling("tr")
 
-        for row in reversed(senior_career_rows):
-            year_cell = row.find("th", class_="infobox-label")
-            if (
-                year_cell
-                and "–" in year_cell.text
-                and year_cell.text.strip().endswith("–")
-            ):
-                club_info = {
-                    "current_club": None,
-                    "appearances_current_club": None,
-                    "goals_current_club": None,
-                }
-                club_cell = row.find("td", class_="infobox-data")
-                if club_cell and club_cell.find("a"):
-                    club_info["current_club"] = club_cell.find("a").text.strip()
-                stats_cells = row.find_all("td", class_="infobox-data")
-                if len(stats_cells) >= 3:
-                    club_info["appearances_current_club"] = stats_cells[1].text.strip()
-                    club_info["goals_current_club"] = (
-                        stats_cells[2].text.strip().strip("()")
-                    )
-                return club_info
+    return current_club_from_rows(senior_career_rows)
 
-    return {
-        "current_club": None,
-        "appearances_current_club": None,
-        "goals_current_club": None,
-    }
 
+@timed("extract.walk_infobox")
+def walk_infobox(infobox):
+    """
+    Collects every field of the infobox in a single pass over its rows,
+    including the rows of the 'Senior career' and 'International career' sections.
+    """
+    fields = {}
+    senior_career_rows = []
+    international_career_rows = []
+    section = None
+    senior_career_parent = None
+
+    for row in infobox.find_all("tr"):
+        header = row.find("th")
+        data = row.find("td")
+        if header and data:
+            header_text = header.text.strip()
+            data_text = clean_text(data.text)
+
+            if "Full name" in header_text:
+                fields["full_name"] = data_text
+            elif "Date of birth" in header_text:
+                fields["date_of_birth"] = extract_date_of_birth(data_text)
+                fields["age"] = extract_age(data_text)
+            elif "Place of birth" in header_text:
+                place_of_birth, country_of_birth = extract_place_and_country(
+                    data_text
+                )
+                fields["place_of_birth"] = place_of_birth
+                fields["country_of_birth"] = country_of_birth
+            elif "Country" in header_text:
+                fields["country_of_birth"] = data_text
+            elif "Position" in header_text:
+                fields["positions"] = data_text
+            elif "Date of death" in header_text:
+                fields["dead"] = True
+
+        if section != "international" and header:
+            if "International career" in header.get_text():
+                section = "international"
+                continue
+            if section is None and header.string == "Senior career*":
+                section = "senior"
+                senior_career_parent = row.parent
+                continue
+
+        # the senior section only spans sibling rows, the international one runs to the end
+        if section == "senior" and row.parent is senior_career_parent:
+            senior_career_rows.append(row)
+        elif section == "international":
+            international_career_rows.append(row)
+
+    fields["national_team"] = last_national_team(international_career_rows)
+    fields.update(current_club_from_rows(senior_career_rows))
+    return fields
 
-def is_football_player(soup):
+
+INFOBOX_KEYWORDS = ["football", "soccer", "midfielder", "forward", "defender"]
+
+
+@timed("prefilter")
+def looks_like_player_page(html):
+    """
+    Cheap check on the raw page bytes, run before building a soup.
+    Only rejects pages that is_football_player could never accept: pages
+    without a footballers category and without an infobox vcard holding
+    one of the football keywords.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    lowered = html.lower()
+    if b"footballers" in lowered:
+        return True
+    return b"infobox vcard" in lowered and any(
+        keyword.encode() in lowered for keyword in INFOBOX_KEYWORDS
+    )
+
+
+@timed("extract.is_football_player")
+def is_football_player(soup, infobox=None):
     # check infobox for football related words
-    infobox = soup.find("table", class_="infobox vcard")
+    if infobox is None:
+        infobox = soup.find("table", class_="infobox vcard")
     if infobox and any(
-        keyword in infobox.text.lower()
-        for keyword in ["football", "soccer", "midfielder", "forward", "defender"]
+        keyword in infobox.text.lower() for keyword in INFOBOX_KEYWORDS
     ):
         return True
 
@@ -251,66 +310,110 @@ def is_football_player(soup):
     return False
 
 
-def scrape_player_info(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    if is_football_player(soup):
-        # dictionary to store all player info
-        player_info = {
-            "url": url,
-            "name": None,
-            "full_name": None,
-            "date_of_birth": None,
-            "age": int,
-            "place_of_birth": None,
-            "country_of_birth": None,
-            "positions": None,
-            "current_club": None,
-            "national_team": None,
-            "appearances_current_club": None,
-            "goals_current_club": None,
-            "scraping_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "dead": False,
-        }
-
-        player_info["name"] = remove_text_in_brackets(soup.find("h1").text)
+# restricts parsing to the heading, the infoboxes and the category links
+INFOBOX_ONLY_STRAINER = SoupStrainer(
+    class_=re.compile(r"(^|\s)(firstHeading|infobox|mw-normal-catlinks)(\s|$)")
+)
+
+
+@timed("parse")
+def parse_html(html, infobox_only=False):
+    parse_only = INFOBOX_ONLY_STRAINER if infobox_only else None
+    return BeautifulSoup(html, "html.parser", parse_only=parse_only)
 
-        infobox = soup.find("table", class_="infobox vcard")
-        if infobox:
-            for row in infobox.find_all("tr"):
-                header = row.find("th")
-                data = row.find("td")
-                if header and data:
-                    header_text = header.text.strip()
-                    data_text = clean_text(data.text)
-
-                    if "Full name" in header_text:
-                        player_info["full_name"] = data_text
-                    elif "Date of birth" in header_text:
-                        player_info["date_of_birth"] = extract_date_of_birth(data_text)
-                        player_info["age"] = extract_age(data_text)
-                    elif "Place of birth" in header_text:
-                        place_of_birth, country_of_birth = extract_place_and_country(
-                            data_text
-                        )
-                        player_info["place_of_birth"] = place_of_birth
-                        player_info["country_of_birth"] = country_of_birth
-                    elif "Country" in header_text:
-                        player_info["country_of_birth"] = data_text
-                    elif "Position" in header_text:
-                        player_info["positions"] = data_text
-                    elif "Date of death" in header_text:
-                        player_info["dead"] = True
-        else:
-            text_based_info = scrape_text_based_info(soup)
-            player_info.update(text_based_info)
+
+@timed("page_signature")
+def page_signature(html):
+    """
+    Returns (page_hash, revision_id) of a raw page: a SHA-1 of its bytes and the
+    MediaWiki revision id from the page config, or None when it is missing.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    revision_match = REVISION_ID_REGEX.search(html)
+    revision_id = int(revision_match.group(1)) if revision_match else None
+    return hashlib.sha1(html).hexdigest(), revision_id
+
+
+def is_unchanged(signature, known_signature):
+    """Compares revision ids when both are known, page hashes otherwise."""
+    if known_signature is None:
+        return False
+    page_hash, revision_id = signature
+    known_hash, known_revision_id = known_signature
+    if revision_id is not None and known_revision_id is not None:
+        return revision_id == known_revision_id
+    return page_hash == known_hash
+
+
+@timed("fetch")
+def fetch_page(url, session=None):
+    """
+    Downloads the raw HTML of the page at url.
+    session can be any object with a requests-style get(), e.g. a Fetcher
+    shared between worker threads; defaults to a one-off requests.get.
+    Raises FetchError for error statuses instead of returning an error page.
+    """
+    if session is None:
+        response = requests.get(url, timeout=DEFAULT_TIMEOUT)
+    else:
+        response = session.get(url)
+    if response.status_code >= 400:
+        raise FetchError(f"{url}: HTTP {response.status_code}")
+    return response.content
+
+
+@timed("extract")
+def extract_player_info(url, html, infobox_only=False):
+    """
+    Extracts the player info from already downloaded HTML as a PlayerRecord.
+    Returns None when the page is not a football player.
+    With infobox_only, only the heading, infobox and category subtrees are
+    parsed; the full page is parsed only for the text fallback.
+    """
+    soup = parse_html(html, infobox_only)
+    infobox = soup.find("table", class_="infobox vcard")
+
+    if not is_football_player(soup, infobox):
+        return None
+
+    # dictionary to store all player info
+    player_info = {
+        "url": url,
+        "name": None,
+        "full_name": None,
+        "date_of_birth": None,
+        "age": None,
+        "place_of_birth": None,
+        "country_of_birth": None,
+        "positions": None,
+        "current_club": None,
+        "national_team": None,
+        "appearances_current_club": None,
+        "goals_current_club": None,
+        "scraping_timestamp": datetime.now().replace(microsecond=0),
+        "dead": False,
+        "page_hash": None,
+        "revision_id": None,
+    }
+    player_info["page_hash"], player_info["revision_id"] = page_signature(html)
+
+    player_info["name"] = remove_text_in_brackets(soup.find("h1").text)
+
+    if infobox:
+        player_info.update(walk_infobox(infobox))
+    else:
+        if infobox_only:
+            soup = parse_html(html)
+        text_based_info = scrape_text_based_info(soup)
+        player_info.update(text_based_info)
 
         player_info["national_team"] = find_most_recent_national_team(soup)
         current_club_info = find_current_club_and_stats(soup)
         player_info.update(current_club_info)
 
-        return player_info
+    return PlayerRecord.from_dict(player_info)
 
-    else:
-        pass
+
+def scrape_player_info(url, session=None, infobox_only=False):
+    return extract_player_info(url, fetch_page(url, session), infobox_only)
@@ -4,73 +4,39 @@ from datetime import datetime
 from uuid import uuid4
 import pandas as pd
 
+from columnar import output_format, read_columnar
 from db_manager import DatabaseManager
+from db_writer import to_db_row
+from player_record import PlayerRecord
 from scraper import scrape_player_info
 
 
-def import_scraper_to_db(db_path, output_csv_file_path):
-    db_manager = DatabaseManager(db_path)
+def read_scraper_csv(output_csv_file_path):
+    """Yields a player dict for every row of the scraped_player_data.csv output."""
+    with open(output_csv_file_path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=";")
+
+        for row in reader:
+            yield to_db_row(PlayerRecord.from_dict(row))
 
-    try:
-        with open(output_csv_file_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=";")
 
-            for row in reader:
-                player_data = {
-                    "url": row.get("url"),
-                    "name": row.get("name") if row.get("name", "").strip() else None,
-                    "full_name": (
-                        row.get("full_name")
-                        if row.get("full_name", "").strip()
-                        else None
-                    ),
-                    "date_of_birth": (
-                        row.get("date_of_birth")
-                        if row.get("date_of_birth", "").strip()
-                        else None
-                    ),
-                    "age": row.get("age") if row.get("age", "").strip() else None,
-                    "place_of_birth": (
-                        row.get("place_of_birth")
-                        if row.get("place_of_birth", "").strip()
-                        else None
-                    ),
-                    "country_of_birth": (
-                        row.get("country_of_birth")
-                        if row.get("country_of_birth", "").strip()
-                        else None
-                    ),
-                    "positions": (
-                        row.get("positions")
-                        if row.get("positions", "").strip()
-                        else None
-                    ),
-                    "current_club": (
-                        row.get("current_club")
-                        if row.get("current_club", "").strip()
-                        else None
-                    ),
-                    "national_team": (
-                        row.get("national_team")
-                        if row.get("national_team", "").strip()
-                        else None
-                    ),
-                    "appearances_current_club": (
-                        row.get("appearances_current_club")
-                        if row.get("appearances_current_club", "").strip()
-                        else None
-                    ),
-                    "goals_current_club": (
-                        row.get("goals_current_club")
-                        if row.get("goals_current_club", "").strip()
-                        else None
-                    ),
-                    "scraping_timestamp": row.get("scraping_timestamp"),
-                }
+def read_scraper_output(output_file_path):
+    """Like read_scraper_csv, for CSV, Parquet or Arrow output files."""
+    if output_format(output_file_path) == "csv":
+        return read_scraper_csv(output_file_path)
+    return (to_db_row(player) for player in read_columnar(output_file_path))
 
-                db_manager.insert_or_update_table_from_scraper(player_data)
 
+def import_scraper_to_db(db_path, output_csv_file_path, batch_size=1000):
+    db_manager = DatabaseManager(db_path, bulk_load=True, batch_size=batch_size)
+
+    try:
+        db_manager.bulk_insert_or_update_from_scraper(
+            read_scraper_output(output_csv_file_path)
+        )
+        if db_manager.failed_rows:
+            print(f"{len(db_manager.failed_rows)} rows could not be stored.")
         db_manager.close_connection()
     except Exception as e:
-        print(f"Failed to read the CSV file: {e}")
+        print(f"Failed to import the scraper output file: {e}")
         sys.exit(1)
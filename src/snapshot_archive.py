@@ -0,0 +1,80 @@
+import fcntl
+import mmap
+import os
+import threading
+import zlib
+from pathlib import Path
+
+SEGMENT_FILE = "pages.seg"
+INDEX_FILE = "pages.idx"
+
+
+class SnapshotArchive:
+    """
+    Append-only archive of raw fetched pages.
+    Pages are zlib-compressed into one segment file; an index file holds one
+    "offset<TAB>length<TAB>url" line per page. A page fetched again is simply
+    appended, and readers use its latest entry. Appends hold an exclusive
+    lock on the segment file, so several processes can share an archive.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_path = self.directory / SEGMENT_FILE
+        self.index_path = self.directory / INDEX_FILE
+        self._lock = threading.Lock()
+        self._segment = None
+        self._index = None
+        self._mmap = None
+
+    def append(self, url, html):
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        record = zlib.compress(html)
+        with self._lock:
+            if self._segment is None:
+                self._segment = open(self.segment_path, "ab")
+                self._index = open(self.index_path, "a", encoding="utf-8")
+            # the offset read must still be the end of the file when the
+            # record lands there, also with other processes appending
+            fcntl.flock(self._segment, fcntl.LOCK_EX)
+            try:
+                offset = self._segment.seek(0, os.SEEK_END)
+                self._segment.write(record)
+                # the index entry is written only once its page is in the segment
+                self._segment.flush()
+                self._index.write(f"{offset}\t{len(record)}\t{url}\n")
+                self._index.flush()
+            finally:
+                fcntl.flock(self._segment, fcntl.LOCK_UN)
+
+    def entries(self):
+        """Returns {url: (offset, length)} of the latest snapshot of every page."""
+        latest = {}
+        if not self.index_path.exists():
+            return latest
+        with open(self.index_path, encoding="utf-8") as index_file:
+            for line in index_file:
+                if not line.endswith("\n"):
+                    # an interrupted write leaves at most one partial last line
+                    break
+                offset, length, url = line[:-1].split("\t", 2)
+                latest[url] = (int(offset), int(length))
+        return latest
+
+    def read(self, offset, length):
+        """Returns the raw HTML stored at offset, reading the segment through mmap."""
+        if self._mmap is None or offset + length > len(self._mmap):
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.segment_path, "rb") as segment:
+                self._mmap = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+        return zlib.decompress(self._mmap[offset : offset + length])
+
+    def close(self):
+        with self._lock:
+            for handle in (self._segment, self._index, self._mmap):
+                if handle is not None:
+                    handle.close()
+            self._segment = self._index = self._mmap = None
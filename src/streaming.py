@@ -0,0 +1,132 @@
+import csv
+import json
+import os
+from pathlib import Path
+
+from columnar import ColumnarWriter, output_format
+from player_record import FIELDS
+
+OUTPUT_FIELDS = list(FIELDS)
+
+
+def read_urls(urls_file_path, skip=0):
+    """
+    Lazily yields the URLs of a file with one URL per line, skipping blank
+    lines and the first `skip` URLs.
+    """
+    with open(urls_file_path, newline="", encoding="utf-8") as urls_file:
+        offset = 0
+        for row in csv.reader(urls_file):
+            if not row or not row[0].strip():
+                continue
+            if offset >= skip:
+                yield row[0].strip()
+            offset += 1
+
+
+class Checkpoint:
+    """
+    Remembers how many input URLs are finished and how many bytes of the
+    output file they produced, so a resumed run can drop any partially
+    written rows and continue after the last completed URL.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def load(self):
+        if not self.path.exists():
+            return 0, 0
+        with open(self.path, encoding="utf-8") as checkpoint_file:
+            state = json.load(checkpoint_file)
+        return state["offset"], state["output_size"]
+
+    def save(self, offset, output_size):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump({"offset": offset, "output_size": output_size}, checkpoint_file)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+class StreamingCsvWriter:
+    """
+    Appends scraped rows to the semicolon separated output CSV as they arrive.
+    """
+
+    def __init__(self, output_csv_file_path, truncate_to=None):
+        self.path = Path(output_csv_file_path)
+        mode = "a" if truncate_to is not None else "w"
+        self.file = open(self.path, mode, newline="", encoding="utf-8")
+        if truncate_to is not None:
+            self.file.truncate(truncate_to)
+            self.file.seek(truncate_to)
+        self.writer = csv.DictWriter(
+            self.file, fieldnames=OUTPUT_FIELDS, delimiter=";", extrasaction="ignore"
+        )
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def write(self, player):
+        self.writer.writerow(player.to_row())
+
+    def sync(self):
+        """Flushes written rows to disk and returns the output file size."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def open_output_writer(output_file_path):
+    """
+    Returns a ColumnarWriter for .parquet / .arrow / .feather paths and a
+    StreamingCsvWriter otherwise.
+    """
+    if output_format(output_file_path) == "csv":
+        return StreamingCsvWriter(output_file_path)
+    return ColumnarWriter(output_file_path)
+
+
+def stream_to_csv(
+    urls_file_path, output_csv_file_path, scrape, resume=False, checkpoint_every=100
+):
+    """
+    Streams URLs through scrape(urls) and appends each player row to the
+    output CSV, saving a checkpoint every `checkpoint_every` URLs.
+    With resume, URLs finished by an earlier interrupted run are skipped.
+    Returns the number of URLs processed in this run.
+    """
+    checkpoint = Checkpoint(f"{output_csv_file_path}.checkpoint")
+    offset, output_size = checkpoint.load() if resume else (0, 0)
+    if offset:
+        print(f"Resuming after {offset} already processed URLs.")
+
+    writer = StreamingCsvWriter(
+        output_csv_file_path, truncate_to=output_size if offset else None
+    )
+    processed = 0
+    finished = False
+    try:
+        urls = read_urls(urls_file_path, skip=offset)
+        for player_info in scrape(urls):
+            if player_info is not None:
+                writer.write(player_info)
+            processed += 1
+            if processed % checkpoint_every == 0:
+                checkpoint.save(offset + processed, writer.sync())
+        writer.sync()
+        finished = True
+    finally:
+        if not finished:
+            checkpoint.save(offset + processed, writer.sync())
+        writer.close()
+
+    checkpoint.clear()
+    return processed
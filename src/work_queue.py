@@ -0,0 +1,238 @@
+import argparse
+import sqlite3
+import threading
+import time
+
+from canonical import canonical_url
+from streaming import read_urls
+
+QUEUE_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS queue (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        state TEXT NOT NULL DEFAULT 'pending',
+        worker TEXT,
+        lease_expires REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        finished_at REAL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_queue_state ON queue(state, lease_expires);",
+    """
+    CREATE INDEX IF NOT EXISTS idx_queue_finished ON queue(finished_at)
+    WHERE finished_at IS NOT NULL;
+    """,
+]
+
+STATES = ["pending", "leased", "done", "failed"]
+
+
+class WorkQueue:
+    """
+    URL work queue in a SQLite file that any number of worker processes, or
+    hosts sharing the file, drain together.
+    claim() leases a batch of URLs to one worker inside a write transaction,
+    so no URL is handed out twice; a worker that dies without completing its
+    batch loses the lease after lease_seconds and the URLs are claimed again.
+    A URL whose lease expires max_attempts times is marked failed.
+    """
+
+    def __init__(self, path, lease_seconds=600, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # explicit transactions; wait for other workers' locks instead of failing.
+        # Pipelined runs claim from the fetch thread and complete from the
+        # main thread, so the connection is shared under a lock.
+        self.conn = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        for sql in QUEUE_SCHEMA_SQL:
+            self.conn.execute(sql)
+
+    def _transaction(self, statements):
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(cursor)
+                cursor.execute("COMMIT")
+                return result
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def add(self, urls, batch_size=1000):
+        """
+        Enqueues the canonical form of URLs not already in the queue.
+        Returns how many were added.
+        """
+        added = 0
+        batch = []
+        for url in urls:
+            batch.append((canonical_url(url),))
+            if len(batch) >= batch_size:
+                added += self._add_batch(batch)
+                batch = []
+        if batch:
+            added += self._add_batch(batch)
+        return added
+
+    def _add_batch(self, batch):
+        def insert(cursor):
+            before = self.conn.total_changes
+            cursor.executemany("INSERT OR IGNORE INTO queue(url) VALUES (?)", batch)
+            return self.conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def claim(self, worker, batch_size=50):
+        """Leases up to batch_size URLs to worker, expired leases first."""
+
+        def lease(cursor):
+            now = time.time()
+            cursor.execute(
+                "UPDATE queue SET state = 'failed', finished_at = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            rows = cursor.execute(
+                "SELECT id, url FROM queue WHERE state = 'leased' AND lease_expires < ? "
+                "ORDER BY lease_expires LIMIT ?",
+                (now, batch_size),
+            ).fetchall()
+            if len(rows) < batch_size:
+                rows += cursor.execute(
+                    "SELECT id, url FROM queue WHERE state = 'pending' ORDER BY id LIMIT ?",
+                    (batch_size - len(rows),),
+                ).fetchall()
+            cursor.executemany(
+                "UPDATE queue SET state = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(worker, now + self.lease_seconds, row_id) for row_id, _ in rows],
+            )
+            return [url for _, url in rows]
+
+        return self._transaction(lease)
+
+    def complete(self, urls, worker):
+        """Marks URLs done, unless their lease has since passed to another worker."""
+        now = time.time()
+        self._transaction(
+            lambda cursor: cursor.executemany(
+                "UPDATE queue SET state = 'done', finished_at = ?, lease_expires = NULL "
+                "WHERE url = ? AND state = 'leased' AND worker = ?",
+                [(now, url, worker) for url in urls],
+            )
+        )
+
+    def renew(self, worker):
+        """Extends every live lease of worker by another lease_seconds."""
+        now = time.time()
+        self._transaction(
+            lambda cursor: cursor.execute(
+                "UPDATE queue SET lease_expires = ? "
+                "WHERE state = 'leased' AND worker = ? AND lease_expires >= ?",
+                (now + self.lease_seconds, worker, now),
+            )
+        )
+
+    def release(self, urls, worker):
+        """
+        Returns URLs that could not be processed to the queue for another try,
+        or marks them failed once they have used up max_attempts.
+        """
+        now = time.time()
+        self._transaction(
+            lambda cursor: cursor.executemany(
+                "UPDATE queue SET "
+                "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "finished_at = CASE WHEN attempts >= ? THEN ? END, "
+                "lease_expires = NULL "
+                "WHERE url = ? AND state = 'leased' AND worker = ?",
+                [
+                    (self.max_attempts, self.max_attempts, now, url, worker)
+                    for url in urls
+                ],
+            )
+        )
+
+    def status(self, window_seconds=600):
+        """
+        Returns the number of URLs in each state, the leases that have expired,
+        the workers holding live leases and the URLs finished per minute over
+        the last window_seconds.
+        """
+        now = time.time()
+        counts = dict.fromkeys(STATES, 0)
+        with self._lock:
+            counts.update(
+                self.conn.execute("SELECT state, COUNT(*) FROM queue GROUP BY state")
+            )
+            expired, workers = self.conn.execute(
+                "SELECT SUM(lease_expires < ?), COUNT(DISTINCT CASE WHEN lease_expires >= ? "
+                "THEN worker END) FROM queue WHERE state = 'leased'",
+                (now, now),
+            ).fetchone()
+            (finished,) = self.conn.execute(
+                "SELECT COUNT(*) FROM queue WHERE finished_at >= ?",
+                (now - window_seconds,),
+            ).fetchone()
+        return {
+            **counts,
+            "expired_leases": expired or 0,
+            "active_workers": workers,
+            "per_minute": finished * 60 / window_seconds,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def print_status(work_queue):
+    status = work_queue.status()
+    total = sum(status[state] for state in STATES)
+    print(
+        f"{total} URLs: {status['pending']} pending, {status['leased']} leased "
+        f"({status['expired_leases']} expired), {status['done']} done, "
+        f"{status['failed']} failed"
+    )
+    print(
+        f"{status['active_workers']} active workers, "
+        f"{status['per_minute']:.1f} URLs/min over the last 10 minutes"
+    )
+    remaining = status["pending"] + status["leased"]
+    if status["per_minute"] and remaining:
+        print(f"about {remaining / status['per_minute']:.0f} minutes left")
+
+
+def main(command, queue_path="../data/queue.sqlite", urls_file_path=None):
+    work_queue = WorkQueue(queue_path)
+    try:
+        if command == "add":
+            added = work_queue.add(read_urls(urls_file_path))
+            print(f"Added {added} new URLs to {queue_path}")
+        print_status(work_queue)
+    finally:
+        work_queue.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fill the shared URL work queue or show its progress."
+    )
+    parser.add_argument("command", choices=["add", "status"])
+    parser.add_argument(
+        "urls_file_path", metavar="urls_file", nargs="?", help="URLs to add"
+    )
+    parser.add_argument("--queue", dest="queue_path", default="../data/queue.sqlite")
+    args = parser.parse_args(argv)
+    if args.command == "add" and not args.urls_file_path:
+        parser.error("add needs a urls_file")
+    return args
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
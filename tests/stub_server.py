@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+from collections import Counter
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from bs4 import BeautifulSoup
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+PAGES_DIR = FIXTURES_DIR / "pages"
+# a player, a non-player and a player without an infobox
+PAGES = ["Kostas_Tsimikas.html", "Anfield.html", "Mohamed_Abou_Gabal.html"]
+
+
+def without_timestamp(player_data):
+    """Returns the fields of a PlayerRecord except the time it was scraped at."""
+    if player_data is None:
+        return None
+    return {k: v for k, v in player_data.to_dict().items() if k != "scraping_timestamp"}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def throttling_handler(failures=1, status=429, retry_after=None, delay=0):
+    """
+    Returns a handler class that answers the first `failures` requests for each
+    path with `status` (and Retry-After, if given), and delays every response
+    by `delay` seconds. Its `requests` Counter records hits per path.
+    """
+
+    class ThrottlingHandler(QuietHandler):
+        requests = Counter()
+        lock = threading.Lock()
+
+        def do_GET(self):
+            with self.lock:
+                self.requests[self.path] += 1
+                throttled = self.requests[self.path] <= failures
+            if delay:
+                time.sleep(delay)
+            if not throttled:
+                return super().do_GET()
+            self.send_response(status)
+            if retry_after is not None:
+                self.send_header("Retry-After", str(retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    return ThrottlingHandler
+
+
+def mediawiki_api_handler(pages, redirects=None, categories_per_response=4):
+    """
+    Returns a handler class answering /w/api.php query and parse calls with
+    canned responses. pages maps titles to {"revid", "categories", "file"}
+    and optionally "templates", file being a saved page under PAGES_DIR whose
+    content parse returns;
+    redirects maps titles to their targets. Categories are split across
+    continued responses like the real API's limits do. Its `requests` Counter
+    records calls per action.
+    """
+    by_revid = {page["revid"]: title for title, page in pages.items()}
+    redirects = redirects or {}
+
+    class MediaWikiApiHandler(QuietHandler):
+        requests = Counter()
+        lock = threading.Lock()
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            action = params.get("action")
+            with self.lock:
+                self.requests[action] += 1
+            if parts.path != "/w/api.php":
+                return super().do_GET()
+            if action == "query":
+                body = self.query(params)
+            elif action == "parse":
+                body = self.parse(params)
+            else:
+                body = {"error": {"code": "badvalue", "info": f"unknown action {action}"}}
+            content = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def query(self, params):
+            titles = params["titles"].split("|")
+            if len(titles) > 50:
+                return {"error": {"code": "toomanyvalues", "info": "too many titles"}}
+            offset = int(params.get("clcontinue", 0))
+            normalized, redirected, entries = [], [], []
+            categories = []
+            for title in titles:
+                if "_" in title:
+                    normalized.append({"from": title, "to": title.replace("_", " ")})
+                    title = title.replace("_", " ")
+                if title in redirects:
+                    redirected.append({"from": title, "to": redirects[title]})
+                    title = redirects[title]
+                page = pages.get(title)
+                if page is None:
+                    entries.append({"title": title, "missing": True})
+                    continue
+                entry = {"title": title, "pageid": page["revid"]}
+                if not offset:
+                    entry["revisions"] = [{"revid": page["revid"]}]
+                    wanted = params.get("tltemplates", "").split("|")
+                    templates = [t for t in page.get("templates", []) if t in wanted]
+                    if templates:
+                        entry["templates"] = [{"ns": 10, "title": t} for t in templates]
+                entries.append(entry)
+                categories += [(entry, category) for category in page["categories"]]
+
+            window = categories[offset : offset + categories_per_response]
+            for entry, category in window:
+                entry.setdefault("categories", []).append({"ns": 14, "title": category})
+            body = {"query": {"normalized": normalized, "redirects": redirected, "pages": entries}}
+            if offset + categories_per_response < len(categories):
+                body["continue"] = {
+                    "clcontinue": str(offset + categories_per_response),
+                    "continue": "||revisions",
+                }
+            return body
+
+        def parse(self, params):
+            title = by_revid[int(params["oldid"])]
+            html = (PAGES_DIR / pages[title]["file"]).read_text(encoding="utf-8")
+            content = BeautifulSoup(html, "html.parser").find("div", class_="mw-parser-output")
+            return {"parse": {"title": title, "revid": int(params["oldid"]), "text": str(content)}}
+
+    return MediaWikiApiHandler
+
+
+class StubServer:
+    """
+    Serves files from a local directory on a random port for offline tests.
+    """
+
+    def __init__(self, directory=PAGES_DIR, handler_class=QuietHandler):
+        handler = partial(handler_class, directory=str(directory))
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
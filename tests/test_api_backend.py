@@ -0,0 +1,121 @@
+import unittest
+from collections import Counter
+
+from api_backend import ApiBackend
+from pipeline import scrape_all, scrape_all_pipelined
+from scraper import extract_player_info
+from stub_server import PAGES_DIR, StubServer, mediawiki_api_handler
+
+PAGES = {
+    "Kostas Tsimikas": {
+        "revid": 1001,
+        "categories": [
+            "Category:1996 births",
+            "Category:Greek footballers",
+            "Category:Liverpool F.C. players",
+        ],
+        "file": "Kostas_Tsimikas.html",
+    },
+    "Mohamed Abou Gabal": {
+        "revid": 1002,
+        "categories": ["Category:Egyptian footballers", "Category:Zamalek SC players"],
+        "file": "Mohamed_Abou_Gabal.html",
+    },
+    "Anfield": {
+        "revid": 1003,
+        "categories": ["Category:Liverpool F.C.", "Category:Football venues in England"],
+        "file": "Anfield.html",
+    },
+    # a player outside every footballers category, found by his infobox
+    "Lefteris Stamos": {
+        "revid": 1005,
+        "categories": [
+            "Category:1999 births",
+            "Category:Living people",
+            "Category:Panionios F.C. players",
+        ],
+        "templates": ["Template:Infobox football biography"],
+        "file": "Lefteris_Stamos.html",
+    },
+    "Juan Pérez (footballer)": {
+        "revid": 1004,
+        "categories": ["Category:Argentine footballers"],
+        "file": "Juan_Perez_footballer.html",
+    },
+}
+
+
+class TestApiBackend(unittest.TestCase):
+    def setUp(self):
+        self.handler = mediawiki_api_handler(PAGES, redirects={"Tsimikas": "Kostas Tsimikas"})
+
+    def test_pages_come_from_batched_queries(self):
+        with StubServer(handler_class=self.handler) as server:
+            urls = [
+                server.url(f"wiki/{title}")
+                for title in [
+                    "Kostas_Tsimikas",
+                    "Mohamed_Abou_Gabal",
+                    "Anfield",
+                    "Juan_Pérez_(footballer)",
+                    "Tsimikas",
+                    "No_such_page",
+                ]
+            ]
+            backend = ApiBackend()
+            stats = Counter()
+            results = list(scrape_all(urls, stats=stats, backend=backend))
+
+        kostas = results[0]
+        html = (PAGES_DIR / "Kostas_Tsimikas.html").read_bytes()
+        expected = extract_player_info(urls[0], html)
+        for field in ["name", "full_name", "date_of_birth", "current_club", "national_team"]:
+            self.assertEqual(getattr(kostas, field), getattr(expected, field))
+        self.assertEqual(kostas.revision_id, 1001)
+        self.assertEqual(results[1].revision_id, 1002)
+        self.assertEqual(results[3].name, "Juan Pérez")
+        self.assertEqual(
+            stats,
+            Counter(players=3, prefiltered=1, duplicate=1, failed=1),
+        )
+        # one query for all titles, continued until every category is listed;
+        # no render for Anfield, the full page for Juan Pérez, who has no infobox
+        self.assertEqual(backend.queries, 3)
+        self.assertEqual(self.handler.requests["query"], 3)
+        self.assertEqual(self.handler.requests["parse"], 5)
+
+    def test_unchanged_revisions_are_not_rendered(self):
+        with StubServer(handler_class=self.handler) as server:
+            urls = [server.url("wiki/Kostas_Tsimikas"), server.url("wiki/Mohamed_Abou_Gabal")]
+            known_pages = {urls[0]: ("old page hash", 1001)}
+            stats = Counter()
+            results = list(
+                scrape_all_pipelined(
+                    urls,
+                    parse_workers=1,
+                    stats=stats,
+                    known_pages=known_pages,
+                    backend=ApiBackend(batch_size=1),
+                )
+            )
+
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1].name, "Mohamed Abou Gabal")
+        self.assertEqual(stats, Counter(unchanged=1, players=1))
+        self.assertEqual(self.handler.requests, Counter(query=2, parse=1))
+
+    def test_player_without_footballers_category_matches_html_backend(self):
+        with StubServer(handler_class=self.handler) as server:
+            urls = [server.url("wiki/Lefteris_Stamos")]
+            (player,) = scrape_all(urls, backend=ApiBackend())
+
+        html = (PAGES_DIR / "Lefteris_Stamos.html").read_bytes()
+        expected = extract_player_info(urls[0], html)
+        self.assertIsNotNone(player)
+        for field in ["name", "date_of_birth", "positions", "current_club"]:
+            self.assertEqual(getattr(player, field), getattr(expected, field))
+        self.assertEqual(player.positions, "Defender")
+
+
+if __name__ == "__main__":
+    unittest.main()
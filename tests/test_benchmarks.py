@@ -0,0 +1,80 @@
+import io
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from run_benchmarks import compare_results, fetch_corpus, load_corpus, main, run_benchmarks
+from stub_server import PAGES_DIR, StubServer
+
+QUERIES_DIR = Path(__file__).resolve().parent.parent / "sql_queries"
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_small_run_reports_every_metric(self):
+        results = run_benchmarks(
+            PAGES_DIR, QUERIES_DIR, min_time=0, import_rows=50, query_rows=200, repeat=1
+        )
+
+        metrics = results["metrics"]
+        self.assertIn("extraction.full.pages_per_sec", metrics)
+        self.assertIn("import.scraper_update.rows_per_sec", metrics)
+        self.assertIn("query.sql_query3.median_ms", metrics)
+        self.assertTrue(all(value > 0 for value in metrics.values()))
+
+    def test_empty_corpus_falls_back_to_test_pages_with_warning(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = Path(tmp_dir) / "results.json"
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                main(
+                    corpus_dir=Path(tmp_dir) / "missing",
+                    queries_dir=QUERIES_DIR,
+                    output_path=output_path,
+                    min_time=0,
+                    import_rows=50,
+                    query_rows=200,
+                    repeat=1,
+                )
+
+            results = json.loads(output_path.read_text(encoding="utf-8"))
+        self.assertIn("Warning: no saved pages", stdout.getvalue())
+        self.assertEqual(results["config"]["corpus_pages"], len(load_corpus(PAGES_DIR)))
+
+    def test_fetch_corpus_saves_each_page_once(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, StubServer() as server:
+            urls_file = Path(tmp_dir) / "urls.csv"
+            urls_file.write_text(
+                f"{server.url('Anfield.html')}\n{server.url('Kostas_Tsimikas.html')}\n",
+                encoding="utf-8",
+            )
+            corpus_dir = Path(tmp_dir) / "pages"
+
+            self.assertEqual(fetch_corpus(urls_file, corpus_dir), 2)
+            self.assertEqual(fetch_corpus(urls_file, corpus_dir), 0)
+            self.assertEqual(
+                [name for name, _ in load_corpus(corpus_dir)], ["Anfield", "Kostas_Tsimikas"]
+            )
+
+    def test_compare_flags_only_slowdowns_beyond_threshold(self):
+        baseline = {"metrics": {"a.pages_per_sec": 100.0, "b.median_ms": 10.0}}
+        current = {"metrics": {"a.pages_per_sec": 70.0, "b.median_ms": 11.0}}
+
+        regressions = compare_results(baseline, current, max_slowdown=0.2)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("a.pages_per_sec"))
+        self.assertEqual(
+            compare_results(
+                baseline, current, max_slowdown=0.2, thresholds={"a.pages_per_sec": 0.5}
+            ),
+            [],
+        )
+        self.assertEqual(
+            len(compare_results(baseline, current, max_slowdown=0.05)), 2
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from pathlib import Path
+
+from canonical import Canonicalizer, RedirectMap, canonical_url
+from pipeline import scrape_all
+from stub_server import PAGES_DIR, StubServer, throttling_handler
+
+
+class TestCanonical(unittest.TestCase):
+    def test_canonical_url(self):
+        canonical = "https://en.wikipedia.org/wiki/Luis_Miguel_Rodr%C3%ADguez_(footballer)"
+        variants = [
+            canonical,
+            "http://en.wikipedia.org/wiki/Luis_Miguel_Rodríguez_(footballer)",
+            "https://EN.m.wikipedia.org/wiki/Luis_Miguel_Rodr%C3%ADguez_%28footballer%29",
+            "https://en.wikipedia.org/wiki/luis Miguel Rodríguez (footballer)#Career",
+            "https://en.wikipedia.org/w/index.php?title=Luis_Miguel_Rodríguez_(footballer)",
+        ]
+        for url in variants:
+            with self.subTest(url=url):
+                self.assertEqual(canonical_url(url), canonical)
+
+        self.assertEqual(
+            canonical_url("https://en.wikipedia.org/wiki/Marcelo_(footballer%2C_born_1988)"),
+            "https://en.wikipedia.org/wiki/Marcelo_(footballer,_born_1988)",
+        )
+        self.assertEqual(
+            canonical_url("http://127.0.0.1:8000/page.html?n=1#top"),
+            "http://127.0.0.1:8000/page.html?n=1",
+        )
+
+    def test_variants_collapse_before_fetching(self):
+        canonicalizer = Canonicalizer()
+        urls = [
+            "https://en.wikipedia.org/wiki/Kostas_Tsimikas",
+            "https://en.m.wikipedia.org/wiki/Kostas_Tsimikas#Career",
+            "https://en.wikipedia.org/wiki/Marc_Cucurella",
+        ]
+
+        self.assertEqual(
+            list(canonicalizer.admit(urls)), [urls[0], None, urls[2]]
+        )
+
+    def test_redirects_are_learned_and_persisted(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pages_dir = Path(tmp_dir) / "pages"
+            pages_dir.mkdir()
+            shutil.copy(PAGES_DIR / "Kostas_Tsimikas.html", pages_dir)
+            redirects_path = Path(tmp_dir) / "redirects.sqlite"
+            handler = throttling_handler(failures=0)
+
+            with StubServer(pages_dir, handler_class=handler) as server:
+                target = server.url("Kostas_Tsimikas.html")
+                # an alias serves the target page, which names its canonical URL
+                html = (PAGES_DIR / "Kostas_Tsimikas.html").read_text(encoding="utf-8")
+                (pages_dir / "Tsimikas.html").write_text(
+                    html.replace(
+                        "<head>", f'<head><link rel="canonical" href="{target}">', 1
+                    ),
+                    encoding="utf-8",
+                )
+                alias = server.url("Tsimikas.html")
+
+                stats = Counter()
+                redirects = RedirectMap(redirects_path)
+                results = list(
+                    scrape_all(
+                        [alias, target, alias],
+                        stats=stats,
+                        canonicalizer=Canonicalizer(redirects),
+                    )
+                )
+                redirects.close()
+
+                self.assertEqual(results[0].url, target)
+                self.assertEqual(results[1:], [None, None])
+                self.assertEqual(stats["duplicate"], 2)
+                self.assertEqual(handler.requests, {"/Tsimikas.html": 1})
+
+                # a later run goes straight to the canonical page
+                redirects = RedirectMap(redirects_path)
+                list(scrape_all([alias], canonicalizer=Canonicalizer(redirects)))
+                redirects.close()
+                self.assertEqual(
+                    handler.requests, {"/Tsimikas.html": 1, "/Kostas_Tsimikas.html": 1}
+                )
+
+    def test_duplicate_aliases_do_not_deadlock_concurrent_fetches(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pages_dir = Path(tmp_dir)
+            html = (PAGES_DIR / "Kostas_Tsimikas.html").read_text(encoding="utf-8")
+            with StubServer(pages_dir) as server:
+                aliases = []
+                for index in range(4):
+                    target = server.url(f"Target_{index}.html")
+                    (pages_dir / f"Alias_{index}.html").write_text(
+                        html.replace(
+                            "<head>", f'<head><link rel="canonical" href="{target}">', 1
+                        ),
+                        encoding="utf-8",
+                    )
+                    aliases.append(server.url(f"Alias_{index}.html"))
+
+                results = []
+                thread = threading.Thread(
+                    target=lambda: results.extend(
+                        scrape_all(
+                            [url for url in aliases for _ in range(2)],
+                            concurrency=2,
+                            canonicalizer=Canonicalizer(),
+                        )
+                    ),
+                    daemon=True,
+                )
+                thread.start()
+                thread.join(timeout=30)
+
+                self.assertFalse(thread.is_alive())
+                self.assertEqual(len(results), 8)
+                self.assertEqual(sum(result is not None for result in results), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from pathlib import Path
+
+from canonical import Canonicalizer
+from crawler import BloomFilter, CrawlState, Crawler
+from pipeline import scrape_all
+from stub_server import PAGES_DIR, StubServer, throttling_handler
+
+CATEGORY_PAGE = """<html><body>
+<div id="mw-subcategories"><a href="/wiki/Category:Greek_footballers">Greek footballers</a></div>
+<div id="mw-pages">
+  <a href="/wiki/Kostas_Tsimikas">Kostas Tsimikas</a>
+  <a href="/wiki/Mohamed_Abou_Gabal">Mohamed Abou Gabal</a>
+  <a href="/wiki/Anfield">Anfield</a>
+  <a href="/wiki/Kostas_Tsimikas#Career">Kostas Tsimikas</a>
+</div>
+<a href="/wiki/Help:Category">Help</a>
+<a href="https://example.org/wiki/Elsewhere">Elsewhere</a>
+</body></html>"""
+
+SUBCATEGORY_PAGE = """<html><body>
+<div id="mw-subcategories"><a href="/wiki/Category:Greek_goalkeepers">Goalkeepers</a></div>
+<div id="mw-pages"><a href="/wiki/Juan_Perez_footballer">Juan Perez</a></div>
+</body></html>"""
+
+
+class TestCrawler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        wiki_dir = Path(self.tmp_dir.name) / "wiki"
+        wiki_dir.mkdir()
+        for page in PAGES_DIR.glob("*.html"):
+            shutil.copy(page, wiki_dir / page.stem)
+        (wiki_dir / "Category:Footballers").write_text(CATEGORY_PAGE, encoding="utf-8")
+        (wiki_dir / "Category:Greek_footballers").write_text(
+            SUBCATEGORY_PAGE, encoding="utf-8"
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_crawl_feeds_candidates_to_the_scraper(self):
+        handler = throttling_handler(failures=0)
+        with StubServer(self.tmp_dir.name, handler_class=handler) as server:
+            crawler = Crawler(CrawlState(), max_depth=1)
+            stats = Counter()
+            results = list(
+                scrape_all(
+                    crawler.crawl([server.url("wiki/Category:Footballers")]),
+                    stats=stats,
+                    canonicalizer=Canonicalizer(dedupe=False),
+                )
+            )
+
+        names = {result.name for result in results if result}
+        self.assertIn("Kostas Tsimikas", names)
+        self.assertIn("Mohamed Abou Gabal", names)
+        self.assertEqual(crawler.hubs_fetched, 2)
+        self.assertEqual(crawler.candidates, 4)
+        self.assertEqual(stats["players"], 3)
+        self.assertEqual(sum(stats.values()), 4)
+        # every page fetched once; the goalkeepers subcategory is beyond max_depth
+        self.assertEqual(set(handler.requests.values()), {1})
+        self.assertNotIn("/wiki/Category:Greek_goalkeepers", handler.requests)
+
+    def test_max_pages_and_resume(self):
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_path = Path(state_dir) / "crawl.sqlite"
+            with StubServer(self.tmp_dir.name) as server:
+                seed = server.url("wiki/Category:Footballers")
+                crawler = Crawler(CrawlState(state_path), max_depth=0, max_pages=2)
+                first = list(crawler.crawl([seed]))
+                crawler.state.close()
+
+                # a second run continues the frontier and skips what it has seen,
+                # crawling on another thread like a pipelined run's fetch thread
+                crawler = Crawler(CrawlState(state_path), max_depth=0)
+                rest = []
+                thread = threading.Thread(target=lambda: rest.extend(crawler.crawl([seed])))
+                thread.start()
+                thread.join()
+                self.assertEqual(len(crawler.state), 0)
+                crawler.state.close()
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(rest), 1)
+        self.assertEqual(len(set(first + rest)), 3)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        items = [f"https://en.wikipedia.org/wiki/Player_{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f"other_{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from csv_importer import import_csv_to_db
+from db_manager import DatabaseManager
+
+HEADER = (
+    "﻿Name;Full name;Date of birth;Age;City of birth;Country of birth;Position;"
+    "Current club;National_team;Dead;No data;PlayerID;URL"
+)
+ROWS = [
+    "Kostas Tsimikas;Konstantinos Tsimikas;12.6.1996;26;Thessaloniki;Greece;Left-back;"
+    "Liverpool F.C.;Greece;0;0;id-1;https://en.wikipedia.org/wiki/Kostas_Tsimikas",
+    "Ederson; ;17 August 1993;n/a;Osasco;Brazil;Goalkeeper;Manchester City F.C.;;0;0;id-2;"
+    "https://en.m.wikipedia.org/wiki/Ederson_(footballer,_born_1993)#Career",
+    "Nobody;;31.2.1990;;;;;;;0;0;;https://en.wikipedia.org/wiki/Marcelo_(footballer%2C_born_1988)",
+]
+
+
+class TestCsvImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp_dir.name)
+        self.csv_path = tmp / "playersData.csv"
+        self.csv_path.write_text("\n".join([HEADER] + ROWS) + "\n", encoding="utf-8")
+        self.db_path = str(tmp / "players.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT player_id, url, name, full_name, date_of_birth, age, "
+            "national_team FROM players ORDER BY url"
+        ).fetchall()
+        conn.close()
+        return rows
+
+    def test_columns_are_normalized_in_chunks(self):
+        import_csv_to_db(self.db_path, self.csv_path, chunk_size=2)
+
+        ederson, kostas, nobody = self.load()
+        self.assertEqual(
+            kostas,
+            (
+                "id-1",
+                "https://en.wikipedia.org/wiki/Kostas_Tsimikas",
+                "Kostas Tsimikas",
+                "Konstantinos Tsimikas",
+                "1996-06-12",
+                26,
+                "Greece",
+            ),
+        )
+        self.assertEqual(
+            ederson,
+            (
+                "id-2",
+                "https://en.wikipedia.org/wiki/Ederson_(footballer,_born_1993)",
+                "Ederson",
+                None,
+                "1993-08-17",
+                None,
+                None,
+            ),
+        )
+        self.assertEqual(nobody[1], "https://en.wikipedia.org/wiki/Marcelo_(footballer,_born_1988)")
+        # an impossible date is kept as given, a missing PlayerID gets a UUID
+        self.assertEqual(nobody[4], "31.2.1990")
+        self.assertEqual(len(nobody[0]), 36)
+
+    def test_reimport_updates_rows(self):
+        import_csv_to_db(self.db_path, self.csv_path)
+        import_csv_to_db(self.db_path, self.csv_path)
+
+        self.assertEqual(len(self.load()), 3)
+
+    def test_search_index_is_rebuilt_after_import(self):
+        import_csv_to_db(self.db_path, self.csv_path, chunk_size=2)
+
+        db_manager = DatabaseManager(self.db_path)
+        names = [player.name for player in db_manager.search("konstantinos")]
+        db_manager.close_connection()
+        self.assertEqual(names, ["Kostas Tsimikas"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from datetime import date
+
+from dates import age_from_iso, normalize_date, parse_age
+
+
+class TestDates(unittest.TestCase):
+    def test_normalize_date_formats(self):
+        cases = {
+            "(1996-06-12) 12 June 1996 (age\xa027)": "1996-06-12",
+            "12 June 1996": "1996-06-12",
+            "June 12, 1996": "1996-06-12",
+            "12.6.1996": "1996-06-12",
+            "29.1.1989": "1989-01-29",
+            "30 February 1990": None,
+            "unknown": None,
+            "": None,
+        }
+        for raw, expected in cases.items():
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_date(raw), expected)
+
+    def test_invalid_date_falls_through_to_next_format(self):
+        self.assertEqual(normalize_date("12 Foo 1990, May 3, 1991"), "1991-05-03")
+
+    def test_age(self):
+        self.assertEqual(age_from_iso("1996-06-12", today=date(2023, 6, 11)), 26)
+        self.assertEqual(age_from_iso("1996-06-12", today=date(2023, 6, 12)), 27)
+        self.assertEqual(parse_age("12 June 1996 (age\xa027)"), 27)
+        self.assertIsNone(parse_age("unknown"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+import unittest
+from pathlib import Path
+
+from db_manager import DatabaseManager
+from run_queries import load_queries, query_plan
+
+QUERIES_DIR = Path(__file__).resolve().parent.parent / "sql_queries"
+
+FIELDS = [
+    "player_id",
+    "url",
+    "name",
+    "full_name",
+    "date_of_birth",
+    "age",
+    "place_of_birth",
+    "country_of_birth",
+    "positions",
+    "current_club",
+    "national_team",
+    "appearances_current_club",
+    "goals_current_club",
+    "scraping_timestamp",
+    "page_hash",
+    "revision_id",
+]
+
+
+def make_player(index, **overrides):
+    player_data = dict.fromkeys(FIELDS)
+    player_data.update(
+        player_id=f"id-{index}",
+        url=f"https://en.wikipedia.org/wiki/Player_{index}",
+        name=f"Player {index}",
+        age=20 + index % 15,
+        current_club=f"Club {index % 7}",
+        positions="Goalkeeper",
+        appearances_current_club=index % 50,
+        goals_current_club=index % 5,
+    )
+    player_data.update(overrides)
+    return player_data
+
+
+class TestDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager(":memory:", bulk_load=True, batch_size=7)
+        self.db_manager.create_table()
+
+    def tearDown(self):
+        self.db_manager.close_connection()
+
+    def fetch_all(self, sql, params=()):
+        return self.db_manager.conn.execute(sql, params).fetchall()
+
+    def test_bulk_csv_import_inserts_every_row(self):
+        count = self.db_manager.bulk_insert_or_update_from_csv(
+            make_player(i) for i in range(50)
+        )
+
+        self.assertEqual(count, 50)
+        self.assertEqual(self.fetch_all("SELECT COUNT(*) FROM players"), [(50,)])
+
+    def test_bulk_scraper_import_keeps_existing_player_id(self):
+        self.db_manager.bulk_insert_or_update_from_csv(
+            make_player(i) for i in range(10)
+        )
+
+        scraped = [
+            make_player(i, player_id=None, current_club="Liverpool")
+            for i in range(5, 15)
+        ]
+        self.db_manager.bulk_insert_or_update_from_scraper(scraped)
+
+        rows = self.fetch_all(
+            "SELECT player_id, current_club FROM players WHERE url = ?",
+            (make_player(5)["url"],),
+        )
+        self.assertEqual(rows, [("id-5", "Liverpool")])
+        self.assertEqual(self.fetch_all("SELECT COUNT(*) FROM players"), [(15,)])
+        self.assertEqual(
+            self.fetch_all("SELECT COUNT(*) FROM players WHERE player_id IS NULL"),
+            [(0,)],
+        )
+
+    def test_player_ids_resolved_with_one_lookup_per_batch(self):
+        self.db_manager.bulk_insert_or_update_from_csv(
+            make_player(i) for i in range(10)
+        )
+        statements = []
+        self.db_manager.conn.set_trace_callback(statements.append)
+
+        self.db_manager.bulk_insert_or_update_from_scraper(
+            make_player(i, player_id=None) for i in range(14)
+        )
+
+        lookups = [sql for sql in statements if sql.startswith("SELECT url")]
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(
+            self.fetch_all(
+                "SELECT player_id FROM players WHERE url = ?",
+                (make_player(3)["url"],),
+            ),
+            [("id-3",)],
+        )
+
+    def test_bad_row_skips_only_itself(self):
+        self.db_manager.bulk_insert_or_update_from_csv([make_player(1)])
+        notified = []
+        self.db_manager.write_listeners.append(notified.extend)
+
+        # id-1 is already taken by another URL
+        clash = make_player(1, url="https://en.wikipedia.org/wiki/Someone_else")
+        count = self.db_manager.bulk_insert_or_update_from_csv(
+            [make_player(2), clash, make_player(3)]
+        )
+
+        self.assertEqual(count, 2)
+        self.assertEqual([row["player_id"] for row in notified], ["id-2", "id-3"])
+        self.assertEqual([url for url, _ in self.db_manager.failed_rows], [clash["url"]])
+        self.assertEqual(self.fetch_all("SELECT COUNT(*) FROM players"), [(3,)])
+
+    def test_stored_queries_use_indexes(self):
+        queries = dict(load_queries(QUERIES_DIR))
+
+        club_plan = " ".join(query_plan(self.db_manager.conn, queries["sql_query2"]))
+        rank_plan = " ".join(query_plan(self.db_manager.conn, queries["sql_query3"]))
+
+        self.assertIn("COVERING INDEX idx_players_club", club_plan)
+        self.assertIn("idx_players_position_age_apps", rank_plan)
+
+    def test_analyze_runs_only_when_indexes_are_created(self):
+        statements = []
+        self.db_manager.conn.set_trace_callback(statements.append)
+
+        self.db_manager.create_table()
+        self.assertFalse([sql for sql in statements if "ANALYZE" in sql])
+
+        self.db_manager.create_indexes(analyze=True)
+        self.assertEqual([sql for sql in statements if "ANALYZE" in sql], ["ANALYZE players;"])
+
+    def test_club_stats_follow_inserts_updates_and_deletes(self):
+        self.db_manager.bulk_insert_or_update_from_csv(
+            make_player(i) for i in range(30)
+        )
+        self.db_manager.bulk_insert_or_update_from_scraper(
+            [
+                make_player(3, current_club="Liverpool", age=None),
+                make_player(4, current_club=None),
+                make_player(40, current_club="Liverpool"),
+            ]
+        )
+        self.db_manager._execute_sql(
+            "DELETE FROM players WHERE url = ?", (make_player(5)["url"],)
+        )
+
+        self.assertEqual(self.db_manager.check_club_stats(), [])
+        queries = dict(load_queries(QUERIES_DIR))
+        expected = self.fetch_all(queries["sql_query2"])
+        self.assertEqual(
+            sorted(self.db_manager.get_club_stats(), key=str), sorted(expected, key=str)
+        )
+
+    def test_rebuild_club_stats_repairs_drift(self):
+        self.db_manager.bulk_insert_or_update_from_csv(
+            make_player(i) for i in range(10)
+        )
+        self.db_manager._execute_sql("UPDATE club_stats SET player_count = 99;")
+        self.assertNotEqual(self.db_manager.check_club_stats(), [])
+
+        self.db_manager.rebuild_club_stats()
+
+        self.assertEqual(self.db_manager.check_club_stats(), [])
+
+    def test_unchanged_scraper_rows_are_not_rewritten(self):
+        player_data = make_player(1, scraping_timestamp="2024-02-12", page_hash="h1")
+        self.db_manager.insert_or_update_table_from_scraper(dict(player_data))
+
+        player_data.update(scraping_timestamp="2024-03-01", page_hash=None)
+        self.db_manager.insert_or_update_table_from_scraper(dict(player_data))
+
+        self.assertEqual(
+            self.fetch_all("SELECT scraping_timestamp, page_hash FROM players"),
+            [("2024-02-12", "h1")],
+        )
+        self.assertEqual(
+            self.db_manager.get_page_signatures(), {player_data["url"]: ("h1", None)}
+        )
+
+    def test_search_ranks_names_and_ignores_accents(self):
+        self.db_manager.bulk_insert_or_update_from_csv(
+            [
+                make_player(1, name="Juan Pérez", current_club="Club Atlético"),
+                make_player(2, name="Perezvon", full_name="Ivan Perezvon"),
+                make_player(3, name="Ivan", current_club="Perez City"),
+                make_player(4, name="Kostas Tsimikas"),
+            ]
+        )
+
+        names = [player.name for player in self.db_manager.search("perez")]
+        # name matches rank above the club match
+        self.assertEqual(sorted(names[:2]), ["Juan Pérez", "Perezvon"])
+        self.assertEqual(names[2:], ["Ivan"])
+        self.assertEqual(len(self.db_manager.search("perez", limit=1)), 1)
+        self.assertEqual(
+            [player.name for player in self.db_manager.search('juan "atle OR')], []
+        )
+        self.assertEqual(
+            [player.name for player in self.db_manager.search("juan atle")],
+            ["Juan Pérez"],
+        )
+
+    def test_search_index_follows_upserts_and_deletes(self):
+        self.db_manager.insert_or_update_table_from_scraper(make_player(1, name="Mo Salah"))
+        self.db_manager.bulk_insert_or_update_from_scraper(
+            [make_player(1, name="Mohamed Salah"), make_player(2, name="Sadio Mané")]
+        )
+        self.db_manager._execute_sql(
+            "DELETE FROM players WHERE url = ?", (make_player(2)["url"],)
+        )
+
+        self.assertEqual(
+            [player.name for player in self.db_manager.search("mohamed")],
+            ["Mohamed Salah"],
+        )
+        self.assertEqual(self.db_manager.search("mane"), [])
+        self.assertEqual(
+            self.fetch_all(
+                "INSERT INTO players_fts(players_fts, rank) VALUES ('integrity-check', 1)"
+            ),
+            [],
+        )
+
+    def test_every_writer_stores_canonical_urls(self):
+        self.db_manager.bulk_insert_or_update_from_csv(
+            [make_player(1, url="https://en.wikipedia.org/wiki/Adama_(footballer,_born_1996)")]
+        )
+        self.db_manager.bulk_insert_or_update_from_scraper(
+            [
+                make_player(
+                    1,
+                    player_id=None,
+                    url="https://en.m.wikipedia.org/wiki/Adama_(footballer%2C_born_1996)",
+                    age=30,
+                )
+            ]
+        )
+
+        self.assertEqual(
+            self.fetch_all("SELECT player_id, url, age FROM players"),
+            [("id-1", "https://en.wikipedia.org/wiki/Adama_(footballer,_born_1996)", 30)],
+        )
+
+    def test_stored_urls_are_canonicalized_and_merged_once(self):
+        canonical = "https://en.wikipedia.org/wiki/Adama_(footballer,_born_1996)"
+        rows = [
+            make_player(1, url=canonical, full_name="Adama Traoré", age=None),
+            make_player(2, url=canonical.replace(",", "%2C"), scraping_timestamp="2024-02-01"),
+            make_player(3, url=canonical.replace("https", "http"), scraping_timestamp="2024-03-01"),
+            make_player(4, url="https://en.wikipedia.org/wiki/kostas_Tsimikas"),
+        ]
+        self.db_manager.conn.executemany(self.db_manager.UPSERT_FROM_CSV_SQL, rows)
+        self.db_manager.conn.execute("PRAGMA user_version = 0;")
+
+        self.db_manager.create_table()
+
+        self.assertEqual(
+            self.fetch_all(
+                "SELECT player_id, url, full_name, age, scraping_timestamp FROM players ORDER BY url"
+            ),
+            [
+                ("id-1", canonical, "Adama Traoré", 23, "2024-03-01"),
+                ("id-4", "https://en.wikipedia.org/wiki/Kostas_Tsimikas", None, 24, None),
+            ],
+        )
+        self.assertEqual(self.db_manager.check_club_stats(), [])
+        self.assertEqual(self.db_manager.canonicalize_stored_urls(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from db_writer import DatabaseWriter, to_db_row
+from player_record import PlayerRecord
+
+
+class TestDatabaseWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp_dir.name) / "players.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_to_db_row_nulls_placeholders_and_blanks(self):
+        player_data = to_db_row(
+            PlayerRecord.from_dict(
+                {
+                    "url": "u",
+                    "age": int,
+                    "full_name": " ",
+                    "date_of_birth": "1996-05-12",
+                    "appearances_current_club": "46",
+                    "scraping_timestamp": "2024-02-12 11:03:05",
+                    "dead": "False",
+                }
+            )
+        )
+
+        self.assertEqual(player_data["url"], "u")
+        self.assertIsNone(player_data["age"])
+        self.assertIsNone(player_data["full_name"])
+        self.assertEqual(player_data["date_of_birth"], "1996-05-12")
+        self.assertEqual(player_data["appearances_current_club"], 46)
+        self.assertEqual(player_data["scraping_timestamp"], "2024-02-12 11:03:05")
+        self.assertIs(player_data["dead"], False)
+
+    def test_rows_are_committed_in_batches(self):
+        writer = DatabaseWriter(self.db_path, batch_size=4, flush_interval=0.05)
+        writer.start()
+        for i in range(10):
+            writer.put(
+                PlayerRecord(
+                    f"https://en.wikipedia.org/wiki/Player_{i}",
+                    name=f"Player {i}",
+                    age=25,
+                    current_club="Liverpool",
+                    appearances_current_club=10,
+                    goals_current_club=1,
+                    scraping_timestamp=datetime(2024, 2, 12, 11, 3, 5),
+                )
+            )
+        writer.close()
+
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+        conn.close()
+        self.assertEqual(writer.written, 10)
+        self.assertEqual(count, 10)
+
+    def test_close_can_leave_the_writer_error_to_the_caller(self):
+        # a directory cannot be opened as a database
+        writer = DatabaseWriter(self.tmp_dir.name).start()
+
+        writer.close(raise_error=False)
+
+        self.assertIsNotNone(writer.error)
+        with self.assertRaises(type(writer.error)):
+            writer.close()
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from datetime import date, datetime
+
+from bs4 import BeautifulSoup
+
+from player_record import PlayerRecord
+from scraper import (
+    extract_player_info,
+    is_unchanged,
+    lead_text,
+    looks_like_player_page,
+    page_signature,
+    parse_html,
+    scrape_text_based_info,
+    walk_infobox,
+)
+from stub_server import PAGES_DIR, without_timestamp
+
+
+class TestExtraction(unittest.TestCase):
+    def test_walk_infobox_collects_career_sections(self):
+        soup = parse_html((PAGES_DIR / "Kostas_Tsimikas.html").read_bytes())
+        infobox = soup.find("table", class_="infobox vcard")
+
+        fields = walk_infobox(infobox)
+
+        self.assertEqual(fields["full_name"], "Konstantinos Tsimikas")
+        self.assertEqual(fields["date_of_birth"], "1996-05-12")
+        self.assertEqual(fields["positions"], "Left-back")
+        self.assertEqual(fields["current_club"], "Liverpool")
+        self.assertEqual(fields["appearances_current_club"], "46")
+        self.assertEqual(fields["goals_current_club"], "0")
+        self.assertEqual(fields["national_team"], "Greece")
+
+    def test_infobox_only_parse_matches_full_parse(self):
+        for page in sorted(PAGES_DIR.glob("*.html")):
+            html = page.read_bytes()
+            with self.subTest(page=page.name):
+                self.assertEqual(
+                    without_timestamp(extract_player_info(page.stem, html, True)),
+                    without_timestamp(extract_player_info(page.stem, html)),
+                )
+
+    def test_text_fallback_without_infobox(self):
+        html = (PAGES_DIR / "Juan_Perez_footballer.html").read_bytes()
+
+        player_data = extract_player_info("Juan_Perez", html, infobox_only=True)
+
+        self.assertEqual(player_data.name, "Juan Pérez")
+        self.assertEqual(player_data.date_of_birth, date(1998, 3, 3))
+        self.assertEqual(player_data.positions, "midfielder")
+
+    def test_player_record_is_typed(self):
+        html = (PAGES_DIR / "Kostas_Tsimikas.html").read_bytes()
+
+        player = extract_player_info("Kostas_Tsimikas", html)
+
+        self.assertEqual(player.date_of_birth, date(1996, 5, 12))
+        self.assertIsInstance(player.age, int)
+        self.assertEqual(player.appearances_current_club, 46)
+        self.assertEqual(player.goals_current_club, 0)
+        self.assertIsInstance(player.scraping_timestamp, datetime)
+        self.assertIs(player.dead, False)
+        self.assertFalse(hasattr(player, "__dict__"))
+
+    def test_unparsed_date_of_birth_keeps_its_text(self):
+        players = [
+            PlayerRecord.from_dict({"url": "a", "date_of_birth": value})
+            for value in ["1996-05-12", "12 May 1996", " c. 1890 ", ""]
+        ]
+
+        self.assertEqual(
+            [player.date_of_birth for player in players],
+            [date(1996, 5, 12), date(1996, 5, 12), "c. 1890", None],
+        )
+        self.assertEqual(players[2].to_row()["date_of_birth"], "c. 1890")
+
+    def test_lead_text_stops_at_first_heading(self):
+        soup = BeautifulSoup(
+            '<div class="mw-parser-output"><p>Lead.</p>'
+            '<div class="mw-heading"><h2>Career</h2></div><p>Body.</p></div>',
+            "html.parser",
+        )
+
+        self.assertEqual(lead_text(soup), "Lead.")
+
+    def test_text_facts_stay_within_their_paragraph(self):
+        soup = BeautifulSoup(
+            '<div class="mw-parser-output">'
+            "<p>Nikos Karelis was born in Heraklion</p>"
+            "<p>Crete is the largest Greek island.</p></div>",
+            "html.parser",
+        )
+
+        self.assertEqual(
+            lead_text(soup),
+            "Nikos Karelis was born in Heraklion\nCrete is the largest Greek island.",
+        )
+        self.assertEqual(scrape_text_based_info(soup)["place_of_birth"], "Heraklion")
+
+    def test_prefilter_never_rejects_a_player(self):
+        for page in sorted(PAGES_DIR.glob("*.html")):
+            html = page.read_bytes()
+            with self.subTest(page=page.name):
+                if extract_player_info(page.stem, html) is not None:
+                    self.assertTrue(looks_like_player_page(html))
+
+    def test_prefilter_rejects_page_without_player_markers(self):
+        html = (PAGES_DIR / "Anfield.html").read_bytes()
+
+        self.assertFalse(looks_like_player_page(html))
+
+    def test_page_signature_prefers_revision_id(self):
+        old = page_signature(b'<script>"wgRevisionId":1190</script><p>old</p>')
+        new = page_signature(b'<script>"wgRevisionId":1190</script><p>new</p>')
+
+        self.assertEqual(old[1], 1190)
+        self.assertNotEqual(old[0], new[0])
+        self.assertTrue(is_unchanged(new, old))
+        self.assertFalse(is_unchanged(page_signature(b"<p>new</p>"), (old[0], None)))
+
+
+if __name__ == "__main__":
+    unittest.main()
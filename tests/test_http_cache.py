@@ -0,0 +1,99 @@
+import tempfile
+import unittest
+
+from fetcher import Fetcher
+from http_cache import ResponseCache, cache_key
+from stub_server import PAGES_DIR, QuietHandler, StubServer
+
+
+class RecordingHandler(QuietHandler):
+    statuses = []
+
+    def send_response(self, code, message=None):
+        RecordingHandler.statuses.append(code)
+        super().send_response(code, message)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        RecordingHandler.statuses = []
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_cache_key_ignores_host_case_and_fragment(self):
+        self.assertEqual(
+            cache_key("HTTPS://EN.wikipedia.org/wiki/Kostas_Tsimikas#Career"),
+            "https://en.wikipedia.org/wiki/Kostas_Tsimikas",
+        )
+
+    def test_revalidates_with_last_modified(self):
+        html = (PAGES_DIR / "Kostas_Tsimikas.html").read_bytes()
+        with StubServer(handler_class=RecordingHandler) as server:
+            url = server.url("Kostas_Tsimikas.html")
+            for _ in range(2):
+                cache = ResponseCache(self.cache_dir.name)
+                fetcher = Fetcher(cache=cache)
+                response = fetcher.get(url)
+                fetcher.close()
+                cache.close()
+                self.assertEqual(response.content, html)
+
+        self.assertEqual(RecordingHandler.statuses, [200, 304])
+
+    def test_fresh_entries_skip_the_network(self):
+        with StubServer(handler_class=RecordingHandler) as server:
+            url = server.url("Anfield.html")
+            cache = ResponseCache(self.cache_dir.name, max_age=3600)
+            fetcher = Fetcher(cache=cache)
+            fetcher.get(url)
+            response = fetcher.get(url)
+            fetcher.close()
+            cache.close()
+
+        self.assertEqual(RecordingHandler.statuses, [200])
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+
+    def test_evicts_least_recently_used(self):
+        with StubServer() as server:
+            cache = ResponseCache(self.cache_dir.name, max_bytes=2500)
+            fetcher = Fetcher(cache=cache)
+            first = server.url("Kostas_Tsimikas.html")
+            second = server.url("Mohamed_Abou_Gabal.html")
+            third = server.url("Anfield.html")
+            fetcher.get(first)
+            fetcher.get(second)
+            cache.touch(first)
+            fetcher.get(third)
+
+            self.assertIsNotNone(cache.lookup(first))
+            self.assertIsNone(cache.lookup(second))
+            self.assertIsNotNone(cache.lookup(third))
+            fetcher.close()
+            cache.close()
+
+    def test_body_evicted_during_revalidation_is_fetched_again(self):
+        html = (PAGES_DIR / "Kostas_Tsimikas.html").read_bytes()
+        with StubServer(handler_class=RecordingHandler) as server:
+            url = server.url("Kostas_Tsimikas.html")
+            cache = ResponseCache(self.cache_dir.name)
+            fetcher = Fetcher(cache=cache)
+            fetcher.get(url)
+
+            def fetch_while_evicting(url, headers):
+                # a concurrent store evicts the entry while the 304 is in flight
+                if headers:
+                    cache.lookup(url).path.unlink()
+                return fetcher._request(url, headers=headers)
+
+            response = cache.get(url, fetch_while_evicting)
+            fetcher.close()
+            cache.close()
+
+        self.assertEqual(response.content, html)
+        self.assertEqual(RecordingHandler.statuses, [200, 304, 200])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+import metrics
+from pipeline import scrape_all_pipelined
+from stub_server import StubServer
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        metrics.disable()
+
+    def test_timed_is_a_plain_call_when_disabled(self):
+        calls = []
+        add = metrics.timed("add")(lambda a, b: calls.append((a, b)) or a + b)
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertIsNone(metrics.active())
+
+        registry = metrics.enable()
+        add(2, 3)
+        self.assertEqual(registry.summary()["add"]["count"], 1)
+        self.assertEqual(calls, [(1, 2), (2, 3)])
+
+    def test_summary_percentiles_and_prometheus(self):
+        registry = metrics.StageMetrics()
+        for millis in range(1, 101):
+            registry.record("fetch", millis / 1000)
+
+        summary = registry.summary()["fetch"]
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["total_s"], 5.05)
+        self.assertAlmostEqual(summary["p50_ms"], 51)
+        self.assertAlmostEqual(summary["p99_ms"], 100)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "metrics.prom")
+            registry.write_prometheus(path, {"players": 3})
+            with open(path, encoding="utf-8") as prometheus_file:
+                text = prometheus_file.read()
+        self.assertIn('scraper_stage_seconds_count{stage="fetch"} 100', text)
+        self.assertIn('scraper_stage_seconds{stage="fetch",quantile="0.5"} 0.051000', text)
+        self.assertIn('scraper_pages_total{outcome="players"} 3', text)
+
+    def test_parser_process_timings_and_profile_reach_the_parent(self):
+        registry = metrics.enable(profile=True)
+        with StubServer() as server:
+            urls = [server.url("Kostas_Tsimikas.html"), server.url("Anfield.html")]
+            results = list(scrape_all_pipelined(urls, parse_workers=1))
+
+        self.assertEqual(results[0].name, "Kostas Tsimikas")
+        self.assertIsNone(results[1])
+        summary = registry.summary()
+        self.assertEqual(summary["fetch"]["count"], 2)
+        self.assertEqual(summary["prefilter"]["count"], 2)
+        self.assertEqual(summary["extract.walk_infobox"]["count"], 1)
+        self.assertIsNotNone(registry.profile_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
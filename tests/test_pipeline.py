@@ -0,0 +1,72 @@
+import unittest
+from collections import Counter
+
+from pipeline import scrape_all, scrape_all_pipelined
+from scraper import extract_player_info, page_signature
+from stub_server import PAGES, PAGES_DIR, StubServer, without_timestamp
+
+
+class TestPipeline(unittest.TestCase):
+    def test_extract_player_info_from_html(self):
+        html = (PAGES_DIR / "Kostas_Tsimikas.html").read_bytes()
+
+        player_data = extract_player_info("Kostas_Tsimikas", html)
+
+        self.assertEqual(player_data.name, "Kostas Tsimikas")
+        self.assertEqual(player_data.current_club, "Liverpool")
+        self.assertEqual(player_data.national_team, "Greece")
+
+    def test_extract_player_info_rejects_non_player(self):
+        html = (PAGES_DIR / "Anfield.html").read_bytes()
+
+        self.assertIsNone(extract_player_info("Anfield", html))
+
+    def test_concurrent_results_keep_input_order(self):
+        with StubServer() as server:
+            # distinct URLs, repeated ones would be skipped as duplicates
+            urls = [server.url(f"{page}?n={i}") for i in range(3) for page in PAGES]
+            results = list(scrape_all(urls, concurrency=4, per_host_limit=2))
+
+        names = [r.name if r else None for r in results]
+        self.assertEqual(
+            names, ["Kostas Tsimikas", None, "Mohamed Abou Gabal"] * 3
+        )
+
+    def test_pipelined_matches_sequential(self):
+        with StubServer() as server:
+            urls = [server.url(page) for page in PAGES * 2]
+            sequential = list(scrape_all(urls))
+            pipelined = list(
+                scrape_all_pipelined(urls, concurrency=3, parse_workers=2)
+            )
+
+        self.assertEqual(
+            [without_timestamp(r) for r in pipelined],
+            [without_timestamp(r) for r in sequential],
+        )
+
+    def test_stats_count_prefiltered_pages(self):
+        stats = Counter()
+        with StubServer() as server:
+            urls = [server.url(page) for page in PAGES]
+            list(scrape_all_pipelined(urls, parse_workers=1, stats=stats))
+
+        self.assertEqual(stats, Counter(players=2, prefiltered=1))
+
+    def test_known_unchanged_pages_are_skipped(self):
+        stats = Counter()
+        with StubServer() as server:
+            urls = [server.url(page) for page in PAGES]
+            known_pages = {
+                urls[0]: page_signature((PAGES_DIR / PAGES[0]).read_bytes()),
+                urls[2]: ("stale-hash", None),
+            }
+            results = list(scrape_all(urls, stats=stats, known_pages=known_pages))
+
+        self.assertIsNone(results[0])
+        self.assertEqual(results[2].name, "Mohamed Abou Gabal")
+        self.assertEqual(stats, Counter(players=1, prefiltered=1, unchanged=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from db_manager import DatabaseManager
+from player_store import LRUCache, PlayerStore
+from test_db_manager import make_player
+
+
+class TestPlayerStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp_dir.name) / "players.sqlite")
+        self.db_manager = DatabaseManager(self.db_path)
+        self.db_manager.create_table()
+        self.db_manager.bulk_insert_or_update_from_csv(
+            make_player(index) for index in range(20)
+        )
+        self.store = PlayerStore(self.db_path, pool_size=2)
+        self.store.watch(self.db_manager)
+
+    def tearDown(self):
+        self.store.close()
+        self.db_manager.close_connection()
+        self.tmp_dir.cleanup()
+
+    def url(self, index):
+        return f"https://en.wikipedia.org/wiki/Player_{index}"
+
+    def test_get_many_caches_hits_and_misses(self):
+        urls = [self.url(1), self.url(2), self.url(99)]
+
+        players = self.store.get_many(urls)
+        self.assertEqual(sorted(players), sorted(urls[:2]))
+        self.assertEqual(players[self.url(1)].age, 21)
+        self.assertEqual(self.store.misses, 3)
+
+        self.assertEqual(self.store.get_many(urls), players)
+        self.assertEqual(self.store.hits, 3)
+        self.assertEqual(self.store.misses, 3)
+
+    def test_by_club_is_invalidated_by_writes(self):
+        members = [player.url for player in self.store.by_club("Club 3")]
+        self.assertEqual(len(members), 3)
+        self.assertEqual(self.store.get(self.url(3)).current_club, "Club 3")
+
+        self.db_manager.insert_or_update_table_from_scraper(
+            make_player(3, current_club="Club 4")
+        )
+        self.db_manager.bulk_insert_or_update_from_scraper(
+            [make_player(50, current_club="Club 3")]
+        )
+
+        members = [player.url for player in self.store.by_club("Club 3")]
+        self.assertIn(self.url(50), members)
+        self.assertNotIn(self.url(3), members)
+        self.assertEqual(self.store.get(self.url(3)).current_club, "Club 4")
+        self.assertIn(self.url(3), [p.url for p in self.store.by_club("Club 4")])
+
+    def test_pool_is_shared_across_threads(self):
+        results = []
+
+        def lookup(index):
+            results.append(self.store.get_many([self.url(index)]))
+
+        threads = [threading.Thread(target=lookup, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 8)
+        self.assertLessEqual(self.store._opened, 2)
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        self.assertEqual(cache.put("c", 3), [("b", 2)])
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import time
+import unittest
+from collections import Counter
+from datetime import datetime, timezone
+from unittest import mock
+
+import requests
+
+from fetcher import FetchError, Fetcher
+from pipeline import scrape_all
+from rate_control import AimdLimiter, TokenBucket, parse_retry_after
+from stub_server import StubServer, throttling_handler
+
+PAGE = "Kostas_Tsimikas.html"
+
+
+class TestRateControl(unittest.TestCase):
+    def test_retry_after_is_honoured(self):
+        handler = throttling_handler(failures=1, status=429, retry_after=1)
+        with StubServer(handler_class=handler) as server:
+            fetcher = Fetcher(retries=2)
+            start = time.monotonic()
+            response = fetcher.get(server.url(PAGE))
+            elapsed = time.monotonic() - start
+            fetcher.close()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(elapsed, 0.9)
+        self.assertEqual(handler.requests[f"/{PAGE}"], 2)
+
+    def test_persistent_503_counts_as_failed_page(self):
+        handler = throttling_handler(failures=10, status=503)
+        stats = Counter()
+        with StubServer(handler_class=handler) as server:
+            urls = [server.url(PAGE)]
+            results = list(
+                scrape_all(
+                    urls, stats=stats, fetch_options={"retries": 2, "backoff_base": 0.01}
+                )
+            )
+
+        self.assertEqual(results, [None])
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(handler.requests[f"/{PAGE}"], 3)
+
+    def test_read_timeout(self):
+        handler = throttling_handler(failures=0, delay=1)
+        with StubServer(handler_class=handler) as server:
+            fetcher = Fetcher(timeout=(1, 0.2), retries=0)
+            with self.assertRaises(FetchError):
+                fetcher.get(server.url(PAGE))
+            fetcher.close()
+
+    def test_request_errors_are_retried_or_become_fetch_errors(self):
+        fetcher = Fetcher(retries=2, backoff_base=0.01)
+        ok = mock.Mock(status_code=200)
+        with mock.patch.object(
+            fetcher.session,
+            "get",
+            side_effect=[requests.exceptions.ChunkedEncodingError("cut off"), ok],
+        ) as get:
+            self.assertIs(fetcher.get("http://example.test/page"), ok)
+        self.assertEqual(get.call_count, 2)
+
+        with mock.patch.object(
+            fetcher.session, "get", side_effect=requests.TooManyRedirects("loop")
+        ) as get:
+            with self.assertRaises(FetchError):
+                fetcher.get("http://example.test/page")
+        self.assertEqual(get.call_count, 1)
+        fetcher.close()
+
+        with self.assertRaises(ValueError):
+            Fetcher(retries=-1)
+
+    def test_aimd_limit(self):
+        limiter = AimdLimiter(maximum=8, cooldown=60)
+        limiter.on_failure()
+        self.assertEqual(limiter.limit, 4)
+        # a burst of errors within the cooldown is one signal
+        limiter.on_failure()
+        self.assertEqual(limiter.limit, 4)
+        for _ in range(4):
+            limiter.on_success()
+        self.assertAlmostEqual(limiter.limit, 5, delta=0.1)
+
+        slow = AimdLimiter(maximum=8, latency_target=0.5)
+        slow.on_success(latency=2.0)
+        self.assertEqual(slow.limit, 4)
+
+    def test_token_bucket_rate(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_parse_retry_after(self):
+        now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        self.assertEqual(parse_retry_after("120"), 120)
+        self.assertEqual(
+            parse_retry_after("Mon, 01 Jan 2024 12:00:30 GMT", now=now), 30
+        )
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import multiprocessing
+import tempfile
+import unittest
+from unittest import mock
+
+from pipeline import scrape_all
+import reprocess as reprocess_module
+from reprocess import reprocess
+from scraper import extract_player_info
+from snapshot_archive import SnapshotArchive
+from stub_server import PAGES, PAGES_DIR, StubServer, without_timestamp
+
+
+def append_pages(archive_dir, worker, count):
+    archive = SnapshotArchive(archive_dir)
+    for index in range(count):
+        archive.append(f"page-{worker}-{index}", f"<html>{worker} {index}</html>" * index)
+    archive.close()
+
+
+class TestSnapshotArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_latest_snapshot_wins(self):
+        archive = SnapshotArchive(self.archive_dir)
+        archive.append("page", b"<html>old</html>")
+        archive.append("other", "<html>other</html>")
+        archive.append("page", b"<html>new</html>")
+        archive.close()
+
+        archive = SnapshotArchive(self.archive_dir)
+        entries = archive.entries()
+        self.assertEqual(list(entries), ["page", "other"])
+        self.assertEqual(archive.read(*entries["page"]), b"<html>new</html>")
+        self.assertEqual(archive.read(*entries["other"]), b"<html>other</html>")
+        archive.close()
+
+    def test_processes_can_append_to_one_archive(self):
+        processes = [
+            multiprocessing.Process(target=append_pages, args=(self.archive_dir, worker, 1000))
+            for worker in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        archive = SnapshotArchive(self.archive_dir)
+        entries = archive.entries()
+        self.assertEqual(len(entries), 4000)
+        for url, (offset, length) in entries.items():
+            _, worker, index = url.split("-")
+            expected = f"<html>{worker} {index}</html>" * int(index)
+            self.assertEqual(archive.read(offset, length), expected.encode("utf-8"))
+        archive.close()
+
+    def test_partial_index_line_is_ignored(self):
+        archive = SnapshotArchive(self.archive_dir)
+        archive.append("page", b"<html></html>")
+        archive.close()
+        with open(archive.index_path, "a", encoding="utf-8") as index_file:
+            index_file.write("12\t3")
+
+        self.assertEqual(list(SnapshotArchive(self.archive_dir).entries()), ["page"])
+
+    def test_reprocess_matches_live_extraction(self):
+        archive = SnapshotArchive(self.archive_dir)
+        with StubServer() as server:
+            urls = [server.url(page) for page in PAGES]
+            list(scrape_all(urls, archive=archive))
+        archive.close()
+
+        results = list(reprocess(self.archive_dir, workers=2, chunksize=1))
+
+        expected = [
+            extract_player_info(url, (PAGES_DIR / page).read_bytes())
+            for url, page in zip(urls, PAGES)
+        ]
+        # non-player pages are archived too but yield None in both paths
+        expected = [result for result in expected if result is not None]
+        self.assertEqual(
+            [without_timestamp(r) for r in results if r is not None],
+            [without_timestamp(r) for r in expected],
+        )
+
+
+    def test_writer_error_does_not_mask_the_reprocess_error(self):
+        def broken_reprocess(*args):
+            raise RuntimeError("extractor crashed")
+            yield
+
+        # a directory cannot be opened as a database, so the writer fails too
+        with mock.patch.object(reprocess_module, "reprocess", broken_reprocess):
+            with self.assertRaisesRegex(RuntimeError, "extractor crashed"):
+                reprocess_module.main(self.archive_dir, db_path=self.archive_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
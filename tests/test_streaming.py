@@ -0,0 +1,149 @@
+import csv
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+
+import columnar
+from player_record import PlayerRecord
+from scraper_importer import read_scraper_csv, read_scraper_output
+from streaming import Checkpoint, open_output_writer, read_urls, stream_to_csv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import run_scraper  # noqa: E402
+
+PLAYER = PlayerRecord(
+    "https://en.wikipedia.org/wiki/Kostas_Tsimikas",
+    name="Kostas Tsimikas",
+    date_of_birth=date(1996, 5, 12),
+    age=28,
+    current_club="Liverpool",
+    appearances_current_club=46,
+    goals_current_club=0,
+    scraping_timestamp=datetime(2024, 2, 12, 11, 3, 5),
+    revision_id=1001,
+)
+
+
+def fake_scrape(urls, fail_after=None):
+    for index, url in enumerate(urls):
+        if fail_after is not None and index == fail_after:
+            raise RuntimeError("simulated crash")
+        yield None if url.endswith("Anfield") else PlayerRecord(url, name=url[-1])
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp_dir.name)
+        self.urls_file = tmp / "urls.csv"
+        self.output_file = tmp / "out.csv"
+        self.urls = [f"https://en.wikipedia.org/wiki/Player_{i}" for i in range(7)]
+        self.urls.insert(3, "https://en.wikipedia.org/wiki/Anfield")
+        self.urls_file.write_text("\n".join(self.urls) + "\n\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_output_urls(self):
+        with open(self.output_file, newline="", encoding="utf-8") as csvfile:
+            return [row["url"] for row in csv.DictReader(csvfile, delimiter=";")]
+
+    def test_read_urls_skips_blank_lines_and_offset(self):
+        self.assertEqual(list(read_urls(self.urls_file, skip=2)), self.urls[2:])
+
+    def test_resume_after_crash_writes_every_row_once(self):
+        with self.assertRaises(RuntimeError):
+            stream_to_csv(
+                self.urls_file,
+                self.output_file,
+                lambda urls: fake_scrape(urls, fail_after=5),
+                checkpoint_every=2,
+            )
+        checkpoint = Checkpoint(f"{self.output_file}.checkpoint")
+        self.assertEqual(checkpoint.load()[0], 5)
+
+        processed = stream_to_csv(
+            self.urls_file, self.output_file, fake_scrape, resume=True
+        )
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(
+            self.read_output_urls(), [url for url in self.urls if "Anfield" not in url]
+        )
+        self.assertFalse(checkpoint.path.exists())
+
+    def test_csv_output_reads_back_typed(self):
+        writer = open_output_writer(self.output_file)
+        writer.write(PLAYER)
+        writer.close()
+
+        (row,) = read_scraper_output(self.output_file)
+
+        self.assertEqual(row["date_of_birth"], "1996-05-12")
+        self.assertEqual(row["age"], 28)
+        self.assertEqual(row["appearances_current_club"], 46)
+        self.assertIsNone(row["full_name"])
+
+    def test_csv_output_keeps_integers_next_to_missing_values(self):
+        unknown = PlayerRecord("https://en.wikipedia.org/wiki/Player_0", name="Player 0")
+        self.urls_file.write_text(f"{PLAYER.url}\n{unknown.url}\n", encoding="utf-8")
+
+        run_scraper.scrape_to_outputs(
+            self.urls_file,
+            lambda urls: [PLAYER, unknown],
+            Counter(),
+            self.output_file,
+            stream=False,
+            resume=False,
+        )
+
+        counts = [
+            (row["age"], row["appearances_current_club"], row["goals_current_club"])
+            for row in read_scraper_csv(self.output_file)
+        ]
+        self.assertEqual(counts, [(28, 46, 0), (None, None, None)])
+
+    def test_float_text_from_older_outputs_reads_as_integers(self):
+        player = PlayerRecord.from_dict(
+            {
+                "url": "u",
+                "age": "26.0",
+                "appearances_current_club": float("nan"),
+                "goals_current_club": "0.5",
+            }
+        )
+
+        self.assertEqual(player.age, 26)
+        self.assertIsNone(player.appearances_current_club)
+        self.assertIsNone(player.goals_current_club)
+
+    @unittest.skipIf(columnar.pa is None, "pyarrow is not installed")
+    def test_columnar_output_round_trip(self):
+        for suffix in [".parquet", ".arrow"]:
+            with self.subTest(suffix=suffix):
+                path = Path(self.tmp_dir.name) / f"players{suffix}"
+                writer = columnar.ColumnarWriter(path, row_group_size=2)
+                for _ in range(5):
+                    writer.write(PLAYER)
+                writer.close()
+
+                self.assertEqual(list(columnar.read_columnar(path)), [PLAYER] * 5)
+
+    @unittest.skipIf(columnar.pa is None, "pyarrow is not installed")
+    def test_columnar_output_keeps_date_text(self):
+        player = PlayerRecord.from_dict({"url": PLAYER.url, "date_of_birth": "c. 1890"})
+        path = Path(self.tmp_dir.name) / "players.parquet"
+        writer = columnar.ColumnarWriter(path)
+        writer.write(PLAYER)
+        writer.write(player)
+        writer.close()
+
+        self.assertEqual(writer.unconverted_dates, 1)
+        self.assertEqual(list(columnar.read_columnar(path)), [PLAYER, player])
+
+
+if __name__ == "__main__":
+    unittest.main()
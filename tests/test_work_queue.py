@@ -0,0 +1,140 @@
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from db_manager import DatabaseManager
+from player_record import PlayerRecord
+from stub_server import PAGES, StubServer, throttling_handler
+from work_queue import WorkQueue
+
+RUN_SCRAPER = Path(__file__).resolve().parent.parent / "run_scraper.py"
+sys.path.insert(0, str(RUN_SCRAPER.parent))
+import run_scraper  # noqa: E402
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.queue_path = str(Path(self.tmp_dir.name) / "queue.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_claims_never_overlap(self):
+        first, second = WorkQueue(self.queue_path), WorkQueue(self.queue_path)
+        self.assertEqual(first.add(f"url-{i}" for i in range(10)), 10)
+        self.assertEqual(first.add(["url-0", "url-10"]), 1)
+
+        claimed_a = first.claim("a", batch_size=4)
+        claimed_b = second.claim("b", batch_size=4)
+        self.assertEqual(len(claimed_a), 4)
+        self.assertFalse(set(claimed_a) & set(claimed_b))
+
+        first.complete(claimed_a, "a")
+        status = second.status()
+        self.assertEqual(status["done"], 4)
+        self.assertEqual(status["leased"], 4)
+        self.assertEqual(status["pending"], 3)
+        self.assertEqual(status["active_workers"], 1)
+        first.close()
+        second.close()
+
+    def test_expired_lease_returns_to_queue(self):
+        work_queue = WorkQueue(self.queue_path, lease_seconds=-1, max_attempts=2)
+        work_queue.add(["url"])
+
+        self.assertEqual(work_queue.claim("crashed"), ["url"])
+        self.assertEqual(work_queue.claim("b"), ["url"])
+        # the first worker no longer holds the lease
+        work_queue.complete(["url"], "crashed")
+        self.assertEqual(work_queue.status()["done"], 0)
+        # a URL that keeps killing workers ends up failed
+        self.assertEqual(work_queue.claim("c"), [])
+        self.assertEqual(work_queue.status()["failed"], 1)
+        work_queue.close()
+
+    def test_release_requeues_until_attempts_run_out(self):
+        work_queue = WorkQueue(self.queue_path, max_attempts=2)
+        work_queue.add(["url"])
+
+        work_queue.release(work_queue.claim("a"), "a")
+        self.assertEqual(work_queue.status()["pending"], 1)
+        work_queue.release(work_queue.claim("a"), "a")
+        self.assertEqual(work_queue.status()["failed"], 1)
+        work_queue.close()
+
+    def test_renew_extends_live_leases(self):
+        work_queue = WorkQueue(self.queue_path, lease_seconds=100)
+        work_queue.add(["url"])
+        work_queue.claim("a")
+        work_queue.conn.execute("UPDATE queue SET lease_expires = ?", (time.time() + 1,))
+
+        work_queue.renew("a")
+
+        (expires,) = work_queue.conn.execute("SELECT lease_expires FROM queue").fetchone()
+        self.assertGreater(expires, time.time() + 50)
+        work_queue.close()
+
+    def test_failed_write_returns_batch_to_queue(self):
+        work_queue = WorkQueue(self.queue_path, max_attempts=1)
+        work_queue.add([f"https://en.wikipedia.org/wiki/Player_{i}" for i in range(2)])
+        db_path = str(Path(self.tmp_dir.name) / "players.sqlite")
+
+        def scrape(urls):
+            for url in urls:
+                yield PlayerRecord(url, name="Player")
+
+        with mock.patch.object(
+            DatabaseManager,
+            "bulk_insert_or_update_from_scraper",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ):
+            run_scraper.drain_queue(work_queue, scrape, db_path, 2, [])
+
+        status = work_queue.status()
+        self.assertEqual(status["done"], 0)
+        self.assertEqual(status["failed"], 2)
+        work_queue.close()
+
+    def test_workers_drain_one_list_without_duplicate_fetches(self):
+        handler = throttling_handler(failures=0)
+        db_path = Path(self.tmp_dir.name) / "players.sqlite"
+        with StubServer(handler_class=handler) as server:
+            urls = [server.url(f"{page}?n={i}") for i in range(8) for page in PAGES]
+            WorkQueue(self.queue_path).add(urls)
+            workers = [
+                subprocess.Popen(
+                    [
+                        sys.executable,
+                        str(RUN_SCRAPER),
+                        "--queue",
+                        self.queue_path,
+                        "--queue-batch",
+                        "3",
+                        "--db",
+                        str(db_path),
+                    ]
+                    # one worker claims from the pipelined fetch thread
+                    + (["--parse-workers", "2"] if index == 0 else []),
+                    stdout=subprocess.DEVNULL,
+                )
+                for index in range(3)
+            ]
+            for worker in workers:
+                self.assertEqual(worker.wait(timeout=120), 0)
+
+        self.assertEqual(sorted(handler.requests.values()), [1] * len(urls))
+        self.assertEqual(WorkQueue(self.queue_path).status()["done"], len(urls))
+        conn = sqlite3.connect(db_path)
+        (players,) = conn.execute("SELECT COUNT(*) FROM players").fetchone()
+        conn.close()
+        self.assertEqual(players, 16)
+
+
+if __name__ == "__main__":
+    unittest.main()